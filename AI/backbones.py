@@ -0,0 +1,37 @@
+import torch.nn as nn
+from torchvision import models
+
+
+# Backbone name -> display name used in the training logs
+BACKBONES = {
+    "resnet18": "ResNet18",
+    "resnet34": "ResNet34",
+    "resnet50": "ResNet50",
+    "mobilenet_v3_small": "MobileNetV3Small",
+}
+
+
+def create_model(backbone="resnet50", pretrained=False):
+    """
+    Create a torchvision backbone with a single-logit binary classification
+    head. `pretrained` loads the ImageNet weights.
+    """
+    if backbone not in BACKBONES:
+        raise ValueError(f"Unknown backbone: {backbone} (expected one of {list(BACKBONES)})")
+
+    model = getattr(models, backbone)(weights="DEFAULT" if pretrained else None)
+
+    if backbone.startswith("resnet"):
+        # Replace the final fully connected layer
+        num_ftrs = model.fc.in_features
+        model.fc = nn.Linear(num_ftrs, 1)  # Binary classification
+        # The served checkpoints also carry a `classifier` head. forward()
+        # never uses it, so it is frozen: DistributedDataParallel would
+        # otherwise wait for gradients that never arrive.
+        model.classifier = nn.Linear(num_ftrs, 1)
+        model.classifier.requires_grad_(False)
+    else:
+        num_ftrs = model.classifier[-1].in_features
+        model.classifier[-1] = nn.Linear(num_ftrs, 1)
+
+    return model
@@ -0,0 +1,266 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import time
+from datetime import datetime
+
+import torch
+
+from backbones import BACKBONES, create_model
+from inference import build_transform, decode_image, load_backbone_model, load_model
+
+
+STAGES = ["load", "decode", "preprocess", "forward", "postprocess", "end_to_end"]
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64]
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def find_images(image_dir):
+    """All images below a split directory (e.g. ./data/test/{0,1}/*)."""
+    paths = glob.glob(os.path.join(image_dir, "**", "*"), recursive=True)
+    return sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def peak_rss_mb():
+    # High-water mark of the whole process, so it is reported once per run,
+    # not per configuration. ru_maxrss is in kilobytes on Linux and bytes on
+    # macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile of an already sorted list."""
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def summarize(stage, batch_size, threads, seconds):
+    """Latency percentiles (ms per call) and throughput (items/s) of one run."""
+    values = sorted(seconds)
+    mean = sum(values) / len(values)
+    return {
+        "stage": stage,
+        "batch_size": batch_size,
+        "threads": threads,
+        "iterations": len(values),
+        "mean_ms": 1000 * mean,
+        "p50_ms": 1000 * percentile(values, 50),
+        "p95_ms": 1000 * percentile(values, 95),
+        "p99_ms": 1000 * percentile(values, 99),
+        "throughput": batch_size / mean if mean > 0 else 0.0,
+    }
+
+
+def time_calls(fn, iterations, warmup):
+    """Call fn(i) warmup + iterations times and return the timed durations."""
+    for i in range(warmup):
+        fn(i)
+    seconds = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(warmup + i)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def model_loader(args):
+    """Function that loads the benchmarked model, or None without --model."""
+    if not args.model:
+        return None
+    if args.loader == "legacy":
+        return lambda: load_model(args.model)
+    return lambda: load_backbone_model(args.model, args.backbone)
+
+
+def run_benchmarks(args, images):
+    transform = build_transform(args.input_size)
+    load = model_loader(args)
+    model = load() if load else create_model(args.backbone).eval()
+    stages = args.stages or STAGES
+    results = []
+
+    def batch_paths(batch_size, i):
+        # Rotate through the images so every call decodes different files
+        start = i * batch_size
+        return [images[(start + j) % len(images)] for j in range(batch_size)]
+
+    for threads in args.threads:
+        torch.set_num_threads(threads)
+        print(f"Threads: {threads}")
+
+        if "load" in stages and load is not None:
+            seconds = time_calls(lambda i: load(), max(3, args.iterations // 5), 1)
+            results.append(summarize("load", 1, threads, seconds))
+
+        for batch_size in args.batch_sizes:
+            decoded = [decode_image(p) for p in batch_paths(batch_size, 0)]
+            batch = torch.stack([transform(image) for image in decoded])
+            with torch.inference_mode():
+                logits = model(batch)
+
+            def decode(i):
+                return [decode_image(p) for p in batch_paths(batch_size, i)]
+
+            def preprocess(i):
+                return torch.stack([transform(image) for image in decoded])
+
+            def forward(i):
+                with torch.inference_mode():
+                    return model(batch)
+
+            def postprocess(i):
+                probabilities = torch.sigmoid(logits).flatten()
+                return (probabilities >= 0.5).tolist(), probabilities.tolist()
+
+            def end_to_end(i):
+                images_ = decode(i)
+                inputs = torch.stack([transform(image) for image in images_])
+                with torch.inference_mode():
+                    probabilities = torch.sigmoid(model(inputs)).flatten()
+                return (probabilities >= 0.5).tolist(), probabilities.tolist()
+
+            functions = {
+                "decode": decode,
+                "preprocess": preprocess,
+                "forward": forward,
+                "postprocess": postprocess,
+                "end_to_end": end_to_end,
+            }
+            for stage, fn in functions.items():
+                if stage not in stages:
+                    continue
+                seconds = time_calls(fn, args.iterations, args.warmup)
+                result = summarize(stage, batch_size, threads, seconds)
+                results.append(result)
+                print(
+                    f"  {stage:<12} batch {batch_size:>2}: "
+                    f"p50 {result['p50_ms']:8.2f} ms, p95 {result['p95_ms']:8.2f} ms, "
+                    f"p99 {result['p99_ms']:8.2f} ms, {result['throughput']:8.1f} items/s"
+                )
+    return results
+
+
+def result_key(result):
+    return (result["stage"], result["batch_size"], result["threads"])
+
+
+def compare(results, baseline_results, tolerance=0.1):
+    """
+    Diff a run against a baseline run. A configuration regresses when its
+    p50 latency grows, or its throughput drops, by more than `tolerance`.
+    """
+    baseline = {result_key(r): r for r in baseline_results}
+    diffs = []
+    for result in results:
+        base = baseline.get(result_key(result))
+        if base is None:
+            continue
+        p50_change = result["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+        throughput_change = (
+            result["throughput"] / base["throughput"] - 1 if base["throughput"] else 0.0
+        )
+        diffs.append(
+            {
+                "stage": result["stage"],
+                "batch_size": result["batch_size"],
+                "threads": result["threads"],
+                "p50_change": p50_change,
+                "throughput_change": throughput_change,
+                "regression": p50_change > tolerance or throughput_change < -tolerance,
+            }
+        )
+    return diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the inference stages (decode, preprocess, forward, ...)"
+    )
+    parser.add_argument("--image-dir", default="./data/test", help="Images to replay")
+    parser.add_argument(
+        "--model", help="Weights to load (default: random weights, no load stage)"
+    )
+    parser.add_argument(
+        "--loader",
+        choices=["legacy", "backbone"],
+        default="legacy",
+        help="legacy: inference.load_model as served by the backend; "
+        "backbone: train.py weights for --backbone",
+    )
+    parser.add_argument("--backbone", choices=list(BACKBONES), default="resnet50")
+    parser.add_argument("--input-size", type=int, default=224)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, help="Default: all")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument(
+        "--threads",
+        nargs="+",
+        type=int,
+        default=[torch.get_num_threads()],
+        help="torch intra-op thread counts to sweep",
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", help="Results file (default ./benchmarks/...)")
+    parser.add_argument("--baseline", help="Earlier results file to diff against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Relative slowdown reported as a regression",
+    )
+    args = parser.parse_args()
+
+    images = find_images(args.image_dir)
+    if not images:
+        parser.error(f"No images found in {args.image_dir}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report = {
+        "meta": {
+            "timestamp": timestamp,
+            "torch_version": torch.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "backbone": args.backbone,
+            "model": args.model,
+            "loader": args.loader if args.model else None,
+            "input_size": args.input_size,
+            "images": len(images),
+            "iterations": args.iterations,
+        },
+        "results": run_benchmarks(args, images),
+    }
+    report["meta"]["peak_rss_mb"] = peak_rss_mb()
+    print(f"Peak RSS over the run: {report['meta']['peak_rss_mb']:.0f} MB")
+
+    output = args.output or os.path.join("./benchmarks", f"benchmark_{timestamp}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        diffs = compare(report["results"], baseline["results"], args.tolerance)
+        regressions = [d for d in diffs if d["regression"]]
+        for d in diffs:
+            print(
+                f"{d['stage']:<12} batch {d['batch_size']:>2} threads {d['threads']:>2}: "
+                f"p50 {d['p50_change']:+.1%}, throughput {d['throughput_change']:+.1%}"
+                + ("  REGRESSION" if d["regression"] else "")
+            )
+        print(f"{len(regressions)} of {len(diffs)} configurations regressed")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
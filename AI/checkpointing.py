@@ -0,0 +1,168 @@
+import copy
+import json
+import os
+import queue
+import random
+import threading
+from glob import glob
+
+import numpy as np
+import torch
+
+
+def snapshot(obj):
+    """Deep copy a (nested) state object with every tensor cloned to CPU."""
+    if torch.is_tensor(obj):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {key: snapshot(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(value) for value in obj)
+    return copy.deepcopy(obj)
+
+
+def capture_rng_state():
+    """Capture the python, numpy and torch RNG states."""
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng_state(state):
+    """Restore RNG states captured by capture_rng_state()."""
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+class CheckpointManager:
+    def __init__(self, checkpoint_dir, keep_last=3, keep_best=1, mode="max"):
+        """
+        Writes training checkpoints on a background thread and rotates them.
+
+        Every call to save() takes a CPU snapshot of the state on the calling
+        thread (cheap compared to serialization) and queues it; a single worker
+        thread does the torch.save and the rotation, so the training loop never
+        waits on disk I/O. Checkpoints are tracked in a manifest.json so that
+        training can be resumed from the latest one.
+
+        Retention policy: a checkpoint is kept if it is one of the `keep_last`
+        most recent ones, or one of the `keep_best` checkpoints with the
+        best metric. Everything else is deleted.
+
+        Args:
+            checkpoint_dir (str): Directory holding the checkpoints
+            keep_last (int): Number of most recent checkpoints to keep
+            keep_best (int): Number of best-metric checkpoints to keep
+            mode (str): 'max' for metrics like accuracy, 'min' for losses
+        """
+        self.checkpoint_dir = checkpoint_dir
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.mode = mode
+        self.manifest_path = os.path.join(checkpoint_dir, "manifest.json")
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+        self.entries = self._read_manifest()
+        self._queue = queue.Queue()
+        self._error = None
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path, "r") as f:
+            entries = json.load(f)
+        # Drop entries whose files were removed by hand
+        return [e for e in entries if os.path.exists(e["path"])]
+
+    def _write_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=4)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                obj, path, entry = job
+                # Write to a temp file first so a crash never leaves a
+                # truncated checkpoint behind
+                tmp_path = path + ".tmp"
+                torch.save(obj, tmp_path)
+                os.replace(tmp_path, path)
+                if entry is not None:
+                    self.entries.append(entry)
+                    self._rotate()
+                    self._write_manifest()
+            except Exception as e:
+                print(f"Error writing checkpoint: {e}")
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _rotate(self):
+        keep = set(e["path"] for e in self.entries[-self.keep_last :])
+        scored = [e for e in self.entries if e["metric"] is not None]
+        scored.sort(key=lambda e: e["metric"], reverse=self.mode == "max")
+        keep.update(e["path"] for e in scored[: self.keep_best])
+
+        for entry in self.entries:
+            if entry["path"] not in keep and os.path.exists(entry["path"]):
+                os.remove(entry["path"])
+        self.entries = [e for e in self.entries if e["path"] in keep]
+
+    def save(self, state, epoch, batch=0, metric=None):
+        """Snapshot `state` and queue it as a rotated training checkpoint."""
+        self._raise_pending_error()
+        path = os.path.join(
+            self.checkpoint_dir, f"checkpoint_e{epoch:03d}_b{batch:05d}.pt"
+        )
+        entry = {"path": path, "epoch": epoch, "batch": batch, "metric": metric}
+        self._queue.put((snapshot(state), path, entry))
+        return path
+
+    def save_async(self, obj, path):
+        """Snapshot `obj` and queue a plain torch.save to `path` (not rotated)."""
+        self._raise_pending_error()
+        self._queue.put((snapshot(obj), path, None))
+        return path
+
+    def latest(self):
+        """Return the path of the most recent checkpoint, or None."""
+        if self.entries:
+            return self.entries[-1]["path"]
+        paths = sorted(glob(os.path.join(self.checkpoint_dir, "checkpoint_*.pt")))
+        return paths[-1] if paths else None
+
+    def wait(self):
+        """Block until all queued checkpoints are on disk."""
+        self._queue.join()
+        self._raise_pending_error()
+
+    def close(self):
+        """Flush outstanding writes and stop the worker thread."""
+        self._queue.put(None)
+        self._worker.join()
+        self._raise_pending_error()
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Checkpoint write failed: {error}")
+
+
+def load_checkpoint(path, device="cpu"):
+    """Load a checkpoint written by CheckpointManager."""
+    return torch.load(path, map_location=device, weights_only=False)
@@ -0,0 +1,62 @@
+import os
+
+import torch
+import torch.distributed as dist
+
+
+def init_distributed(rank, world_size, master_addr="127.0.0.1", master_port="29500"):
+    """
+    Join the gloo process group. When launched by torchrun the rendezvous
+    settings come from the environment; otherwise they are filled in for a
+    single-box launch.
+    """
+    os.environ.setdefault("MASTER_ADDR", master_addr)
+    os.environ.setdefault("MASTER_PORT", str(master_port))
+    dist.init_process_group("gloo", rank=rank, world_size=world_size)
+
+
+def env_rank_and_world_size():
+    """Return (rank, world_size) from torchrun's environment, or None."""
+    if "WORLD_SIZE" not in os.environ or int(os.environ["WORLD_SIZE"]) <= 1:
+        return None
+    return int(os.environ["RANK"]), int(os.environ["WORLD_SIZE"])
+
+
+def cleanup_distributed():
+    if dist.is_available() and dist.is_initialized():
+        dist.barrier()
+        dist.destroy_process_group()
+
+
+def broadcast_values(values, count, world_size):
+    """Broadcast `count` floats from rank 0 (other ranks may pass None)."""
+    if world_size == 1:
+        return values
+    tensor = torch.tensor(
+        values if values is not None else [0.0] * count, dtype=torch.float64
+    )
+    dist.broadcast(tensor, src=0)
+    return tensor.tolist()
+
+
+def broadcast_object(obj, world_size):
+    """Broadcast a picklable object from rank 0 to every rank."""
+    if world_size == 1:
+        return obj
+    holder = [obj]
+    dist.broadcast_object_list(holder, src=0)
+    return holder[0]
+
+
+def scaling_report(throughput, world_size, baseline_throughput=None):
+    """
+    Compare the measured training throughput (samples/s) against a
+    single-process baseline. Efficiency is speedup / world_size.
+    """
+    report = {"world_size": world_size, "train_samples_per_second": throughput}
+    if baseline_throughput:
+        speedup = throughput / baseline_throughput
+        report["baseline_samples_per_second"] = baseline_throughput
+        report["speedup"] = speedup
+        report["scaling_efficiency"] = speedup / world_size
+    return report
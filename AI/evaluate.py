@@ -0,0 +1,265 @@
+import torch
+import torch.nn.functional as F
+from torch.utils.data import DataLoader
+from torchvision import transforms
+
+from backbones import BACKBONES, create_model
+from temporal import load_temporal_model
+from trash_dataset import BinaryClassificationDataset, ClipDataset
+import argparse
+import json
+import os
+
+
+# Deterministic evaluation transform: no random flips/rotations, so the same
+# checkpoint always gives the same numbers
+eval_transform = transforms.Compose(
+    [
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        # Based on imagenet statistics
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+    ]
+)
+
+TTA_VIEWS = ["identity", "hflip", "vflip", "hvflip"]
+
+
+def tta_batch(inputs, views):
+    """
+    Stack the test-time augmentation views of a batch along the batch dim.
+    Flips act on the last two (H, W) dims, so clip batches work too.
+    """
+    stacked = []
+    for view in views:
+        if view == "identity":
+            stacked.append(inputs)
+        elif view == "hflip":
+            stacked.append(torch.flip(inputs, dims=[-1]))
+        elif view == "vflip":
+            stacked.append(torch.flip(inputs, dims=[-2]))
+        elif view == "hvflip":
+            stacked.append(torch.flip(inputs, dims=[-2, -1]))
+        else:
+            raise ValueError(f"Unknown TTA view: {view}")
+    return torch.cat(stacked, dim=0)
+
+
+class MetricAccumulator:
+    def __init__(self, device):
+        """
+        Collects logits and labels on the evaluation device. Nothing is copied
+        to the host until compute(), so there is no per-batch .item() sync.
+        """
+        self.device = device
+        self.logits = []
+        self.labels = []
+
+    def update(self, logits, labels):
+        self.logits.append(logits.detach().view(-1).float())
+        self.labels.append(labels.detach().view(-1).to(self.device).float())
+
+    def compute(self, threshold=0.5, sweep_steps=21):
+        """Return the metrics dictionary for everything seen so far."""
+        logits = torch.cat(self.logits)
+        labels = torch.cat(self.labels)
+        probs = torch.sigmoid(logits)
+
+        loss = F.binary_cross_entropy_with_logits(logits, labels)
+        cm = confusion_matrix(probs, labels, threshold)
+        tn, fp, fn, tp = cm.view(-1)
+        total = cm.sum()
+        precision = tp / (tp + fp).clamp(min=1)
+        recall = tp / (tp + fn).clamp(min=1)
+        f1 = 2 * precision * recall / (precision + recall).clamp(min=1e-12)
+
+        sweep = threshold_sweep(probs, labels, torch.linspace(0, 1, sweep_steps))
+
+        # Single device -> host transfer for all scalar metrics
+        scalars = torch.stack(
+            [
+                100 * (tp + tn) / total,
+                loss,
+                precision,
+                recall,
+                f1,
+                roc_auc(probs, labels),
+            ]
+        ).tolist()
+        return {
+            "samples": int(total),
+            "threshold": threshold,
+            "accuracy": scalars[0],
+            "loss": scalars[1],
+            "precision": scalars[2],
+            "recall": scalars[3],
+            "f1": scalars[4],
+            "roc_auc": scalars[5],
+            "confusion_matrix": cm.tolist(),
+            "threshold_sweep": sweep,
+        }
+
+
+def confusion_matrix(probs, labels, threshold=0.5):
+    """2x2 confusion matrix [[tn, fp], [fn, tp]] as a tensor."""
+    predicted = (probs >= threshold).long()
+    index = labels.long() * 2 + predicted
+    return torch.bincount(index, minlength=4).view(2, 2)
+
+
+def roc_auc(probs, labels):
+    """Area under the ROC curve, computed on the tensors' device."""
+    positives = labels.sum()
+    negatives = labels.numel() - positives
+    if positives == 0 or negatives == 0:
+        return torch.tensor(float("nan"), device=probs.device)
+
+    order = torch.argsort(probs, descending=True)
+    sorted_probs = probs[order]
+    sorted_labels = labels[order]
+    tps = torch.cumsum(sorted_labels, dim=0)
+    fps = torch.cumsum(1 - sorted_labels, dim=0)
+
+    # Only keep the last position of each distinct score so ties are handled
+    distinct = torch.ones_like(sorted_probs, dtype=torch.bool)
+    distinct[:-1] = sorted_probs[1:] != sorted_probs[:-1]
+    zero = torch.zeros(1, device=probs.device)
+    tpr = torch.cat([zero, tps[distinct] / positives])
+    fpr = torch.cat([zero, fps[distinct] / negatives])
+    return torch.trapezoid(tpr, fpr)
+
+
+def threshold_sweep(probs, labels, thresholds):
+    """Precision/recall/accuracy at each threshold, computed in one pass."""
+    thresholds = thresholds.to(probs.device)
+    predicted = probs.unsqueeze(0) >= thresholds.unsqueeze(1)
+    positive = labels.bool().unsqueeze(0)
+    tp = (predicted & positive).sum(dim=1).float()
+    fp = (predicted & ~positive).sum(dim=1).float()
+    fn = (~predicted & positive).sum(dim=1).float()
+    tn = (~predicted & ~positive).sum(dim=1).float()
+    precision = tp / (tp + fp).clamp(min=1)
+    recall = tp / (tp + fn).clamp(min=1)
+    accuracy = 100 * (tp + tn) / labels.numel()
+
+    rows = torch.stack([thresholds, precision, recall, accuracy], dim=1).tolist()
+    return [
+        {"threshold": t, "precision": p, "recall": r, "accuracy": a}
+        for t, p, r, a in rows
+    ]
+
+
+def run_evaluation(model, loader, device, tta_views=None, threshold=0.5):
+    """
+    Evaluate a model on a dataloader and return the metrics dictionary.
+
+    With `tta_views`, every batch is expanded into all views and run through
+    the model in a single forward pass; the view probabilities are averaged.
+    """
+    model.eval()
+    accumulator = MetricAccumulator(device)
+    with torch.no_grad():
+        for inputs, labels in loader:
+            inputs = inputs.to(device, non_blocking=True)
+            if tta_views:
+                batch_size = inputs.size(0)
+                outputs = model(tta_batch(inputs, tta_views)).view(
+                    len(tta_views), batch_size
+                )
+                # Average in probability space, then map back to logits
+                probs = torch.sigmoid(outputs).mean(dim=0)
+                outputs = torch.logit(probs, eps=1e-6)
+            else:
+                outputs = model(inputs)
+            accumulator.update(outputs, labels)
+
+    metrics = accumulator.compute(threshold=threshold)
+    metrics["tta_views"] = list(tta_views or [])
+    return metrics
+
+
+def load_eval_model(checkpoint_path, device="cpu", backbone="resnet50"):
+    """
+    Build the training architecture and load weights from either a plain
+    state dict (.pth) or a training checkpoint written by train.py (.pt).
+    """
+    model = create_model(backbone)
+
+    state = torch.load(checkpoint_path, map_location=device, weights_only=False)
+    if "model" in state:
+        state = state["model"]
+    model.load_state_dict(state)
+    return model.to(device).eval()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a trained checkpoint")
+    parser.add_argument("checkpoint", help="Path to a .pth state dict or .pt checkpoint")
+    parser.add_argument("--data-dir", default="./data", help="Dataset root directory")
+    parser.add_argument("--split", default="test", help="Dataset split to evaluate")
+    parser.add_argument("--backbone", choices=list(BACKBONES), default="resnet50")
+    parser.add_argument(
+        "--clip-length",
+        type=int,
+        default=0,
+        help="Evaluate a temporal classifier on N-frame clips (0: single frames)",
+    )
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--num-workers", type=int, default=4)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument(
+        "--tta",
+        nargs="*",
+        choices=TTA_VIEWS,
+        default=None,
+        help="Enable test-time augmentation (defaults to all views)",
+    )
+    parser.add_argument("--output", help="Write the metrics as JSON to this file")
+    parser.add_argument(
+        "--gpu", action="store_true", help="Use GPU for evaluation if available"
+    )
+    args = parser.parse_args()
+
+    device = torch.device("cuda" if torch.cuda.is_available() and args.gpu else "cpu")
+    print(f"Using device: {device}")
+
+    if args.clip_length:
+        dataset = ClipDataset(
+            args.data_dir, args.split, eval_transform, clip_length=args.clip_length
+        )
+    else:
+        dataset = BinaryClassificationDataset(
+            root_dir=args.data_dir, split=args.split, transform=eval_transform
+        )
+    loader = DataLoader(
+        dataset,
+        batch_size=args.batch_size,
+        shuffle=False,
+        num_workers=args.num_workers,
+        pin_memory=device.type == "cuda",
+    )
+
+    if args.clip_length:
+        model = load_temporal_model(args.checkpoint, args.backbone, device)
+    else:
+        model = load_eval_model(args.checkpoint, device, args.backbone)
+    tta_views = TTA_VIEWS if args.tta == [] else args.tta
+    metrics = run_evaluation(model, loader, device, tta_views, args.threshold)
+    metrics["checkpoint"] = args.checkpoint
+    metrics["split"] = args.split
+
+    print(f"Samples: {metrics['samples']}")
+    print(f"Accuracy: {metrics['accuracy']:.2f}%")
+    print(f"Precision: {metrics['precision']:.4f}, Recall: {metrics['recall']:.4f}")
+    print(f"F1: {metrics['f1']:.4f}, ROC-AUC: {metrics['roc_auc']:.4f}")
+    print(f"Confusion matrix [[tn, fp], [fn, tp]]: {metrics['confusion_matrix']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(metrics, f, indent=4)
+        print(f"Metrics saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import io
+import os
+import queue
+import threading
+import time
+
+from PIL import Image
+
+try:
+    from perceptual_hash import dhash, from_hex, hamming, to_hex
+except ImportError:  # imported as AI.hard_examples from the backend
+    from AI.perceptual_hash import dhash, from_hex, hamming, to_hex
+
+
+PENDING = "pending"
+
+
+def hash_from_name(name):
+    """dHash encoded in a captured file name, or None for other files."""
+    stem = os.path.splitext(name)[0]
+    try:
+        return from_hex(stem.rsplit("_", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+class HardExampleCapture:
+    def __init__(
+        self,
+        root_dir,
+        low=0.3,
+        high=0.7,
+        max_distance=4,
+        max_files=5000,
+        max_bytes=1024 * 1024 * 1024,
+        max_pending=64,
+    ):
+        """
+        Keeps production frames the model is unsure about for relabeling.
+
+        Frames whose probability lies in [low, high] are de-duplicated by
+        dHash against every example already captured or labeled, then
+        written unchanged to root_dir/pending/<predicted class>/, i.e. the
+        BinaryClassificationDataset layout with a "pending" split. Labelers
+        move each file to root_dir/train/<true class>/, which is what
+        `train.py --hard-examples root_dir` fine-tunes on. The pending queue
+        is bounded in file count and size (oldest captures go first);
+        labeled examples are never deleted.
+
+        Disk writes happen on a background thread; offer() only checks the
+        band and enqueues, and drops the frame when max_pending are waiting.
+
+        Args:
+            root_dir (str): Root of the hard-example dataset
+            low (float): Lower bound of the uncertainty band
+            high (float): Upper bound of the uncertainty band
+            max_distance (int): dHash bits within which frames are duplicates
+            max_files (int): Pending captures kept
+            max_bytes (int): Total size of the pending captures
+            max_pending (int): Frames waiting for the writer thread
+        """
+        self.root_dir = root_dir
+        self.low = low
+        self.high = high
+        self.max_distance = max_distance
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.stats = {
+            "offered": 0,
+            "captured": 0,
+            "duplicates": 0,
+            "dropped": 0,
+            "evicted": 0,
+            "errors": 0,
+        }
+
+        # Hashes of the labeled examples and of the pending captures (with
+        # their paths, oldest first) for de-duplication and eviction
+        self.labeled_hashes = []
+        self.pending = []  # [(hash, path, size)]
+        for split in ("train", PENDING):
+            for class_name in ("0", "1"):
+                class_dir = os.path.join(root_dir, split, class_name)
+                os.makedirs(class_dir, exist_ok=True)
+                for name in os.listdir(class_dir):
+                    value = hash_from_name(name)
+                    if value is None:
+                        continue
+                    path = os.path.join(class_dir, name)
+                    if split == PENDING:
+                        self.pending.append((value, path, os.path.getsize(path)))
+                    else:
+                        self.labeled_hashes.append(value)
+        self.pending.sort(key=lambda entry: os.path.getmtime(entry[1]))
+        self.pending_bytes = sum(size for _, _, size in self.pending)
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def in_band(self, probability):
+        return self.low <= probability <= self.high
+
+    def offer(self, image_bytes, probability, prediction, bin_id="default"):
+        """Queue an encoded frame for capture if the model was unsure about it."""
+        if not self.in_band(probability):
+            return False
+        self.stats["offered"] += 1
+        try:
+            self.jobs.put_nowait((image_bytes, probability, int(prediction), bin_id))
+            return True
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                self.capture(*job)
+            except Exception:
+                self.stats["errors"] += 1
+
+    def is_duplicate(self, value):
+        return any(
+            hamming(value, known) <= self.max_distance
+            for known in self.labeled_hashes
+        ) or any(
+            hamming(value, known) <= self.max_distance for known, _, _ in self.pending
+        )
+
+    def capture(self, image_bytes, probability, prediction, bin_id="default"):
+        """Write one frame to the pending queue unless it is a duplicate."""
+        image = Image.open(io.BytesIO(image_bytes))
+        image.draft("L", (64, 64))  # the hash only needs a thumbnail
+        value = dhash(image)
+        if self.is_duplicate(value):
+            self.stats["duplicates"] += 1
+            return None
+
+        extension = "." + (image.format or "jpeg").lower().replace("jpeg", "jpg")
+        safe_bin = "".join(c if c.isalnum() or c in "-." else "-" for c in bin_id)
+        name = (
+            f"{time.strftime('%Y%m%d_%H%M%S')}_{safe_bin}_p{probability:.3f}_"
+            f"{to_hex(value)}{extension}"
+        )
+        path = os.path.join(self.root_dir, PENDING, str(prediction), name)
+        with open(path, "wb") as f:
+            f.write(image_bytes)
+        self.pending.append((value, path, len(image_bytes)))
+        self.pending_bytes += len(image_bytes)
+        self.stats["captured"] += 1
+        self.prune()
+        return path
+
+    def prune(self):
+        """Evict the oldest pending captures beyond the storage bounds."""
+        while self.pending and (
+            len(self.pending) > self.max_files or self.pending_bytes > self.max_bytes
+        ):
+            value, path, size = self.pending.pop(0)
+            self.pending_bytes -= size
+            try:
+                os.remove(path)
+                self.stats["evicted"] += 1
+            except FileNotFoundError:
+                # Moved to train/ by a labeler; keep de-duplicating against it
+                self.labeled_hashes.append(value)
+
+    def summary(self):
+        return {
+            "low": self.low,
+            "high": self.high,
+            "pending_files": len(self.pending),
+            "pending_bytes": self.pending_bytes,
+            "labeled": len(self.labeled_hashes),
+            **self.stats,
+        }
@@ -1,11 +1,21 @@
 import torch
+import torch.nn.functional as F
 import torchvision.models as models
 import torchvision.transforms as transforms
 from PIL import Image
 import matplotlib.pyplot as plt
 import argparse
+import json
 import os
 import glob
+import time
+
+try:
+    from backbones import BACKBONES, create_model
+    from roi import crop_to_box
+except ImportError:  # imported as AI.inference from the backend
+    from AI.backbones import BACKBONES, create_model
+    from AI.roi import crop_to_box
 
 
 def load_model(model_path):
@@ -50,17 +60,19 @@ def load_model(model_path):
         raise Exception(f"Failed to load model: {e}")
 
 
-def preprocess_image(image_path):
-    """Load and preprocess an image for inference."""
-    # Define the same transformations used during training
-    transform = transforms.Compose(
+def build_transform(input_size=224):
+    """The same (deterministic) transformations used during training."""
+    return transforms.Compose(
         [
-            transforms.Resize((224, 224)),
+            transforms.Resize((input_size, input_size)),
             transforms.ToTensor(),
             transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
         ]
     )
 
+
+def decode_image(image_path):
+    """Load an image file (or file object) as RGB."""
     # Load the image
     image = Image.open(image_path)
 
@@ -75,9 +87,26 @@ def preprocess_image(image_path):
         image = background
     else:
         image = image.convert("RGB")
+    return image
+
+
+def preprocess_image(image_path, roi_box=None, input_size=224):
+    """
+    Load and preprocess an image for inference. A fractional roi_box (see
+    roi.RoiCropper) crops the frame to the item before resizing, so a
+    smaller input_size keeps enough pixels on the item. The returned image
+    is always the full frame.
+    """
+    transform = build_transform(input_size)
+    image = decode_image(image_path)
+
+    # Crop to the item when the ROI stage found one
+    model_input = image
+    if roi_box is not None:
+        model_input = crop_to_box(image, roi_box)
 
     # Apply transformations
-    image_tensor = transform(image).unsqueeze(0)  # Add batch dimension
+    image_tensor = transform(model_input).unsqueeze(0)  # Add batch dimension
 
     return image_tensor, image
 
@@ -99,6 +128,223 @@ def predict(model, image_tensor, device="cpu"):
     return predictions.item(), probabilities.item()
 
 
+def load_backbone_model(model_path, backbone="resnet50", device="cpu"):
+    """Load a train.py model (any backbone) from a state dict or checkpoint."""
+    model = create_model(backbone)
+    state = torch.load(model_path, map_location=device, weights_only=False)
+    if "model" in state:
+        state = state["model"]
+    model.load_state_dict(state)
+    return model.to(device).eval()
+
+
+class CascadeStats:
+    def __init__(self):
+        """Running escalation and timing statistics of a CascadeClassifier."""
+        self.requests = 0
+        self.escalations = 0
+        self.fast_seconds = 0.0
+        self.full_seconds = 0.0
+
+    def record(self, fast_seconds, full_seconds=None):
+        self.requests += 1
+        self.fast_seconds += fast_seconds
+        if full_seconds is not None:
+            self.escalations += 1
+            self.full_seconds += full_seconds
+
+    def summary(self):
+        """
+        Escalation rate and mean per-request latencies. The compute saved is
+        measured against running the full model on every request, using the
+        mean full-model time of the escalated requests.
+        """
+        summary = {
+            "requests": self.requests,
+            "escalations": self.escalations,
+            "escalation_rate": 0.0,
+        }
+        if not self.requests:
+            return summary
+        summary["escalation_rate"] = self.escalations / self.requests
+        mean_fast_ms = 1000 * self.fast_seconds / self.requests
+        mean_request_ms = 1000 * (self.fast_seconds + self.full_seconds) / self.requests
+        summary.update(mean_fast_ms=mean_fast_ms, mean_request_ms=mean_request_ms)
+        if self.escalations:
+            mean_full_ms = 1000 * self.full_seconds / self.escalations
+            summary.update(
+                mean_full_ms=mean_full_ms,
+                mean_saved_ms=mean_full_ms - mean_request_ms,
+                compute_saved_fraction=1 - mean_request_ms / mean_full_ms,
+            )
+        return summary
+
+
+class CascadeClassifier:
+    def __init__(
+        self,
+        full_model,
+        fast_model=None,
+        low=0.1,
+        high=0.9,
+        fast_size=None,
+        device="cpu",
+    ):
+        """
+        Two-stage early-exit classifier. The fast stage (a small model, or the
+        full model on a downscaled input when fast_model is None) answers
+        when its probability is outside the (low, high) band; only uncertain
+        inputs are escalated to the full model.
+
+        Args:
+            full_model: Full-size classifier (e.g. ResNet-50)
+            fast_model: Small classifier, or None to reuse full_model
+            low (float): Fast probabilities <= low are answered as class 0
+            high (float): Fast probabilities >= high are answered as class 1
+            fast_size (int): Input side of the fast stage (None keeps 224)
+            device: Device for both models
+        """
+        self.full_model = full_model.to(device).eval()
+        self.fast_model = (fast_model or full_model).to(device).eval()
+        self.low = low
+        self.high = high
+        self.fast_size = fast_size
+        self.device = device
+        self.stats = CascadeStats()
+
+    def fast_probabilities(self, images):
+        if self.fast_size:
+            images = F.interpolate(
+                images,
+                size=(self.fast_size, self.fast_size),
+                mode="bilinear",
+                align_corners=False,
+            )
+        return torch.sigmoid(self.fast_model(images)).flatten()
+
+    def full_probabilities(self, images):
+        return torch.sigmoid(self.full_model(images)).flatten()
+
+    @torch.no_grad()
+    def predict(self, image_tensor):
+        """Returns (prediction, probability, stage) for a (1, C, H, W) tensor."""
+        image_tensor = image_tensor.to(self.device)
+        start = time.perf_counter()
+        probability = self.fast_probabilities(image_tensor).item()
+        fast_seconds = time.perf_counter() - start
+
+        if self.low < probability < self.high:
+            start = time.perf_counter()
+            probability = self.full_probabilities(image_tensor).item()
+            self.stats.record(fast_seconds, time.perf_counter() - start)
+            stage = "full"
+        else:
+            self.stats.record(fast_seconds)
+            stage = "fast"
+        return float(probability >= 0.5), probability, stage
+
+
+@torch.no_grad()
+def collect_cascade_probabilities(cascade, loader):
+    """Fast-stage and full-model probabilities plus labels over a dataloader."""
+    fast, full, labels = [], [], []
+    for images, targets in loader:
+        images = images.to(cascade.device)
+        fast.append(cascade.fast_probabilities(images).cpu())
+        full.append(cascade.full_probabilities(images).cpu())
+        labels.append(targets.float().flatten())
+    return torch.cat(fast), torch.cat(full), torch.cat(labels)
+
+
+def calibrate_band(fast_probs, full_probs, labels, tolerance=0.5, step=0.025):
+    """
+    Pick the (low, high) band with the lowest escalation rate whose cascade
+    accuracy stays within `tolerance` percentage points of the full model.
+    """
+    full_accuracy = 100 * ((full_probs >= 0.5).float() == labels).float().mean().item()
+    fast_correct = (fast_probs >= 0.5).float() == labels
+    full_correct = (full_probs >= 0.5).float() == labels
+
+    best = {"low": 0.0, "high": 1.0, "escalation_rate": 1.0, "accuracy": full_accuracy}
+    steps = int(round(0.5 / step))
+    for i in range(steps + 1):
+        low = i * step
+        for j in range(steps + 1):
+            high = 1.0 - j * step
+            escalate = (fast_probs > low) & (fast_probs < high)
+            correct = torch.where(escalate, full_correct, fast_correct)
+            accuracy = 100 * correct.float().mean().item()
+            rate = escalate.float().mean().item()
+            if accuracy >= full_accuracy - tolerance and rate < best["escalation_rate"]:
+                best = {
+                    "low": low,
+                    "high": high,
+                    "escalation_rate": rate,
+                    "accuracy": accuracy,
+                }
+
+    best["full_accuracy"] = full_accuracy
+    best["tolerance"] = tolerance
+    return best
+
+
+def load_cascade(config_path, full_model, device="cpu"):
+    """Build a CascadeClassifier from a calibration file written by --calibrate."""
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    fast_model = None
+    if config.get("fast_model_path"):
+        fast_model = load_backbone_model(
+            config["fast_model_path"], config["fast_backbone"], device
+        )
+    return CascadeClassifier(
+        full_model,
+        fast_model,
+        config["low"],
+        config["high"],
+        config.get("fast_size"),
+        device,
+    )
+
+
+def calibrate(args, model, device):
+    """Calibrate the cascade band on a dataset split and save it as JSON."""
+    from torch.utils.data import DataLoader
+    from evaluate import eval_transform
+    from trash_dataset import BinaryClassificationDataset
+
+    fast_model = None
+    if args.fast_model:
+        fast_model = load_backbone_model(args.fast_model, args.fast_backbone, device)
+    cascade = CascadeClassifier(
+        model, fast_model, fast_size=args.fast_size, device=device
+    )
+
+    dataset = BinaryClassificationDataset(
+        root_dir=args.calibrate, split=args.split, transform=eval_transform
+    )
+    loader = DataLoader(dataset, batch_size=64, shuffle=False)
+    band = calibrate_band(
+        *collect_cascade_probabilities(cascade, loader), tolerance=args.tolerance
+    )
+    band.update(
+        full_model_path=args.model_path,
+        fast_model_path=args.fast_model,
+        fast_backbone=args.fast_backbone,
+        fast_size=args.fast_size,
+        split=args.split,
+    )
+    os.makedirs(os.path.dirname(args.cascade_config) or ".", exist_ok=True)
+    with open(args.cascade_config, "w") as f:
+        json.dump(band, f, indent=4)
+
+    print(
+        f"Band ({band['low']:.3f}, {band['high']:.3f}): accuracy {band['accuracy']:.2f}% "
+        f"vs full {band['full_accuracy']:.2f}%, escalation rate {band['escalation_rate']:.2%}"
+    )
+    print(f"Cascade configuration saved to {args.cascade_config}")
+
+
 def visualize_prediction(image, prediction, probability, output_path=None):
     """Visualize the prediction result."""
     plt.figure(figsize=(6, 6))
@@ -195,6 +441,31 @@ def main():
     parser.add_argument(
         "--gpu", action="store_true", help="Use GPU for inference if available"
     )
+    parser.add_argument(
+        "--cascade-config",
+        help="Cascade band file: written by --calibrate, otherwise used for prediction",
+    )
+    parser.add_argument(
+        "--calibrate",
+        metavar="DATA_DIR",
+        help="Calibrate the cascade band on a dataset root and save it to --cascade-config",
+    )
+    parser.add_argument("--split", default="test", help="Split used by --calibrate")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed accuracy drop (percentage points) vs. the full model",
+    )
+    parser.add_argument("--fast-model", help="Weights of the fast first-stage model")
+    parser.add_argument(
+        "--fast-backbone", choices=list(BACKBONES), default="mobilenet_v3_small"
+    )
+    parser.add_argument(
+        "--fast-size",
+        type=int,
+        help="Input side of the fast stage, e.g. 112 (without --fast-model: downscaled full model)",
+    )
 
     args = parser.parse_args()
 
@@ -210,6 +481,15 @@ def main():
         print(f"Error loading model: {e}")
         return
 
+    cascade = None
+    if args.calibrate:
+        if not args.cascade_config:
+            parser.error("--calibrate needs --cascade-config")
+        calibrate(args, model, device)
+        return
+    elif args.cascade_config:
+        cascade = load_cascade(args.cascade_config, model, device)
+
     # Get image paths
     image_paths = []
     if args.image:
@@ -246,7 +526,11 @@ def main():
             image_tensor, original_image = preprocess_image(image_path)
 
             # Run inference
-            prediction, probability = predict(model, image_tensor, device)
+            if cascade is not None:
+                prediction, probability, stage = cascade.predict(image_tensor)
+                print(f"Answered by the {stage} stage")
+            else:
+                prediction, probability = predict(model, image_tensor, device)
 
             # Display results
             print(
@@ -267,6 +551,8 @@ def main():
         except Exception as e:
             print(f"Error processing {image_path}: {e}")
 
+    if cascade is not None:
+        print(f"Cascade statistics: {cascade.stats.summary()}")
     print("Inference completed!")
 
 def import_test():
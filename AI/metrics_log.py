@@ -0,0 +1,184 @@
+import json
+import os
+import time
+import argparse
+
+
+# Every record is one JSON object per line with "type" as its first key, so
+# readers can skip record types they don't need without parsing the line.
+INFO = "info"
+EPOCH = "epoch"
+BATCH_LOSSES = "batch_losses"
+
+
+class MetricsLogWriter:
+    def __init__(self, path):
+        """
+        Append-only JSON-lines training log.
+
+        Each record is written and flushed on its own, so the cost of logging
+        an epoch does not grow with the length of the run, and a reader can
+        follow the file while training is still going.
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "a", buffering=1)
+
+    def write(self, record_type, **fields):
+        record = {"type": record_type}
+        record.update(fields)
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def _type_prefix(record_type):
+    return '{"type": ' + json.dumps(record_type)
+
+
+def _select(record, columns):
+    if columns is None:
+        return record
+    return {key: record[key] for key in columns if key in record}
+
+
+def iter_records(path, types=None, columns=None):
+    """
+    Yield the records of a JSON-lines log.
+
+    Args:
+        path (str): Path to the .jsonl log
+        types: Optional record types to keep; other lines are not parsed
+        columns: Optional keys to keep from each record
+    """
+    prefixes = None if types is None else tuple(_type_prefix(t) for t in types)
+    with open(path, "r") as f:
+        for line in f:
+            if prefixes is not None and not line.startswith(prefixes):
+                continue
+            # A partially written last line of a live run is skipped
+            if not line.endswith("\n"):
+                break
+            yield _select(json.loads(line), columns)
+
+
+def read_training_info(path):
+    """Merge every info record (later records override earlier ones)."""
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            return json.load(f)["training_info"]
+    info = {}
+    for record in iter_records(path, types=[INFO]):
+        record.pop("type")
+        info.update(record)
+    return info
+
+
+def read_epochs(path, columns=None):
+    """
+    Return the epoch records, one per epoch. If a resumed run re-logged an
+    epoch, the last record for it wins.
+    """
+    if columns is not None and "epoch" not in columns:
+        columns = ["epoch"] + list(columns)
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            epochs = json.load(f)["epochs"]
+        return [_select(e, columns) for e in epochs]
+
+    by_epoch = {}
+    for record in iter_records(path, types=[EPOCH], columns=columns):
+        record.pop("type", None)
+        by_epoch[record["epoch"]] = record
+    return [by_epoch[epoch] for epoch in sorted(by_epoch)]
+
+
+def read_batch_losses(path, epochs=None):
+    """Return {epoch: [batch losses]}, optionally for selected epochs only."""
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            data = json.load(f)["epochs"]
+        return {
+            e["epoch"]: e["batch_losses"]
+            for e in data
+            if epochs is None or e["epoch"] in epochs
+        }
+
+    losses = {}
+    for record in iter_records(path, types=[BATCH_LOSSES]):
+        if epochs is None or record["epoch"] in epochs:
+            losses[record["epoch"]] = record["values"]
+    return losses
+
+
+def load_log(path):
+    """Load a log (.json or .jsonl) in the original {training_info, epochs} layout."""
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            return json.load(f)
+    epochs = read_epochs(path)
+    batch_losses = read_batch_losses(path)
+    for epoch_data in epochs:
+        epoch_data["batch_losses"] = batch_losses.get(epoch_data["epoch"], [])
+    return {"training_info": read_training_info(path), "epochs": epochs}
+
+
+def tail_records(path, poll_interval=1.0, stop=None):
+    """
+    Follow a live JSON-lines log, yielding records as they are appended.
+
+    Only complete lines are yielded. Stops when `stop()` returns True, or
+    never if `stop` is None.
+    """
+    while not os.path.exists(path):
+        if stop is not None and stop():
+            return
+        time.sleep(poll_interval)
+
+    buffer = ""
+    with open(path, "r") as f:
+        while True:
+            chunk = f.readline()
+            if chunk:
+                buffer += chunk
+                if buffer.endswith("\n"):
+                    yield json.loads(buffer)
+                    buffer = ""
+                continue
+            if stop is not None and stop():
+                return
+            time.sleep(poll_interval)
+
+
+def convert_json_log(json_path, output_path=None):
+    """Convert a legacy training_log_*.json file to the JSON-lines format."""
+    if output_path is None:
+        output_path = os.path.splitext(json_path)[0] + ".jsonl"
+    with open(json_path, "r") as f:
+        log_data = json.load(f)
+
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    writer = MetricsLogWriter(output_path)
+    writer.write(INFO, **log_data["training_info"])
+    for epoch_data in log_data["epochs"]:
+        epoch_data = dict(epoch_data)
+        values = epoch_data.pop("batch_losses", [])
+        writer.write(EPOCH, **epoch_data)
+        writer.write(BATCH_LOSSES, epoch=epoch_data["epoch"], values=values)
+    writer.close()
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert training_log_*.json files to the JSON-lines format"
+    )
+    parser.add_argument("logs", nargs="+", help="Legacy .json log files")
+    args = parser.parse_args()
+
+    for json_path in args.logs:
+        output_path = convert_json_log(json_path)
+        print(f"Converted {json_path} -> {output_path}")
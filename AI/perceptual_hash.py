@@ -0,0 +1,32 @@
+import numpy as np
+from PIL import Image
+
+
+def dhash(image, hash_size=8):
+    """
+    Difference hash of an image (PIL image or HxW / HxWx3 uint8 array).
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale thumbnail
+    and every bit records whether a pixel is brighter than its right
+    neighbour. Near-identical frames (re-encodes, sensor noise, small
+    lighting changes) get hashes a few bits apart. Returns an int.
+    """
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(image)
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def to_hex(value, hash_size=8):
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+def from_hex(text):
+    return int(text, 16)
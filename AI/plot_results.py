@@ -1,37 +1,128 @@
-import json
 import matplotlib.pyplot as plt
+import html
 import os
 import argparse
+from datetime import datetime
 from glob import glob
 
+from metrics_log import (
+    BATCH_LOSSES,
+    EPOCH,
+    INFO,
+    read_batch_losses,
+    read_epochs,
+    read_training_info,
+    tail_records,
+)
+
+# Above this many points, curves are drawn without per-point markers
+MARKER_LIMIT = 50
+
 
 def find_latest_log():
     """Find the most recent log file in the logs directory."""
-    log_files = glob("./logs/training_log_*.json")
+    log_files = glob("./logs/training_log_*.json") + glob("./logs/training_log_*.jsonl")
     if not log_files:
         raise FileNotFoundError("No log files found in ./logs directory")
-    return max(log_files, key=os.path.getctime)
 
+    # The run's start timestamp is in the file name (ctime changes on copies
+    # and checkouts). Prefer the .jsonl log when a run has both formats.
+    def run_key(path):
+        stem, ext = os.path.splitext(os.path.basename(path))
+        return stem, ext == ".jsonl"
+
+    return max(log_files, key=run_key)
+
+
+def minmax_envelope(values, max_points):
+    """
+    Downsample a curve into at most `max_points` buckets.
+
+    Returns (x, mean, low, high) where x is the 1-based index of each
+    bucket's first value; low/high keep the spikes that plain decimation
+    would drop.
+    """
+    n = len(values)
+    bucket = max(1, -(-n // max_points))  # ceil
+    xs, means, lows, highs = [], [], [], []
+    for start in range(0, n, bucket):
+        chunk = values[start : start + bucket]
+        xs.append(start + 1)
+        means.append(sum(chunk) / len(chunk))
+        lows.append(min(chunk))
+        highs.append(max(chunk))
+    return xs, means, lows, highs
+
+
+class StreamingEnvelope:
+    def __init__(self, max_points=500):
+        """
+        Min/max envelope of an unbounded stream in O(max_points) memory.
+        When the buckets fill up, adjacent pairs are merged and the bucket
+        width doubles.
+        """
+        self.max_points = max_points
+        self.width = 1
+        self.buckets = []  # [first_x, count, total, low, high]
+        self.count = 0
 
-def plot_metrics(log_file=None):
+    def extend(self, values):
+        for value in values:
+            self.count += 1
+            last = self.buckets[-1] if self.buckets else None
+            if last is not None and last[1] < self.width:
+                last[1] += 1
+                last[2] += value
+                last[3] = min(last[3], value)
+                last[4] = max(last[4], value)
+            else:
+                self.buckets.append([self.count, 1, value, value, value])
+            if len(self.buckets) > self.max_points:
+                self._merge()
+
+    def _merge(self):
+        merged = []
+        for i in range(0, len(self.buckets), 2):
+            pair = self.buckets[i : i + 2]
+            merged.append(
+                [
+                    pair[0][0],
+                    sum(b[1] for b in pair),
+                    sum(b[2] for b in pair),
+                    min(b[3] for b in pair),
+                    max(b[4] for b in pair),
+                ]
+            )
+        self.buckets = merged
+        self.width *= 2
+
+    def series(self):
+        xs = [b[0] for b in self.buckets]
+        means = [b[2] / b[1] for b in self.buckets]
+        lows = [b[3] for b in self.buckets]
+        highs = [b[4] for b in self.buckets]
+        return xs, means, lows, highs
+
+
+def plot_metrics(log_file=None, output_dir="./plots", dpi=300, fmt="png", show=True):
     """Plot training metrics from a log file."""
     if log_file is None:
         log_file = find_latest_log()
         print(f"Using latest log file: {log_file}")
 
-    # Load the log data
-    with open(log_file, "r") as f:
-        log_data = json.load(f)
-
-    # Extract training info
-    training_info = log_data["training_info"]
+    # Load the training info and only the epoch columns we plot; batch
+    # losses are read separately for the few epochs that are drawn
+    training_info = read_training_info(log_file)
+    epochs_data = read_epochs(
+        log_file, columns=["loss", "accuracy", "is_best_model"]
+    )
     model_name = training_info["model"]
     start_time = training_info["started_at"]
 
     # Extract metrics
-    epochs = [epoch_data["epoch"] for epoch_data in log_data["epochs"]]
-    losses = [epoch_data["loss"] for epoch_data in log_data["epochs"]]
-    accuracies = [epoch_data["accuracy"] for epoch_data in log_data["epochs"]]
+    epochs = [epoch_data["epoch"] for epoch_data in epochs_data]
+    losses = [epoch_data["loss"] for epoch_data in epochs_data]
+    accuracies = [epoch_data["accuracy"] for epoch_data in epochs_data]
 
     # Find the best model epoch
     best_epoch = None
@@ -43,7 +134,7 @@ def plot_metrics(log_file=None):
         best_accuracy = training_info["best_model"]["accuracy"]
     else:
         # Otherwise, find the best model from epochs data
-        for i, epoch_data in enumerate(log_data["epochs"]):
+        for i, epoch_data in enumerate(epochs_data):
             if epoch_data.get("is_best_model", False) or (
                 epoch_data["accuracy"] > best_accuracy
             ):
@@ -54,14 +145,17 @@ def plot_metrics(log_file=None):
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10), sharex=True)
     fig.suptitle(f"{model_name} Training Metrics - {start_time}", fontsize=16)
 
+    # Per-point markers only help on short runs and are costly on long ones
+    marker = "o" if len(epochs) <= MARKER_LIMIT else None
+
     # Plot loss
-    ax1.plot(epochs, losses, "b-", linewidth=2, marker="o", markersize=4)
+    ax1.plot(epochs, losses, "b-", linewidth=2, marker=marker, markersize=4)
     ax1.set_ylabel("Loss", fontsize=14)
     ax1.set_title("Training Loss over Epochs", fontsize=14)
     ax1.grid(True, linestyle="--", alpha=0.7)
 
     # Plot accuracy
-    ax2.plot(epochs, accuracies, "g-", linewidth=2, marker="o", markersize=4)
+    ax2.plot(epochs, accuracies, "g-", linewidth=2, marker=marker, markersize=4)
     ax2.set_xlabel("Epoch", fontsize=14)
     ax2.set_ylabel("Accuracy (%)", fontsize=14)
     ax2.set_title("Validation Accuracy over Epochs", fontsize=14)
@@ -102,24 +196,26 @@ def plot_metrics(log_file=None):
     plt.tight_layout(rect=[0, 0, 1, 0.95])
 
     # Save the figure
-    output_dir = "./plots"
     os.makedirs(output_dir, exist_ok=True)
-    plot_filename = os.path.join(output_dir, f"training_metrics_{start_time}.png")
-    plt.savefig(plot_filename, dpi=300, bbox_inches="tight")
+    plot_filename = os.path.join(output_dir, f"training_metrics_{start_time}.{fmt}")
+    plt.savefig(plot_filename, dpi=dpi, bbox_inches="tight")
     print(f"Plot saved to {plot_filename}")
 
     # Optional: Plot batch losses for specific epochs
-    plot_batch_losses(log_data, output_dir, start_time)
+    plot_batch_losses(log_file, epochs, output_dir, start_time, dpi=dpi, fmt=fmt)
 
     # Show the plot
-    plt.show()
+    if show:
+        plt.show()
+    plt.close("all")
 
 
-def plot_batch_losses(log_data, output_dir, timestamp):
+def plot_batch_losses(
+    log_file, epochs, output_dir, timestamp, dpi=300, fmt="png", max_points=500
+):
     """Plot batch losses for selected epochs."""
     # Choose epochs to plot (first, last, and middle)
-    epochs_data = log_data["epochs"]
-    n_epochs = len(epochs_data)
+    n_epochs = len(epochs)
 
     if n_epochs <= 0:
         return
@@ -129,16 +225,22 @@ def plot_batch_losses(log_data, output_dir, timestamp):
     if n_epochs > 2:
         selected_indices.insert(1, n_epochs // 2)
 
+    selected_epochs = [epochs[idx] for idx in selected_indices]
+    losses_by_epoch = read_batch_losses(log_file, epochs=selected_epochs)
+
     plt.figure(figsize=(12, 6))
     colors = ["b", "g", "r"]
 
-    for i, idx in enumerate(selected_indices):
-        epoch_data = epochs_data[idx]
-        epoch_num = epoch_data["epoch"]
-        batch_losses = epoch_data["batch_losses"]
+    for i, epoch_num in enumerate(selected_epochs):
+        batch_losses = losses_by_epoch.get(epoch_num, [])
 
-        # Plot batch losses
-        batches = range(1, len(batch_losses) + 1)
+        # Plot batch losses, as a min/max envelope for long epochs
+        if len(batch_losses) > max_points:
+            batches, means, lows, highs = minmax_envelope(batch_losses, max_points)
+            plt.fill_between(batches, lows, highs, color=colors[i], alpha=0.2)
+            batch_losses = means
+        else:
+            batches = range(1, len(batch_losses) + 1)
         plt.plot(
             batches,
             batch_losses,
@@ -155,11 +257,205 @@ def plot_batch_losses(log_data, output_dir, timestamp):
     plt.legend()
 
     # Save the figure
-    batch_plot_filename = os.path.join(output_dir, f"batch_losses_{timestamp}.png")
-    plt.savefig(batch_plot_filename, dpi=300, bbox_inches="tight")
+    batch_plot_filename = os.path.join(output_dir, f"batch_losses_{timestamp}.{fmt}")
+    plt.savefig(batch_plot_filename, dpi=dpi, bbox_inches="tight")
     print(f"Batch losses plot saved to {batch_plot_filename}")
 
 
+def plot_comparison(
+    log_files, labels=None, metrics=("loss", "accuracy"), output_dir="./plots", dpi=150, fmt="png"
+):
+    """Overlay the per-epoch metric curves of several runs, one panel per metric."""
+    if labels is None:
+        labels = [os.path.splitext(os.path.basename(f))[0] for f in log_files]
+
+    fig, axes = plt.subplots(
+        len(metrics), 1, figsize=(12, 4 * len(metrics)), sharex=True, squeeze=False
+    )
+    for log_file, label in zip(log_files, labels):
+        # Only the plotted columns are read from each log
+        epochs_data = read_epochs(log_file, columns=metrics)
+        epochs = [e["epoch"] for e in epochs_data]
+        for ax, metric in zip(axes[:, 0], metrics):
+            values = [e.get(metric) for e in epochs_data]
+            if any(v is not None for v in values):
+                ax.plot(epochs, values, linewidth=1.5, label=label)
+
+    for ax, metric in zip(axes[:, 0], metrics):
+        ax.set_ylabel(metric, fontsize=12)
+        ax.grid(True, linestyle="--", alpha=0.7)
+    axes[0, 0].set_title("Run Comparison", fontsize=14)
+    axes[0, 0].legend(fontsize=8, loc="best")
+    axes[-1, 0].set_xlabel("Epoch", fontsize=12)
+    fig.tight_layout()
+
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    plot_filename = os.path.join(output_dir, f"comparison_{stamp}.{fmt}")
+    fig.savefig(plot_filename, dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    print(f"Comparison plot saved to {plot_filename}")
+    return plot_filename
+
+
+class LiveDashboard:
+    def __init__(self, output_dir="./plots", dpi=100, fmt="png", max_points=500):
+        """
+        Incrementally updated training dashboard for a running log.
+
+        The figure and its line artists are created once; each update only
+        appends the new points to the existing lines (set_data) instead of
+        re-plotting the run. Batch losses of the whole run are kept as a
+        streaming min/max envelope so the cost of a redraw stays bounded.
+        """
+        self.output_dir = output_dir
+        self.dpi = dpi
+        self.fmt = fmt
+        self.info = {}
+        self.epochs = {}
+        self.batch_envelope = StreamingEnvelope(max_points)
+        self.dirty = False
+
+        self.fig, (self.ax_loss, self.ax_acc, self.ax_batch) = plt.subplots(
+            3, 1, figsize=(10, 10)
+        )
+        (self.loss_line,) = self.ax_loss.plot([], [], "b-", linewidth=1.5)
+        (self.acc_line,) = self.ax_acc.plot([], [], "g-", linewidth=1.5, label="Test")
+        (self.val_line,) = self.ax_acc.plot(
+            [], [], "m--", linewidth=1.5, label="Validation"
+        )
+        (self.batch_line,) = self.ax_batch.plot([], [], "k-", linewidth=1)
+        self.batch_fill = None
+
+        self.ax_loss.set_ylabel("Loss")
+        self.ax_loss.set_title("Training Loss over Epochs")
+        self.ax_acc.set_ylabel("Accuracy (%)")
+        self.ax_acc.set_title("Accuracy over Epochs")
+        self.ax_acc.legend(loc="lower right")
+        self.ax_batch.set_xlabel("Batch")
+        self.ax_batch.set_ylabel("Loss")
+        self.ax_batch.set_title("Batch Losses (min/max envelope)")
+        for ax in (self.ax_loss, self.ax_acc, self.ax_batch):
+            ax.grid(True, linestyle="--", alpha=0.7)
+        self.fig.tight_layout()
+
+    def add(self, record):
+        """Consume one log record."""
+        record_type = record.get("type")
+        if record_type == INFO:
+            self.info.update({k: v for k, v in record.items() if k != "type"})
+        elif record_type == EPOCH:
+            # A resumed run may re-log an epoch; the last record wins
+            self.epochs[record["epoch"]] = record
+        elif record_type == BATCH_LOSSES:
+            self.batch_envelope.extend(record["values"])
+        else:
+            return
+        self.dirty = True
+
+    def _update_artists(self):
+        epochs = sorted(self.epochs)
+        rows = [self.epochs[e] for e in epochs]
+        self.loss_line.set_data(epochs, [r["loss"] for r in rows])
+        self.acc_line.set_data(epochs, [r["accuracy"] for r in rows])
+        val_rows = [
+            (e, r["val_accuracy"]) for e, r in zip(epochs, rows) if "val_accuracy" in r
+        ]
+        self.val_line.set_data([e for e, _ in val_rows], [v for _, v in val_rows])
+
+        xs, means, lows, highs = self.batch_envelope.series()
+        self.batch_line.set_data(xs, means)
+        if self.batch_fill is not None:
+            self.batch_fill.remove()
+        self.batch_fill = self.ax_batch.fill_between(
+            xs, lows, highs, color="k", alpha=0.15, linewidth=0
+        )
+
+        for ax in (self.ax_loss, self.ax_acc, self.ax_batch):
+            ax.relim()
+            ax.autoscale_view()
+
+        started = self.info.get("started_at", "")
+        self.fig.suptitle(f"{self.info.get('model', '')} Training - {started}")
+
+    def render(self):
+        """Write the figure and the HTML report if anything changed."""
+        if not self.dirty:
+            return None
+        self._update_artists()
+        os.makedirs(self.output_dir, exist_ok=True)
+        started = self.info.get("started_at", "live")
+        figure_path = os.path.join(self.output_dir, f"live_{started}.{self.fmt}")
+
+        # Write to a temp file first so a viewer never sees a partial image
+        tmp_path = figure_path + ".tmp"
+        self.fig.savefig(tmp_path, dpi=self.dpi, format=self.fmt)
+        os.replace(tmp_path, figure_path)
+        self.write_report(figure_path)
+        self.dirty = False
+        return figure_path
+
+    def write_report(self, figure_path, refresh_seconds=10):
+        """Write a self-refreshing HTML summary next to the figure."""
+        epochs = sorted(self.epochs)
+        latest = self.epochs[epochs[-1]] if epochs else {}
+        best = max(self.epochs.values(), key=lambda r: r["accuracy"], default={})
+        rows = [
+            ("Model", self.info.get("model")),
+            ("Started", self.info.get("started_at")),
+            ("Epochs logged", f"{len(epochs)} / {self.info.get('epochs')}"),
+            ("Latest loss", latest.get("loss")),
+            ("Latest accuracy", latest.get("accuracy")),
+            ("Best accuracy", f"{best.get('accuracy')} (epoch {best.get('epoch')})"),
+            ("Learning rate", latest.get("lr")),
+            ("Stop reason", self.info.get("stop_reason", "running")),
+        ]
+        table = "\n".join(
+            f"<tr><th>{html.escape(str(k))}</th><td>{html.escape(str(v))}</td></tr>"
+            for k, v in rows
+        )
+        report_path = os.path.splitext(figure_path)[0] + ".html"
+        with open(report_path + ".tmp", "w") as f:
+            f.write(
+                "<!DOCTYPE html>\n<html>\n<head>\n"
+                f'<meta http-equiv="refresh" content="{refresh_seconds}">\n'
+                "<title>Training dashboard</title>\n</head>\n<body>\n"
+                f"<table>\n{table}\n</table>\n"
+                f'<img src="{html.escape(os.path.basename(figure_path))}" '
+                'style="max-width:100%">\n</body>\n</html>\n'
+            )
+        os.replace(report_path + ".tmp", report_path)
+
+
+def follow_log(log_file=None, output_dir="./plots", dpi=100, fmt="png", interval=5.0):
+    """
+    Follow a running .jsonl log and keep the dashboard files up to date.
+    Returns once the run records its completion.
+    """
+    if log_file is None:
+        log_file = find_latest_log()
+        print(f"Following latest log file: {log_file}")
+    if not log_file.endswith(".jsonl"):
+        raise ValueError("Only .jsonl logs can be followed; convert with metrics_log.py")
+
+    dashboard = LiveDashboard(output_dir=output_dir, dpi=dpi, fmt=fmt)
+
+    def finished():
+        # Called whenever the reader is idle: flush pending points
+        path = dashboard.render()
+        if path:
+            print(f"Dashboard updated: {path}")
+        return "completed_at" in dashboard.info
+
+    for record in tail_records(log_file, poll_interval=interval, stop=finished):
+        dashboard.add(record)
+
+    path = dashboard.render()
+    if path:
+        print(f"Dashboard updated: {path}")
+    print("Run completed")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Plot training metrics from log file")
     parser.add_argument(
@@ -168,6 +464,56 @@ if __name__ == "__main__":
         help="Path to the log file (if not specified, uses latest)",
         default=None,
     )
+    parser.add_argument(
+        "--compare",
+        nargs="+",
+        metavar="LOG",
+        help="Overlay the metric curves of several runs",
+    )
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        default=["loss", "accuracy"],
+        help="Epoch metrics to overlay with --compare",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Follow a running .jsonl log and update a live dashboard",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Render with the Agg backend and don't open any windows",
+    )
+    parser.add_argument("--output-dir", default="./plots", help="Output directory")
+    parser.add_argument("--format", choices=["png", "svg"], default="png")
+    parser.add_argument("--dpi", type=int, default=None, help="Output resolution")
+    parser.add_argument(
+        "--interval", type=float, default=5.0, help="Polling interval for --follow"
+    )
     args = parser.parse_args()
 
-    plot_metrics(args.log_file)
+    if args.headless or args.follow or args.compare:
+        plt.switch_backend("Agg")
+
+    if args.compare:
+        plot_comparison(
+            args.compare,
+            metrics=args.metrics,
+            output_dir=args.output_dir,
+            dpi=args.dpi or 150,
+            fmt=args.format,
+        )
+    elif args.follow:
+        follow_log(
+            args.log_file, args.output_dir, args.dpi or 100, args.format, args.interval
+        )
+    else:
+        plot_metrics(
+            args.log_file,
+            args.output_dir,
+            args.dpi or 300,
+            args.format,
+            show=not args.headless,
+        )
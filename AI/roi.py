@@ -0,0 +1,144 @@
+import threading
+
+import numpy as np
+from PIL import Image
+
+
+def crop_to_box(image, box):
+    """Crop a PIL image to a fractional (left, top, right, bottom) box."""
+    left, top, right, bottom = box
+    return image.crop(
+        (
+            round(left * image.width),
+            round(top * image.height),
+            round(right * image.width),
+            round(bottom * image.height),
+        )
+    )
+
+
+class RoiCropper:
+    def __init__(
+        self,
+        analysis_width=160,
+        diff_threshold=25.0,
+        min_area=0.002,
+        margin=0.15,
+        static_threshold=2.0,
+        static_frames=15,
+        drift_rate=0.1,
+        stale_frames=300,
+    ):
+        """
+        Crops camera frames to the item by background subtraction against a
+        cached reference frame of the empty bin, one reference per bin id.
+
+        Everything runs on a small grayscale copy of the frame, so the cost
+        is negligible next to the classifier. The reference is refreshed
+        automatically: while the scene is static and empty it is blended
+        towards the current frame (lighting drift), and after `stale_frames`
+        static frames it is replaced outright (camera moved, bin changed).
+
+        Args:
+            analysis_width (int): Width of the grayscale analysis copy
+            diff_threshold (float): Gray-level difference counted as foreground
+            min_area (float): Foreground fraction below which the bin is empty
+            margin (float): Padding around the item box, relative to its size
+            static_threshold (float): Mean frame-to-frame change that is static
+            static_frames (int): Static frames before the reference is updated
+            drift_rate (float): Blend factor of an empty static frame
+            stale_frames (int): Static frames before the reference is replaced
+        """
+        self.analysis_width = analysis_width
+        self.diff_threshold = diff_threshold
+        self.min_area = min_area
+        self.margin = margin
+        self.static_threshold = static_threshold
+        self.static_frames = static_frames
+        self.drift_rate = drift_rate
+        self.stale_frames = stale_frames
+        self.bins = {}  # bin_id -> {"reference", "previous", "static"}
+        self.lock = threading.Lock()
+
+    def analysis_gray(self, image):
+        height = max(1, round(image.height * self.analysis_width / image.width))
+        small = image.convert("L").resize(
+            (self.analysis_width, height), Image.BILINEAR
+        )
+        return np.asarray(small, dtype=np.float32)
+
+    def _update_reference(self, state, gray, empty):
+        previous = state["previous"]
+        state["previous"] = gray
+        if previous is None or previous.shape != gray.shape:
+            state["static"] = 0
+            return
+        if np.abs(gray - previous).mean() >= self.static_threshold:
+            state["static"] = 0
+            return
+
+        state["static"] += 1
+        if state["static"] >= self.stale_frames:
+            state["reference"] = gray.copy()
+            state["static"] = 0
+        elif empty and state["static"] >= self.static_frames:
+            state["reference"] += self.drift_rate * (gray - state["reference"])
+
+    def find_box(self, image, bin_id="default"):
+        """
+        Bounding box (left, top, right, bottom) of the item as fractions of
+        the frame size, or None when the bin looks empty or has no reference
+        yet. Being resolution independent, the box can be computed on a
+        cheap downscaled decode and applied to the full frame.
+        """
+        gray = self.analysis_gray(image)
+        with self.lock:
+            state = self.bins.setdefault(
+                bin_id, {"reference": None, "previous": None, "static": 0}
+            )
+            reference = state["reference"]
+            if reference is None or reference.shape != gray.shape:
+                state["reference"] = gray.copy()
+                state["previous"] = gray
+                return None
+
+            mask = np.abs(gray - reference) > self.diff_threshold
+            empty = mask.mean() < self.min_area
+            self._update_reference(state, gray, empty)
+        if empty:
+            return None
+
+        # Ignore isolated noisy pixels: a row/column needs two foreground hits
+        rows = np.flatnonzero(mask.sum(axis=1) >= 2)
+        cols = np.flatnonzero(mask.sum(axis=0) >= 2)
+        if not len(rows) or not len(cols):
+            return None
+
+        height, width = gray.shape
+        # Pad and make the box square so the resize does not distort the item
+        side = max(cols[-1] + 1 - cols[0], rows[-1] + 1 - rows[0])
+        side = min(side * (1 + 2 * self.margin), width, height)
+        cx, cy = (cols[0] + cols[-1] + 1) / 2, (rows[0] + rows[-1] + 1) / 2
+        left = min(max(cx - side / 2, 0), width - side)
+        top = min(max(cy - side / 2, 0), height - side)
+        return (
+            left / width,
+            top / height,
+            (left + side) / width,
+            (top + side) / height,
+        )
+
+    def crop(self, image, bin_id="default"):
+        """Returns (cropped image, box); the full image and None if no item."""
+        box = self.find_box(image, bin_id)
+        if box is None:
+            return image, None
+        return crop_to_box(image, box), box
+
+    def reset(self, bin_id=None):
+        """Forget the reference of one bin, or of all bins."""
+        with self.lock:
+            if bin_id is None:
+                self.bins.clear()
+            else:
+                self.bins.pop(bin_id, None)
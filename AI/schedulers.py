@@ -0,0 +1,87 @@
+import math
+
+import torch
+
+
+SCHEDULES = ["constant", "cosine", "onecycle", "plateau"]
+
+
+def build_scheduler(
+    name, optimizer, epochs, steps_per_epoch, lr, min_lr=1e-6, mode="max"
+):
+    """
+    Create a learning rate scheduler by name.
+
+    Returns (scheduler, step_per_batch, params). `step_per_batch` tells the
+    training loop whether to call scheduler.step() after every batch
+    (one-cycle) or once per epoch; `params` is recorded in the training log.
+    `mode` is the direction of the monitored metric for reduce-on-plateau.
+    """
+    if name == "constant":
+        return None, False, {}
+    if name == "cosine":
+        scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(
+            optimizer, T_max=epochs, eta_min=min_lr
+        )
+        return scheduler, False, {"T_max": epochs, "eta_min": min_lr}
+    if name == "onecycle":
+        scheduler = torch.optim.lr_scheduler.OneCycleLR(
+            optimizer, max_lr=lr, epochs=epochs, steps_per_epoch=steps_per_epoch
+        )
+        return scheduler, True, {"max_lr": lr, "steps_per_epoch": steps_per_epoch}
+    if name == "plateau":
+        scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
+            optimizer, mode=mode, factor=0.1, patience=3, min_lr=min_lr
+        )
+        return scheduler, False, {"factor": 0.1, "patience": 3, "min_lr": min_lr}
+    raise ValueError(f"Unknown schedule: {name} (expected one of {SCHEDULES})")
+
+
+def current_lr(optimizer):
+    return optimizer.param_groups[0]["lr"]
+
+
+class EarlyStopping:
+    def __init__(self, patience=10, min_delta=0.0, mode="max"):
+        """
+        Stops training once the monitored metric has not improved by more than
+        `min_delta` for `patience` consecutive epochs.
+
+        Args:
+            patience (int): Epochs without improvement before stopping (0 disables)
+            min_delta (float): Minimum change that counts as an improvement
+            mode (str): 'max' for metrics like accuracy, 'min' for losses
+        """
+        self.patience = patience
+        self.min_delta = min_delta
+        self.mode = mode
+        self.best = -math.inf if mode == "max" else math.inf
+        self.best_epoch = None
+        self.bad_epochs = 0
+
+    def improved(self, value):
+        if self.mode == "max":
+            return value > self.best + self.min_delta
+        return value < self.best - self.min_delta
+
+    def step(self, value, epoch):
+        """Record the metric for an epoch; returns True if training should stop."""
+        if self.improved(value):
+            self.best = value
+            self.best_epoch = epoch
+            self.bad_epochs = 0
+        else:
+            self.bad_epochs += 1
+        return self.patience > 0 and self.bad_epochs >= self.patience
+
+    def state_dict(self):
+        return {
+            "best": self.best,
+            "best_epoch": self.best_epoch,
+            "bad_epochs": self.bad_epochs,
+        }
+
+    def load_state_dict(self, state):
+        self.best = state["best"]
+        self.best_epoch = state["best_epoch"]
+        self.bad_epochs = state["bad_epochs"]
@@ -0,0 +1,376 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import queue
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+from datetime import datetime
+from glob import glob
+
+from metrics_log import read_epochs, read_training_info
+
+
+# Sweepable config keys -> train.py flags. Every key is part of the config
+# hash, so two runs with the same values are the same run.
+TRAIN_FLAGS = {
+    "lr": "--lr",
+    "batch_size": "--batch-size",
+    "backbone": "--backbone",
+    "augmentation": "--augmentation",
+    "schedule": "--schedule",
+    "epochs": "--epochs",
+    "patience": "--patience",
+    "seed": "--seed",
+    "data_dir": "--data-dir",
+}
+
+DEFAULTS = {
+    "lr": 0.001,
+    "batch_size": 32,
+    "backbone": "resnet50",
+    "augmentation": "full",
+    "schedule": "constant",
+    "epochs": 100,
+    "patience": 10,
+    "seed": 0,
+    "data_dir": "./data",
+}
+
+COLUMNS = [
+    ("config_hash", "TEXT PRIMARY KEY"),
+    ("status", "TEXT"),
+    ("source", "TEXT"),
+    ("lr", "REAL"),
+    ("batch_size", "INTEGER"),
+    ("backbone", "TEXT"),
+    ("augmentation", "TEXT"),
+    ("schedule", "TEXT"),
+    ("epochs", "INTEGER"),
+    ("best_accuracy", "REAL"),
+    ("best_epoch", "INTEGER"),
+    ("final_accuracy", "REAL"),
+    ("epochs_run", "INTEGER"),
+    ("stop_reason", "TEXT"),
+    ("total_time_seconds", "REAL"),
+    ("log_file", "TEXT"),
+    ("run_dir", "TEXT"),
+    ("config_json", "TEXT"),
+    ("updated_at", "TEXT"),
+]
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+
+
+def config_hash(config):
+    """Stable short hash of a run configuration."""
+    encoded = json.dumps(config, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+def expand_grid(grid):
+    """Expand {key: [values]} into the list of configs (cartesian product)."""
+    keys = sorted(grid)
+    configs = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        config = dict(DEFAULTS)
+        config.update(zip(keys, values))
+        configs.append(config)
+    return configs
+
+
+class RunIndex:
+    def __init__(self, db_path):
+        """SQLite table of every run, keyed by config hash."""
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            columns = ", ".join(f"{name} {kind}" for name, kind in COLUMNS)
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS runs ({columns})")
+
+    def get(self, run_hash):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM runs WHERE config_hash = ?", (run_hash,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def upsert(self, row):
+        row = {key: row.get(key) for key in COLUMN_NAMES}
+        row["updated_at"] = datetime.now().strftime("%Y%m%d_%H%M%S")
+        placeholders = ", ".join("?" for _ in COLUMN_NAMES)
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO runs ({', '.join(COLUMN_NAMES)}) "
+                f"VALUES ({placeholders})",
+                [row[key] for key in COLUMN_NAMES],
+            )
+
+    def query(self, filters=None, order_by=None, descending=True, limit=None):
+        """Select runs matching {column: value} filters."""
+        sql = "SELECT * FROM runs"
+        params = []
+        if filters:
+            for column in filters:
+                if column not in COLUMN_NAMES:
+                    raise ValueError(f"Unknown column: {column}")
+            sql += " WHERE " + " AND ".join(f"{column} = ?" for column in filters)
+            params.extend(filters.values())
+        if order_by:
+            if order_by not in COLUMN_NAMES:
+                raise ValueError(f"Unknown column: {order_by}")
+            sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+
+def summarize_log(log_file):
+    """Extract the indexed result columns from a training log."""
+    info = read_training_info(log_file)
+    epochs = read_epochs(log_file, columns=["accuracy"])
+    best = max(epochs, key=lambda e: e["accuracy"], default={})
+    return {
+        "best_accuracy": best.get("accuracy"),
+        "best_epoch": best.get("epoch"),
+        "final_accuracy": info.get("final_accuracy"),
+        "epochs_run": info.get("epochs_run", len(epochs)),
+        "stop_reason": info.get("stop_reason"),
+        "total_time_seconds": info.get("total_time_seconds"),
+        "log_file": log_file,
+    }
+
+
+def train_command(config, run_dir, train_script, resume=True):
+    command = [sys.executable, train_script]
+    for key, flag in TRAIN_FLAGS.items():
+        command += [flag, str(config[key])]
+    command += [
+        "--log-dir",
+        os.path.join(run_dir, "logs"),
+        "--checkpoint-dir",
+        os.path.join(run_dir, "checkpoints"),
+        "--model-dir",
+        run_dir,
+    ]
+    if resume:
+        # An interrupted sweep picks its runs up where they stopped
+        command.append("--resume")
+    return command
+
+
+def run_job(config, run_dir, train_script, threads, resume=True):
+    """
+    Run one training config in a subprocess; returns the exit code. Without
+    `resume` the run's old checkpoints are deleted and it trains from scratch.
+    """
+    if not resume:
+        shutil.rmtree(os.path.join(run_dir, "checkpoints"), ignore_errors=True)
+    os.makedirs(run_dir, exist_ok=True)
+    with open(os.path.join(run_dir, "config.json"), "w") as f:
+        json.dump(config, f, indent=4)
+
+    # Give each job its own share of the cores instead of oversubscribing
+    env = dict(os.environ, OMP_NUM_THREADS=str(threads), MKL_NUM_THREADS=str(threads))
+    with open(os.path.join(run_dir, "train_output.txt"), "a") as output:
+        process = subprocess.run(
+            train_command(config, run_dir, train_script, resume),
+            stdout=output,
+            stderr=subprocess.STDOUT,
+            env=env,
+        )
+    return process.returncode
+
+
+def run_sweep(configs, index, sweep_dir, jobs=2, threads_per_job=None, rerun=False):
+    """
+    Train every config not already completed, `jobs` at a time, from a shared
+    job queue. Results go into the run index as each job finishes.
+    """
+    if threads_per_job is None:
+        threads_per_job = max(1, (os.cpu_count() or 1) // jobs)
+    train_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "train.py")
+
+    jobs_queue = queue.Queue()
+    for config in configs:
+        run_hash = config_hash(config)
+        existing = index.get(run_hash)
+        completed = existing is not None and existing["status"] == "completed"
+        if completed and not rerun:
+            print(f"[{run_hash}] cached, skipping: {config}")
+            continue
+        # Completed runs are retrained from scratch; others resume
+        jobs_queue.put((run_hash, config, not completed))
+
+    total = jobs_queue.qsize()
+    print(f"Running {total} configs with {jobs} parallel jobs ({threads_per_job} threads each)")
+
+    def worker():
+        while True:
+            try:
+                run_hash, config, resume = jobs_queue.get_nowait()
+            except queue.Empty:
+                return
+            run_dir = os.path.join(sweep_dir, "runs", run_hash)
+            row = dict(config, config_hash=run_hash, run_dir=run_dir, source="sweep")
+            row["config_json"] = json.dumps(config, sort_keys=True)
+            index.upsert(dict(row, status="running"))
+            print(f"[{run_hash}] started: {config}")
+
+            returncode = run_job(config, run_dir, train_script, threads_per_job, resume)
+            log_files = sorted(glob(os.path.join(run_dir, "logs", "training_log_*.jsonl")))
+            if log_files:
+                row.update(summarize_log(log_files[-1]))
+            row["status"] = "completed" if returncode == 0 else "failed"
+            index.upsert(row)
+            print(f"[{run_hash}] {row['status']}: best accuracy {row.get('best_accuracy')}")
+            jobs_queue.task_done()
+
+    threads = [threading.Thread(target=worker) for _ in range(jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def index_logs(index, log_dir="./logs"):
+    """Add existing training logs (e.g. from plain train.py runs) to the index."""
+    log_files = sorted(
+        glob(os.path.join(log_dir, "training_log_*.json"))
+        + glob(os.path.join(log_dir, "training_log_*.jsonl"))
+    )
+    for log_file in log_files:
+        info = read_training_info(log_file)
+        config = dict(DEFAULTS)
+        config.update(
+            {
+                "lr": info.get("learning_rate", DEFAULTS["lr"]),
+                "batch_size": info.get("batch_size", DEFAULTS["batch_size"]),
+                "backbone": info.get("backbone", DEFAULTS["backbone"]),
+                "augmentation": info.get("augmentation", DEFAULTS["augmentation"]),
+                "schedule": info.get("lr_schedule", {}).get("name", "constant"),
+                "epochs": info.get("epochs", DEFAULTS["epochs"]),
+                # Keep each historical run distinct
+                "started_at": info["started_at"],
+            }
+        )
+        run_hash = config_hash(config)
+        row = dict(config, config_hash=run_hash, source="log", status="completed")
+        row["config_json"] = json.dumps(config, sort_keys=True)
+        row.update(summarize_log(log_file))
+        index.upsert(row)
+        print(f"[{run_hash}] indexed {log_file}")
+
+
+def print_table(rows, columns):
+    widths = [
+        max(len(column), *(len(str(row.get(column))) for row in rows)) for column in columns
+    ]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row.get(c)).ljust(w) for c, w in zip(columns, widths)))
+
+
+def parse_filters(pairs):
+    filters = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition("=")
+        filters[key] = value
+    return filters
+
+
+def parse_values(values, kind):
+    return [kind(value) for value in values] if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter sweeps over train.py")
+    parser.add_argument("--sweep-dir", default="./sweeps", help="Sweep output directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Train a grid of configurations")
+    run_parser.add_argument("--lr", nargs="+", type=float)
+    run_parser.add_argument("--batch-size", nargs="+", type=int)
+    run_parser.add_argument("--backbone", nargs="+")
+    run_parser.add_argument("--augmentation", nargs="+")
+    run_parser.add_argument("--schedule", nargs="+")
+    run_parser.add_argument("--epochs", nargs="+", type=int)
+    run_parser.add_argument("--seed", nargs="+", type=int)
+    run_parser.add_argument("--data-dir", default=DEFAULTS["data_dir"])
+    run_parser.add_argument("--jobs", type=int, default=2, help="Parallel training jobs")
+    run_parser.add_argument("--threads-per-job", type=int, default=None)
+    run_parser.add_argument(
+        "--rerun", action="store_true", help="Retrain configs that are already cached"
+    )
+
+    index_parser = subparsers.add_parser("index-logs", help="Index existing logs")
+    index_parser.add_argument("--log-dir", default="./logs")
+
+    for name, description in [("query", "Query the run table"), ("compare", "Plot runs")]:
+        sub = subparsers.add_parser(name, help=description)
+        sub.add_argument("--filter", action="append", help="column=value (repeatable)")
+        sub.add_argument("--order-by", default="best_accuracy")
+        sub.add_argument("--ascending", action="store_true")
+        sub.add_argument("--limit", type=int, default=None)
+    subparsers.choices["compare"].add_argument(
+        "--metrics", nargs="+", default=["loss", "accuracy"]
+    )
+
+    args = parser.parse_args()
+    index = RunIndex(os.path.join(args.sweep_dir, "index.db"))
+
+    if args.command == "run":
+        grid = {
+            "lr": args.lr,
+            "batch_size": args.batch_size,
+            "backbone": args.backbone,
+            "augmentation": args.augmentation,
+            "schedule": args.schedule,
+            "epochs": args.epochs,
+            "seed": args.seed,
+            "data_dir": [args.data_dir],
+        }
+        grid = {key: values for key, values in grid.items() if values}
+        run_sweep(
+            expand_grid(grid),
+            index,
+            args.sweep_dir,
+            jobs=args.jobs,
+            threads_per_job=args.threads_per_job,
+            rerun=args.rerun,
+        )
+    elif args.command == "index-logs":
+        index_logs(index, args.log_dir)
+    else:
+        rows = index.query(
+            parse_filters(args.filter), args.order_by, not args.ascending, args.limit
+        )
+        if not rows:
+            print("No matching runs")
+            return
+        print_table(
+            rows,
+            ["config_hash", "status", "backbone", "lr", "batch_size", "augmentation",
+             "schedule", "best_accuracy", "final_accuracy", "epochs_run"],
+        )
+        if args.command == "compare":
+            # Imported lazily so query/run work without matplotlib
+            from plot_results import plot_comparison
+
+            runs = [row for row in rows if row["log_file"]]
+            plot_comparison(
+                [row["log_file"] for row in runs],
+                labels=[f"{row['config_hash']} {row['backbone']} lr={row['lr']}" for row in runs],
+                metrics=args.metrics,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
+
+
+# Typical household liquid colours (RGB, 0-1): coffee, tea, juice, cola,
+# milk and murky water
+LIQUID_COLORS = np.array(
+    [
+        [0.36, 0.22, 0.10],
+        [0.62, 0.38, 0.12],
+        [0.95, 0.55, 0.10],
+        [0.18, 0.08, 0.04],
+        [0.95, 0.94, 0.90],
+        [0.55, 0.60, 0.58],
+    ],
+    dtype=np.float32,
+)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# Based on imagenet statistics, as in the training transforms
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+
+def load_overlays(overlay_dir, size=128):
+    """Load splash PNGs with transparency as an (K, 4, size, size) tensor."""
+    overlays = []
+    for path in sorted(glob(os.path.join(overlay_dir, "*.png"))):
+        image = Image.open(path).convert("RGBA").resize((size, size))
+        overlays.append(np.asarray(image, dtype=np.float32) / 255.0)
+    if not overlays:
+        raise FileNotFoundError(f"No overlay PNGs found in {overlay_dir}")
+    return torch.from_numpy(np.stack(overlays)).permute(0, 3, 1, 2).contiguous()
+
+
+def procedural_overlays(count=48, size=128, seed=0):
+    """
+    Generate splash, stain and droplet overlays as an (K, 4, size, size)
+    tensor (white RGB + alpha; colour is applied when compositing).
+    """
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:size, 0:size].astype(np.float32) / size - 0.5
+    radius = np.sqrt(xs**2 + ys**2)
+    angle = np.arctan2(ys, xs)
+
+    alphas = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            # Splash: ragged radial edge with a few streaks
+            harmonics = rng.integers(3, 12, size=4)
+            phases = rng.uniform(0, 2 * np.pi, size=4)
+            amps = rng.uniform(0.02, 0.08, size=4)
+            edge = 0.25 + sum(
+                a * np.sin(h * angle + p) for a, h, p in zip(amps, harmonics, phases)
+            )
+            alpha = np.clip((edge - radius) * 40, 0, 1)
+        elif kind == 1:
+            # Stain: thresholded sum of soft blobs
+            centers = rng.uniform(-0.25, 0.25, size=(6, 2))
+            widths = rng.uniform(0.05, 0.15, size=6)
+            field = sum(
+                np.exp(-((xs - cx) ** 2 + (ys - cy) ** 2) / (2 * w**2))
+                for (cx, cy), w in zip(centers, widths)
+            )
+            alpha = np.clip((field - 0.5) * 4, 0, 1)
+        else:
+            # Droplets: many small soft-edged discs
+            centers = rng.uniform(-0.45, 0.45, size=(40, 1, 1, 2))
+            radii = rng.uniform(0.005, 0.03, size=(40, 1, 1))
+            dist = np.sqrt((xs - centers[..., 0]) ** 2 + (ys - centers[..., 1]) ** 2)
+            alpha = np.clip((radii - dist) * 300, 0, 1).max(axis=0)
+        alphas.append(alpha)
+
+    alpha = torch.from_numpy(np.stack(alphas).astype(np.float32)).unsqueeze(1)
+    return torch.cat([torch.ones(count, 3, size, size), alpha], dim=1)
+
+
+def composite_batch(
+    images, overlays, generator, opacity=(0.5, 0.95), scale=(0.2, 0.6), tint=True
+):
+    """
+    Alpha-blend one randomly placed, scaled and tinted overlay onto each
+    image of a batch, entirely with batched tensor ops.
+
+    Args:
+        images: (B, 3, H, W) float tensor in [0, 1]
+        overlays: (K, 4, h, w) RGBA overlay atlas in [0, 1]
+        generator: torch.Generator for the random parameters
+        opacity: Range of the overlay opacity
+        scale: Range of the overlay size relative to the image side
+        tint (bool): Colour the overlays with a liquid colour; off for
+            overlays that carry their own colours
+    """
+    batch_size = images.size(0)
+
+    def uniform(low, high, *shape):
+        return low + (high - low) * torch.rand(*shape, generator=generator)
+
+    # Per-image overlay choice and placement. affine_grid maps output to
+    # input coordinates, so the overlay is scaled by s with theta = 1/s.
+    choice = torch.randint(0, overlays.size(0), (batch_size,), generator=generator)
+    s = uniform(scale[0], scale[1], batch_size)
+    tx = uniform(-0.7, 0.7, batch_size)
+    ty = uniform(-0.7, 0.7, batch_size)
+    theta = torch.zeros(batch_size, 2, 3)
+    theta[:, 0, 0] = 1 / s
+    theta[:, 1, 1] = 1 / s
+    theta[:, 0, 2] = -tx / s
+    theta[:, 1, 2] = -ty / s
+
+    height, width = images.shape[2:]
+    grid = F.affine_grid(theta, [batch_size, 4, height, width], align_corners=False)
+    warped = F.grid_sample(overlays[choice], grid, padding_mode="zeros", align_corners=False)
+
+    rgb = warped[:, :3]
+    if tint:
+        # Tint the overlay with a liquid colour (slightly jittered)
+        colors = torch.from_numpy(LIQUID_COLORS)[
+            torch.randint(0, len(LIQUID_COLORS), (batch_size,), generator=generator)
+        ]
+        colors = (colors + uniform(-0.05, 0.05, batch_size, 3)).clamp(0, 1)
+        rgb = rgb * colors.view(batch_size, 3, 1, 1)
+    alpha = warped[:, 3:4] * uniform(opacity[0], opacity[1], batch_size).view(
+        batch_size, 1, 1, 1
+    )
+    return images * (1 - alpha) + rgb * alpha
+
+
+class OverlayAtlas:
+    def __init__(
+        self,
+        overlays,
+        image_size=224,
+        scales=(0.2, 0.3, 0.4, 0.5, 0.6),
+        opacity=(0.5, 0.95),
+        mean=IMAGENET_MEAN,
+        std=IMAGENET_STD,
+        tint=True,
+    ):
+        """
+        In-memory atlas of overlays for on-the-fly contamination.
+
+        All overlays are resized once per scale up front (one batched
+        interpolate per scale), so applying one at load time is a slice and
+        a blend over the overlay's footprint only - no resampling and no
+        full-frame work per sample.
+
+        The blend is done on the normalized tensor coming out of the
+        training transform. Normalize is affine per channel, so blending
+        with the normalized overlay colour is identical to blending before
+        normalization.
+
+        Args:
+            overlays: (K, 4, h, w) RGBA overlay tensor in [0, 1]
+            image_size (int): Side of the transformed images
+            scales: Overlay sizes relative to image_size
+            opacity: Range of the overlay opacity
+            mean, std: Normalization applied by the dataset transform
+            tint (bool): Colour the overlays with a liquid colour; off for
+                overlays that carry their own colours
+        """
+        self.opacity = opacity
+        self.levels = []
+        for scale in scales:
+            side = max(2, int(round(scale * image_size)))
+            self.levels.append(
+                F.interpolate(overlays, size=(side, side), mode="bilinear", align_corners=False)
+            )
+        self.mean = torch.tensor(mean).view(3, 1, 1)
+        self.std = torch.tensor(std).view(3, 1, 1)
+        self.colors = torch.from_numpy(LIQUID_COLORS) if tint else torch.ones(1, 3)
+
+    @classmethod
+    def from_dir(cls, overlay_dir=None, **kwargs):
+        """
+        Build from a directory of RGBA PNGs (used with their own colours), or
+        tinted procedural overlays if None.
+        """
+        if overlay_dir:
+            return cls(load_overlays(overlay_dir), tint=False, **kwargs)
+        return cls(procedural_overlays(), **kwargs)
+
+    def apply(self, image):
+        """Blend one random overlay into a (3, H, W) normalized tensor in place."""
+        if not torch.is_tensor(image):
+            raise ValueError("Contamination needs a transform that returns a tensor")
+        level = self.levels[torch.randint(len(self.levels), (1,)).item()]
+        overlay = level[torch.randint(level.size(0), (1,)).item()]
+        color = self.colors[torch.randint(len(self.colors), (1,)).item()]
+        opacity = self.opacity[0] + (self.opacity[1] - self.opacity[0]) * torch.rand(1).item()
+
+        # Random position; the overlay may hang over the border and is clipped
+        _, height, width = image.shape
+        side = overlay.size(-1)
+        top = torch.randint(-side // 2, height - side // 2, (1,)).item()
+        left = torch.randint(-side // 2, width - side // 2, (1,)).item()
+        y0, y1 = max(top, 0), min(top + side, height)
+        x0, x1 = max(left, 0), min(left + side, width)
+        if y1 <= y0 or x1 <= x0:
+            return image
+        patch = overlay[:, y0 - top : y1 - top, x0 - left : x1 - left]
+
+        alpha = patch[3:4] * opacity
+        region = image[:, y0:y1, x0:x1]
+        rgb = (patch[:3] * color.view(3, 1, 1) - self.mean) / self.std
+        region.mul_(1 - alpha).add_(rgb * alpha)
+        return image
+
+
+def load_batch(paths, size):
+    """Decode and resize images into a (B, 3, size, size) float tensor."""
+    arrays = [
+        np.asarray(Image.open(path).convert("RGB").resize((size, size)), dtype=np.uint8)
+        for path in paths
+    ]
+    return torch.from_numpy(np.stack(arrays)).permute(0, 3, 1, 2).float() / 255.0
+
+
+def save_batch(images, names, output_dir, quality=90):
+    """Encode a (B, 3, H, W) float tensor as JPEG files."""
+    arrays = (images.clamp(0, 1) * 255).round().byte().permute(0, 2, 3, 1).numpy()
+    for array, name in zip(arrays, names):
+        Image.fromarray(array).save(os.path.join(output_dir, name), quality=quality)
+
+
+def generate_chunk(job):
+    """Worker: composite all variants for one chunk of clean images."""
+    paths, overlays, tint, output_dir, variants, size, batch_size, seed = job
+    # One thread per process; parallelism comes from the process pool
+    torch.set_num_threads(1)
+    generator = torch.Generator()
+    generator.manual_seed(seed)
+
+    written = 0
+    for start in range(0, len(paths), batch_size):
+        batch_paths = paths[start : start + batch_size]
+        images = load_batch(batch_paths, size)
+        stems = [os.path.splitext(os.path.basename(p))[0] for p in batch_paths]
+        for variant in range(variants):
+            contaminated = composite_batch(images, overlays, generator, tint=tint)
+            names = [f"synth_{stem}_{seed}_{variant:03d}.jpg" for stem in stems]
+            save_batch(contaminated, names, output_dir)
+            written += len(names)
+    return written
+
+
+def generate(
+    data_dir="./data",
+    split="train",
+    output_dir=None,
+    overlay_dir=None,
+    variants=10,
+    size=256,
+    batch_size=32,
+    workers=None,
+    seed=0,
+):
+    """
+    Write `variants` contaminated copies of every clean (class 0) image of
+    a split into its class 1 directory. Returns the number of files written.
+    """
+    source_dir = os.path.join(data_dir, split, "0")
+    if output_dir is None:
+        output_dir = os.path.join(data_dir, split, "1")
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = sorted(
+        os.path.join(source_dir, name)
+        for name in os.listdir(source_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not paths:
+        return 0
+    # User overlays keep their own colours; only procedural ones are tinted
+    if overlay_dir:
+        overlays = load_overlays(overlay_dir)
+    else:
+        overlays = procedural_overlays(seed=seed)
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = -(-len(paths) // workers)  # ceil
+    tint = not overlay_dir
+    jobs = [
+        (
+            paths[i : i + chunk_size],
+            overlays,
+            tint,
+            output_dir,
+            variants,
+            size,
+            batch_size,
+            seed + i,
+        )
+        for i in range(0, len(paths), chunk_size)
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(generate_chunk, jobs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate contaminated (class 1) images from clean (class 0) ones"
+    )
+    parser.add_argument("--data-dir", default="./data", help="Dataset root directory")
+    parser.add_argument("--split", default="train", help="Split to augment")
+    parser.add_argument("--output-dir", help="Defaults to <data-dir>/<split>/1")
+    parser.add_argument(
+        "--overlay-dir", help="Directory of RGBA splash PNGs (default: procedural overlays)"
+    )
+    parser.add_argument("--variants", type=int, default=10, help="Variants per image")
+    parser.add_argument("--size", type=int, default=256, help="Output image size")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start_time = time.time()
+    written = generate(
+        args.data_dir,
+        args.split,
+        args.output_dir,
+        args.overlay_dir,
+        args.variants,
+        args.size,
+        args.batch_size,
+        args.workers,
+        args.seed,
+    )
+    elapsed = time.time() - start_time
+    print(
+        f"Wrote {written} contaminated images in {elapsed:.1f}s "
+        f"({written / max(elapsed, 1e-9):.0f}/s)"
+    )
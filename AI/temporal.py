@@ -0,0 +1,133 @@
+from collections import deque
+
+import torch
+import torch.nn as nn
+
+try:
+    from backbones import create_model
+except ImportError:  # imported as AI.temporal from the backend
+    from AI.backbones import create_model
+
+
+class TemporalHead(nn.Module):
+    def __init__(self, feature_dim, hidden=256):
+        """
+        Lightweight temporal fusion: two 1D convolutions over time followed
+        by mean+max pooling over the frames and a single-logit classifier.
+        Works with any number of frames.
+        """
+        super().__init__()
+        self.temporal = nn.Sequential(
+            nn.Conv1d(feature_dim, hidden, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+            nn.Conv1d(hidden, hidden, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+        )
+        self.classifier = nn.Linear(2 * hidden, 1)
+
+    def forward(self, features):
+        """(B, T, F) per-frame features -> (B, 1) logits."""
+        x = self.temporal(features.transpose(1, 2))
+        pooled = torch.cat([x.mean(dim=2), x.amax(dim=2)], dim=1)
+        return self.classifier(pooled)
+
+
+class TemporalClassifier(nn.Module):
+    def __init__(
+        self, backbone="resnet50", pretrained=False, hidden=256, freeze_backbone=False
+    ):
+        """
+        Multi-frame classifier: a per-frame backbone (its classification head
+        removed) followed by a TemporalHead over the frame features.
+
+        Args:
+            backbone (str): Name from backbones.BACKBONES
+            pretrained (bool): Load ImageNet weights for the backbone
+            hidden (int): Width of the temporal head
+            freeze_backbone (bool): Only train the temporal head
+        """
+        super().__init__()
+        model = create_model(backbone, pretrained)
+        if backbone.startswith("resnet"):
+            feature_dim = model.fc.in_features
+            model.fc = nn.Identity()
+            del model.classifier
+        else:
+            feature_dim = model.classifier[-1].in_features
+            model.classifier[-1] = nn.Identity()
+
+        self.backbone = model
+        self.head = TemporalHead(feature_dim, hidden)
+        self.freeze_backbone = freeze_backbone
+        if freeze_backbone:
+            for param in self.backbone.parameters():
+                param.requires_grad = False
+
+    def train(self, mode=True):
+        super().train(mode)
+        # A frozen backbone keeps its batch norm statistics
+        if self.freeze_backbone:
+            self.backbone.eval()
+        return self
+
+    def frame_features(self, frames):
+        """(N, C, H, W) frames -> (N, F) features."""
+        return self.backbone(frames)
+
+    def forward(self, clips):
+        """(B, T, C, H, W) clips -> (B, 1) logits."""
+        batch_size, clip_length = clips.shape[:2]
+        features = self.frame_features(clips.flatten(0, 1))
+        return self.head(features.view(batch_size, clip_length, -1))
+
+
+class StreamingTemporalPredictor:
+    def __init__(self, model, clip_length=8, min_frames=None, device="cpu"):
+        """
+        Frame-by-frame inference with a TemporalClassifier.
+
+        The features of the last `clip_length` frames are cached in a ring
+        buffer, so every new frame costs a single backbone pass plus the
+        (tiny) temporal head. Keep one predictor per stream, e.g. per
+        WebSocket connection, and call reset() between drop events.
+
+        Args:
+            model: TemporalClassifier in eval mode
+            clip_length (int): Number of frames fused per prediction
+            min_frames (int): Frames needed before predicting (default clip_length)
+            device: Device the model lives on
+        """
+        self.model = model
+        self.device = device
+        self.min_frames = min_frames or clip_length
+        self.buffer = deque(maxlen=clip_length)
+
+    def reset(self):
+        self.buffer.clear()
+
+    @torch.no_grad()
+    def push(self, image_tensor):
+        """
+        Add a preprocessed frame ((1, C, H, W) or (C, H, W)). Returns
+        (prediction, probability), or None while the buffer is filling.
+        """
+        if image_tensor.dim() == 3:
+            image_tensor = image_tensor.unsqueeze(0)
+        features = self.model.frame_features(image_tensor.to(self.device))
+        self.buffer.append(features[0])
+        if len(self.buffer) < self.min_frames:
+            return None
+
+        logits = self.model.head(torch.stack(list(self.buffer)).unsqueeze(0))
+        probability = torch.sigmoid(logits).item()
+        return float(probability >= 0.5), probability
+
+
+def load_temporal_model(model_path, backbone="resnet50", device="cpu"):
+    """Load a TemporalClassifier from a state dict or training checkpoint."""
+    model = TemporalClassifier(backbone)
+    state = torch.load(model_path, map_location=device, weights_only=False)
+    if "model" in state:
+        state = state["model"]
+    model.load_state_dict(state)
+    return model.to(device).eval()
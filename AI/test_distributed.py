@@ -0,0 +1,49 @@
+import socket
+
+import pytest
+
+torch = pytest.importorskip("torch")
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.nn as nn
+from torch.nn.parallel import DistributedDataParallel
+
+from backbones import create_model
+from distributed import init_distributed
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def ddp_worker(rank, world_size, port):
+    init_distributed(rank, world_size, master_port=port)
+    torch.manual_seed(0)
+    model = create_model("resnet18")
+    ddp_model = DistributedDataParallel(model)
+    optimizer = torch.optim.SGD(
+        [p for p in model.parameters() if p.requires_grad], lr=0.01
+    )
+    criterion = nn.BCEWithLogitsLoss()
+
+    generator = torch.Generator().manual_seed(rank)
+    for _ in range(3):
+        inputs = torch.randn(2, 3, 64, 64, generator=generator)
+        labels = torch.randint(0, 2, (2,), generator=generator).float()
+        optimizer.zero_grad()
+        loss = criterion(ddp_model(inputs).squeeze(1), labels)
+        loss.backward()
+        optimizer.step()
+
+    # Gradients were averaged, so every rank holds the same weights
+    weights = model.fc.weight.detach().clone()
+    gathered = [torch.empty_like(weights) for _ in range(world_size)]
+    dist.all_gather(gathered, weights)
+    assert all(torch.equal(gathered[0], w) for w in gathered)
+    dist.destroy_process_group()
+
+
+def test_ddp_trains_resnet_with_unused_classifier_head():
+    mp.spawn(ddp_worker, args=(2, str(free_port())), nprocs=2, join=True)
@@ -1,44 +1,40 @@
 from torchvision import transforms
-from torch.utils.data import DataLoader
+from torch.utils.data import ConcatDataset, DataLoader, Subset
 import torch
 import torch.nn as nn
-from torchvision import models
-
-from trash_dataset import BinaryClassificationDataset
+import torch.multiprocessing as mp
+from torch.nn.parallel import DistributedDataParallel
+
+from backbones import BACKBONES, create_model
+from synthetic import OverlayAtlas
+from temporal import TemporalClassifier
+from trash_dataset import (
+    BinaryClassificationDataset,
+    ClipDataset,
+    ResumableRandomSampler,
+)
+from checkpointing import (
+    CheckpointManager,
+    capture_rng_state,
+    load_checkpoint,
+    restore_rng_state,
+)
+from distributed import (
+    broadcast_object,
+    broadcast_values,
+    cleanup_distributed,
+    env_rank_and_world_size,
+    init_distributed,
+    scaling_report,
+)
+from evaluate import TTA_VIEWS, eval_transform, run_evaluation
+from metrics_log import BATCH_LOSSES, EPOCH, INFO, MetricsLogWriter, read_training_info
+from schedulers import SCHEDULES, EarlyStopping, build_scheduler, current_lr
+import argparse
 import os
 from datetime import datetime
-import json
 import time
 
-# Create a logging directory if it doesn't exist
-log_dir = "./logs"
-os.makedirs(log_dir, exist_ok=True)
-
-# Generate a unique log file name with timestamp
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-log_file = os.path.join(log_dir, f"training_log_{timestamp}.json")
-
-
-# Initialize log dictionary
-log_data = {
-    "training_info": {
-        "started_at": timestamp,
-        "model": "ResNet50",
-        "batch_size": 32,
-        "epochs": 100,
-        "optimizer": "Adam",
-        "learning_rate": 0.001,
-    },
-    "epochs": [],
-}
-
-
-# Function to save log data
-def save_log():
-    with open(log_file, "w") as f:
-        json.dump(log_data, f, indent=4)
-    print(f"Log saved to {log_file}")
-
 
 # Define transformations
 transform = transforms.Compose(
@@ -57,181 +53,752 @@ transform = transforms.Compose(
     ]
 )
 
-
-# Create datasets
-train_dataset = BinaryClassificationDataset(
-    root_dir="./data", split="train", transform=transform
+# Lighter augmentation presets for sweeps
+flip_transform = transforms.Compose(
+    [
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.RandomHorizontalFlip(),
+        transforms.RandomVerticalFlip(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+    ]
 )
 
-test_dataset = BinaryClassificationDataset(
-    root_dir="./data", split="test", transform=transform
-)
+AUGMENTATIONS = {"full": transform, "flips": flip_transform, "none": eval_transform}
+
+
+def new_log_data(args, timestamp):
+    """Create the log dictionary for a fresh run."""
+    return {
+        "training_info": {
+            "started_at": timestamp,
+            "model": ("Temporal" if args.clip_length else "")
+            + BACKBONES[args.backbone],
+            "backbone": args.backbone,
+            "clip_length": args.clip_length,
+            "freeze_backbone": args.freeze_backbone,
+            "augmentation": args.augmentation,
+            "contamination_prob": args.contamination_prob,
+            "batch_size": args.batch_size,
+            "epochs": args.epochs,
+            "optimizer": "Adam",
+            "learning_rate": args.lr,
+            "lr_schedule": {"name": args.schedule},
+            "early_stopping": {
+                "monitor": args.monitor,
+                "patience": args.patience,
+                "min_delta": args.min_delta,
+            },
+            "val_fraction": args.val_fraction,
+            "init_weights": args.init_weights,
+            "hard_examples": args.hard_examples,
+            "replay_fraction": args.replay_fraction if args.hard_examples else None,
+        },
+        "epochs": [],
+    }
 
-# Create dataloaders
-train_loader = DataLoader(train_dataset, batch_size=32, shuffle=True, num_workers=4)
-test_loader = DataLoader(test_dataset, batch_size=32, shuffle=False, num_workers=4)
-
-# Load pretrained ResNet50 from torchvision
-resnet50 = models.resnet50(pretrained=True)
-
-# Replace the final fully connected layer
-num_ftrs = resnet50.fc.in_features  # This will automatically get the correct dimension
-resnet50.fc = nn.Linear(num_ftrs, 1)  # Binary classification
-
-# Print the classifier to see its structure
-# print("Original classifier:", resnet50.classifier)
-resnet50.classifier = nn.Linear(2048, 1)  # For binary classification
-print("New classifier:", resnet50.classifier)
-
-# Loss function and optimizer
-criterion = nn.BCEWithLogitsLoss()
-optimizer = torch.optim.Adam(resnet50.parameters(), lr=0.001)
-
-# Check if CUDA is available
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-print(f"Using device: {device}")
-resnet50.to(device)
-
-
-# Training loop
-start_time = time.time()
-num_epochs = 100
-
-# Track the best model
-best_accuracy = 0.0
-best_model_path = None
-
-for epoch in range(num_epochs):
-    resnet50.train()
-    running_loss = 0.0
-    epoch_loss = 0.0
-    batch_losses = []
-
-    for i, (inputs, labels) in enumerate(train_loader):
-        inputs, labels = inputs.to(device), labels.to(device)
-
-        # Zero the parameter gradients
-        optimizer.zero_grad()
-
-        # Forward pass
-        outputs = resnet50(inputs)
-        loss = criterion(outputs.squeeze(), labels.float())
-
-        # Backward pass and optimize
-        loss.backward()
-        optimizer.step()
-
-        # Log the batch loss
-        batch_loss = loss.item()
-        running_loss += batch_loss
-        epoch_loss += batch_loss
-        batch_losses.append(batch_loss)
-
-        # Print statistics every 10 mini-batches
-        if i % 10 == 9:
-            avg_loss = running_loss / 10
-            print(f"Epoch {epoch+1}/{num_epochs}, Batch {i+1}, Loss: {avg_loss:.4f}")
-            running_loss = 0.0
-
-    # Calculate average epoch loss
-    avg_epoch_loss = epoch_loss / len(train_loader)
-
-    # Evaluation at the end of each epoch
-    resnet50.eval()
-    correct = 0
-    total = 0
-    with torch.no_grad():
-        for inputs, labels in test_loader:
-            inputs, labels = inputs.to(device), labels.to(device)
-            outputs = resnet50(inputs)
-            predicted = (outputs.squeeze() > 0).float()
-            total += labels.size(0)
-            correct += (predicted == labels).sum().item()
 
-    # Calculate accuracy
-    accuracy = 100 * correct / total
+def noop(*args, **kwargs):
+    pass
 
-    # Print epoch results
-    print(
-        f"Epoch [{epoch+1}/{num_epochs}] completed, Loss: {avg_epoch_loss:.4f}, Accuracy: {accuracy:.2f}%"
-    )
-
-    # Save the best model if this epoch has the highest accuracy so far
-    if accuracy > best_accuracy:
-        best_accuracy = accuracy
-        best_model_path = f"resnet50v30_best_model_{timestamp}_epoch{epoch+1}.pth"
-        torch.save(resnet50.state_dict(), best_model_path)
-        print(f"New best model saved with accuracy: {best_accuracy:.2f}%")
-
-    # Log the epoch data
-    epoch_data = {
-        "epoch": epoch + 1,
-        "loss": avg_epoch_loss,
-        "accuracy": accuracy,
-        "batch_losses": batch_losses,
+
+def load_baseline_throughput(log_file):
+    """Read the single-process training throughput from a previous log."""
+    training_info = read_training_info(log_file)
+    if "scaling" in training_info:
+        return training_info["scaling"]["train_samples_per_second"]
+    return None
+
+
+def build_model(device, backbone="resnet50", clip_length=0, freeze_backbone=False):
+    """
+    Create the pretrained backbone with a binary classification head, or a
+    multi-frame TemporalClassifier when training on clips.
+    """
+    if clip_length:
+        model = TemporalClassifier(
+            backbone, pretrained=True, freeze_backbone=freeze_backbone
+        )
+        print("Temporal head:", model.head)
+    else:
+        model = create_model(backbone, pretrained=True)
+        print("New classifier:", model.classifier)
+    return model.to(device)
+
+
+def model_prefix(args):
+    """File name prefix of the saved weights."""
+    if args.clip_length:
+        return f"temporal{args.clip_length}_{args.backbone}"
+    return args.backbone
+
+
+def make_dataset(root_dir, split, transform, clip_length=0, **kwargs):
+    """Single-frame dataset, or ClipDataset when clip_length > 0."""
+    if clip_length:
+        return ClipDataset(root_dir, split, transform, clip_length=clip_length)
+    return BinaryClassificationDataset(
+        root_dir=root_dir, split=split, transform=transform, **kwargs
+    )
+
+
+def add_hard_examples(train_dataset, hard_dir, train_transform, replay_fraction, seed):
+    """
+    Training set for incremental fine-tuning: the labeled hard examples
+    (hard_dir/train/0 and 1, see hard_examples.py) plus a fixed random
+    `replay_fraction` of the original training samples, so the model does
+    not forget the original data.
+    """
+    hard = make_dataset(hard_dir, "train", train_transform)
+    if replay_fraction >= 1:
+        return ConcatDataset([train_dataset, hard]), len(hard)
+    generator = torch.Generator()
+    generator.manual_seed(seed)
+    order = torch.randperm(len(train_dataset), generator=generator).tolist()
+    replay = Subset(train_dataset, order[: int(len(order) * replay_fraction)])
+    return ConcatDataset([replay, hard]), len(hard)
+
+
+def evaluate(model, loader, device):
+    """Return the accuracy (%) and mean BCE loss of the model on a dataloader."""
+    metrics = run_evaluation(model, loader, device)
+    return metrics["accuracy"], metrics["loss"]
+
+
+def split_train_val(
+    root_dir,
+    val_fraction,
+    seed,
+    train_transform=transform,
+    contamination=None,
+    contamination_prob=0.0,
+    clip_length=0,
+):
+    """
+    Split the train split into a training subset (augmented) and a held-out
+    validation subset (deterministic transform) with a fixed seed. Synthetic
+    contamination, if any, only applies to the training subset. With
+    clip_length > 0 the samples are whole clips, so no clip ends up in both
+    subsets.
+    """
+    contamination_kwargs = {}
+    if contamination is not None:
+        contamination_kwargs = {
+            "contamination": contamination,
+            "contamination_prob": contamination_prob,
+        }
+    train_source = make_dataset(
+        root_dir, "train", train_transform, clip_length, **contamination_kwargs
+    )
+    if val_fraction <= 0:
+        return train_source, None
+
+    val_source = make_dataset(root_dir, "train", eval_transform, clip_length)
+    generator = torch.Generator()
+    generator.manual_seed(seed)
+    order = torch.randperm(len(train_source), generator=generator).tolist()
+    n_val = int(len(order) * val_fraction)
+    return Subset(train_source, order[n_val:]), Subset(val_source, order[:n_val])
+
+
+def train(args, rank=0, world_size=1):
+    # Logging, evaluation and checkpointing happen on rank 0 only
+    is_main = rank == 0
+    log = print if is_main else noop
+
+    # Check if CUDA is available. Distributed mode targets CPU nodes (gloo).
+    device = torch.device(
+        "cuda" if torch.cuda.is_available() and world_size == 1 else "cpu"
+    )
+    log(f"Using device: {device}")
+    if world_size > 1:
+        # Split the cores between the processes instead of oversubscribing
+        torch.set_num_threads(args.threads_per_proc)
+        log(f"Distributed training with {world_size} processes (gloo)")
+
+    # On-the-fly synthetic contamination of clean training samples
+    contamination = None
+    if args.contamination_prob > 0:
+        contamination = OverlayAtlas.from_dir(args.overlay_dir)
+
+    # Create datasets
+    train_dataset, val_dataset = split_train_val(
+        args.data_dir,
+        args.val_fraction,
+        args.seed,
+        AUGMENTATIONS[args.augmentation],
+        contamination,
+        args.contamination_prob,
+        args.clip_length,
+    )
+
+    if args.hard_examples:
+        train_dataset, n_hard = add_hard_examples(
+            train_dataset,
+            args.hard_examples,
+            AUGMENTATIONS[args.augmentation],
+            args.replay_fraction,
+            args.seed,
+        )
+        log(
+            f"Fine-tuning on {n_hard} hard examples and "
+            f"{len(train_dataset) - n_hard} replayed training samples"
+        )
+
+    test_dataset = make_dataset(args.data_dir, "test", eval_transform, args.clip_length)
+
+    # Create dataloaders. The sampler replaces shuffle=True so that the
+    # order of an interrupted epoch can be replayed on resume.
+    sampler = ResumableRandomSampler(
+        train_dataset, seed=args.seed, num_replicas=world_size, rank=rank
+    )
+    train_loader = DataLoader(
+        train_dataset,
+        batch_size=args.batch_size,
+        sampler=sampler,
+        num_workers=args.num_workers,
+    )
+    test_loader = DataLoader(
+        test_dataset,
+        batch_size=args.batch_size,
+        shuffle=False,
+        num_workers=args.num_workers,
+    )
+    # Without a validation split, fall back to monitoring the test split
+    val_loader = test_loader
+    if val_dataset is not None:
+        val_loader = DataLoader(
+            val_dataset,
+            batch_size=args.batch_size,
+            shuffle=False,
+            num_workers=args.num_workers,
+        )
+    batches_per_epoch = len(train_loader)
+
+    resnet50 = build_model(
+        device, args.backbone, args.clip_length, args.freeze_backbone
+    )
+    if args.init_weights:
+        # Start from an earlier model instead of the ImageNet weights (a
+        # resumed checkpoint below still takes precedence)
+        log(f"Initializing from {args.init_weights}")
+        state = load_checkpoint(args.init_weights, device)
+        if "model" in state:
+            state = state["model"]
+        resnet50.load_state_dict(state)
+
+    # Loss function and optimizer (a frozen backbone has nothing to update)
+    criterion = nn.BCEWithLogitsLoss()
+    optimizer = torch.optim.Adam(
+        [p for p in resnet50.parameters() if p.requires_grad], lr=args.lr
+    )
+
+    # DDP broadcasts rank 0's parameters on construction; keep `resnet50` as
+    # the unwrapped module for evaluation and state dicts
+    train_model = resnet50
+    if world_size > 1:
+        train_model = DistributedDataParallel(resnet50)
+
+    # Learning rate schedule and early stopping on the validation metric
+    monitor_mode = "min" if args.monitor == "val_loss" else "max"
+    scheduler, step_per_batch, schedule_params = build_scheduler(
+        args.schedule,
+        optimizer,
+        args.epochs,
+        batches_per_epoch,
+        args.lr,
+        mode=monitor_mode,
+    )
+    early_stopping = EarlyStopping(
+        patience=args.patience, min_delta=args.min_delta, mode=monitor_mode
+    )
+
+    checkpoints = None
+    if is_main:
+        checkpoints = CheckpointManager(
+            args.checkpoint_dir,
+            keep_last=args.keep_last,
+            keep_best=args.keep_best,
+            mode=monitor_mode,
+        )
+
+    # Progress through the run; this is everything (besides the model,
+    # optimizer and RNG state) needed to continue from a checkpoint
+    progress = {
+        "epoch": 0,
+        "batch": 0,
+        "epoch_loss": 0.0,
+        "batch_losses": [],
+        "best_metric": None,  # best value of args.monitor
+        "best_accuracy": 0.0,  # test accuracy of the best epoch
+        "best_epoch": None,
+        "best_model_path": None,
+        "elapsed_seconds": 0.0,
+        "stop_reason": None,
     }
-    log_data["epochs"].append(epoch_data)
-
-    # Save log after each epoch
-    save_log()
-
-    # Back to training mode for next epoch
-    resnet50.train()
-
-
-# Evaluation
-resnet50.eval()
-with torch.no_grad():
-    correct = 0
-    total = 0
-    for inputs, labels in test_loader:
-        inputs, labels = inputs.to(device), labels.to(device)
-        outputs = resnet50(inputs)
-        predicted = (outputs.squeeze() > 0).float()
-        total += labels.size(0)
-        correct += (predicted == labels).sum().item()
-
-    accuracy = 100 * correct / total
-    print(f"Test Accuracy: {accuracy:.2f}%")
-    final_accuracy = 100 * correct / total
+
+    resume_path = args.resume
+    if args.resume == "auto":
+        resume_path = checkpoints.latest() if is_main else None
+        resume_path = broadcast_object(resume_path, world_size)
+    if resume_path:
+        log(f"Resuming from checkpoint: {resume_path}")
+        checkpoint = load_checkpoint(resume_path, device)
+        resnet50.load_state_dict(checkpoint["model"])
+        optimizer.load_state_dict(checkpoint["optimizer"])
+        if scheduler is not None:
+            scheduler.load_state_dict(checkpoint["scheduler"])
+        early_stopping.load_state_dict(checkpoint["early_stopping"])
+        restore_rng_state(checkpoint["rng"])
+        progress = checkpoint["progress"]
+        log_data = checkpoint["log_data"]
+        sampler.seed = checkpoint["sampler_seed"]
+    else:
+        if args.resume == "auto":
+            log("No checkpoint found, starting a new run")
+        torch.manual_seed(args.seed)
+        log_data = new_log_data(args, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        log_data["training_info"]["lr_schedule"]["params"] = schedule_params
+
+    # Create a logging directory if it doesn't exist
+    os.makedirs(args.log_dir, exist_ok=True)
+    os.makedirs(args.model_dir, exist_ok=True)
+    timestamp = log_data["training_info"]["started_at"]
+    log_file = os.path.join(args.log_dir, f"training_log_{timestamp}.jsonl")
+
+    # Append-only metrics log; a resumed run keeps appending to the same file
+    # and readers keep the last record of a re-logged epoch
+    writer = None
+    if is_main:
+        writer = MetricsLogWriter(log_file)
+        if not resume_path:
+            writer.write(INFO, **log_data["training_info"])
+        log(f"Logging to {log_file}")
+
+    def save_checkpoint(metric=None):
+        if not is_main:
+            return
+        checkpoints.save(
+            {
+                "model": resnet50.state_dict(),
+                "optimizer": optimizer.state_dict(),
+                "scheduler": scheduler.state_dict() if scheduler else None,
+                "early_stopping": early_stopping.state_dict(),
+                "rng": capture_rng_state(),
+                "progress": progress,
+                "log_data": log_data,
+                "sampler_seed": sampler.seed,
+            },
+            epoch=progress["epoch"],
+            batch=progress["batch"],
+            metric=metric,
+        )
+
+    # Training loop
+    start_time = time.time() - progress["elapsed_seconds"]
+    num_epochs = args.epochs
+
+    for epoch in range(progress["epoch"], num_epochs):
+        # A resumed run that had already stopped early has nothing left to do
+        if progress["stop_reason"]:
+            break
+
+        train_model.train()
+        epoch_lr = current_lr(optimizer)
+        running_loss = 0.0
+        epoch_start = time.time()
+        batches_run = 0
+
+        # Skip the samples already consumed if resuming mid-epoch
+        sampler.set_epoch(epoch, start_index=progress["batch"] * args.batch_size)
+
+        for i, (inputs, labels) in enumerate(train_loader, start=progress["batch"]):
+            inputs, labels = inputs.to(device), labels.to(device)
+
+            # Zero the parameter gradients
+            optimizer.zero_grad()
+
+            # Forward pass
+            outputs = train_model(inputs)
+            loss = criterion(outputs.squeeze(), labels.float())
+
+            # Backward pass and optimize
+            loss.backward()
+            optimizer.step()
+            if scheduler is not None and step_per_batch:
+                scheduler.step()
+
+            # Log the batch loss (rank 0's local loss under DDP)
+            batch_loss = loss.item()
+            batches_run += 1
+            running_loss += batch_loss
+            progress["epoch_loss"] += batch_loss
+            progress["batch_losses"].append(batch_loss)
+            progress["batch"] = i + 1
+
+            # Print statistics every 10 mini-batches
+            if i % 10 == 9:
+                avg_loss = running_loss / 10
+                log(f"Epoch {epoch+1}/{num_epochs}, Batch {i+1}, Loss: {avg_loss:.4f}")
+                running_loss = 0.0
+
+            # Mid-epoch checkpoint
+            if (
+                args.checkpoint_every_batches
+                and progress["batch"] % args.checkpoint_every_batches == 0
+                and progress["batch"] < batches_per_epoch
+            ):
+                progress["elapsed_seconds"] = time.time() - start_time
+                save_checkpoint()
+
+        # Global training throughput of this epoch, across all ranks
+        samples_per_second = (
+            batches_run * args.batch_size * world_size / (time.time() - epoch_start)
+        )
+
+        # Calculate average epoch loss
+        avg_epoch_loss = progress["epoch_loss"] / batches_per_epoch
+
+        # Evaluation at the end of each epoch, on rank 0, shared with the
+        # other ranks so they take the same schedule/early-stopping decisions
+        metrics = None
+        if is_main:
+            accuracy, test_loss = evaluate(resnet50, test_loader, device)
+            if val_dataset is not None:
+                val_accuracy, val_loss = evaluate(resnet50, val_loader, device)
+            else:
+                val_accuracy, val_loss = accuracy, test_loss
+            metrics = [accuracy, test_loss, val_accuracy, val_loss]
+        accuracy, test_loss, val_accuracy, val_loss = broadcast_values(
+            metrics, 4, world_size
+        )
+        monitored = val_loss if args.monitor == "val_loss" else val_accuracy
+
+        # Print epoch results
+        log(
+            f"Epoch [{epoch+1}/{num_epochs}] completed, Loss: {avg_epoch_loss:.4f}, "
+            f"Val Accuracy: {val_accuracy:.2f}%, Accuracy: {accuracy:.2f}%, LR: {epoch_lr:.2e}"
+        )
+
+        # Log the epoch data
+        epoch_data = {
+            "epoch": epoch + 1,
+            "loss": avg_epoch_loss,
+            "accuracy": accuracy,
+            "val_accuracy": val_accuracy,
+            "val_loss": val_loss,
+            "lr": epoch_lr,
+            "train_samples_per_second": samples_per_second,
+        }
+
+        # Epoch-level schedules step after evaluation
+        if scheduler is not None and not step_per_batch:
+            if args.schedule == "plateau":
+                scheduler.step(monitored)
+            else:
+                scheduler.step()
+
+        if early_stopping.step(monitored, epoch + 1):
+            progress["stop_reason"] = (
+                f"early_stopping: {args.monitor} did not improve for "
+                f"{args.patience} epochs (best {early_stopping.best:.4f} "
+                f"at epoch {early_stopping.best_epoch})"
+            )
+            log(f"Stopping early: {progress['stop_reason']}")
+
+        # Save the best model if this epoch has the best validation metric so
+        # far (checkpoints from before best_metric fall back to the first epoch)
+        best_metric = progress.get("best_metric")
+        if (
+            best_metric is None
+            or (monitor_mode == "max" and monitored > best_metric)
+            or (monitor_mode == "min" and monitored < best_metric)
+        ):
+            progress["best_metric"] = monitored
+            progress["best_accuracy"] = accuracy
+            progress["best_epoch"] = epoch + 1
+            progress["best_model_path"] = os.path.join(
+                args.model_dir,
+                f"{model_prefix(args)}v30_best_model_{timestamp}_epoch{epoch+1}.pth",
+            )
+            if is_main:
+                checkpoints.save_async(
+                    resnet50.state_dict(), progress["best_model_path"]
+                )
+            epoch_data["is_best_model"] = True
+            log(
+                f"New best model saved with {args.monitor}: {monitored:.4f} "
+                f"(accuracy: {accuracy:.2f}%)"
+            )
+
+        log_data["epochs"].append(epoch_data)
+
+        # Append this epoch to the log
+        if is_main:
+            writer.write(EPOCH, **epoch_data)
+            writer.write(BATCH_LOSSES, epoch=epoch + 1, values=progress["batch_losses"])
+
+        # Epoch boundary: the next epoch starts from its first batch
+        progress["epoch"] = epoch + 1
+        progress["batch"] = 0
+        progress["epoch_loss"] = 0.0
+        progress["batch_losses"] = []
+        progress["elapsed_seconds"] = time.time() - start_time
+        if (
+            progress["epoch"] % args.checkpoint_every == 0
+            or progress["epoch"] == num_epochs
+            or progress["stop_reason"]
+        ):
+            save_checkpoint(metric=monitored)
+
+    if progress["stop_reason"] is None:
+        progress["stop_reason"] = f"completed: reached max epochs ({num_epochs})"
+    epochs_run = progress["epoch"]
+    log_data["training_info"]["stop_reason"] = progress["stop_reason"]
+    log_data["training_info"]["epochs_run"] = epochs_run
+
+    if not is_main:
+        cleanup_distributed()
+        return
+
+    # Scaling efficiency against a single-process baseline
+    throughputs = [e["train_samples_per_second"] for e in log_data["epochs"]]
+    baseline = None
+    if args.baseline_log:
+        baseline = load_baseline_throughput(args.baseline_log)
+        if baseline is None:
+            print(f"No throughput recorded in baseline log: {args.baseline_log}")
+    scaling = scaling_report(
+        sum(throughputs) / max(len(throughputs), 1), world_size, baseline
+    )
+    log_data["training_info"]["scaling"] = scaling
+    print(f"Training throughput: {scaling['train_samples_per_second']:.1f} samples/s")
+    if "scaling_efficiency" in scaling:
+        print(
+            f"Speedup vs baseline: {scaling['speedup']:.2f}x, "
+            f"scaling efficiency: {100 * scaling['scaling_efficiency']:.1f}%"
+        )
+
+    # Evaluation
+    test_metrics = run_evaluation(resnet50, test_loader, device, args.tta)
+    final_accuracy = test_metrics["accuracy"]
     print(f"Final Test Accuracy: {final_accuracy:.2f}%")
+    print(
+        f"Precision: {test_metrics['precision']:.4f}, Recall: {test_metrics['recall']:.4f}, "
+        f"ROC-AUC: {test_metrics['roc_auc']:.4f}"
+    )
     log_data["training_info"]["final_accuracy"] = final_accuracy
+    log_data["training_info"]["test_metrics"] = test_metrics
+
+    # Calculate total training time
+    training_time = time.time() - start_time
+    log_data["training_info"]["total_time_seconds"] = training_time
+    log_data["training_info"]["completed_at"] = datetime.now().strftime("%Y%m%d_%H%M%S")
+    print(f"Total training time: {training_time:.2f} seconds")
+
+    # Save the final model (last epoch)
+    final_model_path = os.path.join(
+        args.model_dir,
+        f"{model_prefix(args)}v100_final_epoch{epochs_run}_{timestamp}.pth",
+    )
+    checkpoints.save_async(resnet50.state_dict(), final_model_path)
+    log_data["training_info"]["final_model_path"] = final_model_path
+
+    # Print summary of best model vs. final model
+    best_metric = progress.get("best_metric")
+    print(
+        f"Best model: {progress['best_model_path']} with {args.monitor}: "
+        f"{'n/a' if best_metric is None else f'{best_metric:.4f}'}, "
+        f"accuracy: {progress['best_accuracy']:.2f}%"
+    )
+    print(f"Final model: {final_model_path} with accuracy: {final_accuracy:.2f}%")
+
+    # Record both models in the log
+    log_data["training_info"]["model_comparison"] = {
+        "best_model": {
+            "path": progress["best_model_path"],
+            "accuracy": progress["best_accuracy"],
+            args.monitor: best_metric,
+            "epoch": progress["best_epoch"],
+        },
+        "final_model": {
+            "path": final_model_path,
+            "accuracy": final_accuracy,
+            "epoch": epochs_run,
+        },
+    }
+
+    # Record the final results and model paths
+    writer.write(INFO, **log_data["training_info"])
+    writer.close()
+    print(f"Log saved to {log_file}")
+
+    # Wait for the outstanding model/checkpoint writes
+    checkpoints.close()
+    print(f"Final model saved successfully to {final_model_path}!")
+    cleanup_distributed()
+
 
+def distributed_worker(rank, args):
+    """Entry point of each process spawned by --nproc."""
+    init_distributed(rank, args.nproc, master_port=args.master_port)
+    train(args, rank=rank, world_size=args.nproc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the ResNet50 binary classifier")
+    parser.add_argument("--data-dir", default="./data", help="Dataset root directory")
+    parser.add_argument("--log-dir", default="./logs", help="Directory for training logs")
+    parser.add_argument(
+        "--model-dir", default=".", help="Directory for the best/final model weights"
+    )
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=0.001)
+    parser.add_argument("--num-workers", type=int, default=4)
+    parser.add_argument("--backbone", choices=list(BACKBONES), default="resnet50")
+    parser.add_argument(
+        "--augmentation",
+        choices=list(AUGMENTATIONS),
+        default="full",
+        help="Training augmentation preset",
+    )
+    parser.add_argument(
+        "--contamination-prob",
+        type=float,
+        default=0.0,
+        help="Probability of turning a clean training sample into a synthetic contaminated one",
+    )
+    parser.add_argument(
+        "--overlay-dir",
+        help="RGBA splash PNGs for --contamination-prob (default: procedural overlays)",
+    )
+    parser.add_argument(
+        "--clip-length",
+        type=int,
+        default=0,
+        help="Train the multi-frame temporal classifier on N-frame clips (0: single frames)",
+    )
+    parser.add_argument(
+        "--freeze-backbone",
+        action="store_true",
+        help="With --clip-length, only train the temporal head",
+    )
+    parser.add_argument(
+        "--hard-examples",
+        help="Hard-example dataset root (see hard_examples.py) to fine-tune on",
+    )
+    parser.add_argument(
+        "--replay-fraction",
+        type=float,
+        default=0.2,
+        help="With --hard-examples, fraction of the original train split mixed in",
+    )
+    parser.add_argument(
+        "--init-weights",
+        help="Model weights (or checkpoint) to start from instead of ImageNet",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for shuffling and init")
+    parser.add_argument(
+        "--schedule", choices=SCHEDULES, default="constant", help="Learning rate schedule"
+    )
+    parser.add_argument(
+        "--val-fraction",
+        type=float,
+        default=0.1,
+        help="Fraction of the train split held out for validation (0 monitors the test split)",
+    )
+    parser.add_argument(
+        "--monitor",
+        choices=["val_accuracy", "val_loss"],
+        default="val_accuracy",
+        help="Validation metric for early stopping and reduce-on-plateau",
+    )
+    parser.add_argument(
+        "--patience",
+        type=int,
+        default=10,
+        help="Stop after N epochs without improvement (0 disables early stopping)",
+    )
+    parser.add_argument(
+        "--min-delta", type=float, default=0.0, help="Minimum improvement for patience"
+    )
+    parser.add_argument(
+        "--tta",
+        nargs="*",
+        choices=TTA_VIEWS,
+        default=None,
+        help="Use test-time augmentation for the final evaluation (defaults to all views)",
+    )
+    parser.add_argument(
+        "--nproc",
+        type=int,
+        default=1,
+        help="Number of local processes for DistributedDataParallel training (gloo)",
+    )
+    parser.add_argument(
+        "--threads-per-proc",
+        type=int,
+        default=None,
+        help="Torch threads per process (defaults to cpu_count / nproc)",
+    )
+    parser.add_argument("--master-port", default="29500", help="Rendezvous port")
+    parser.add_argument(
+        "--baseline-log",
+        help="Single-process training log to compute scaling efficiency against",
+    )
+    parser.add_argument(
+        "--checkpoint-dir", default="./checkpoints", help="Directory for checkpoints"
+    )
+    parser.add_argument(
+        "--checkpoint-every", type=int, default=1, help="Checkpoint every N epochs"
+    )
+    parser.add_argument(
+        "--checkpoint-every-batches",
+        type=int,
+        default=0,
+        help="Also checkpoint every N batches within an epoch (0 disables)",
+    )
+    parser.add_argument(
+        "--keep-last", type=int, default=3, help="Number of recent checkpoints to keep"
+    )
+    parser.add_argument(
+        "--keep-best", type=int, default=1, help="Number of best checkpoints to keep"
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="auto",
+        default=None,
+        help="Resume from a checkpoint path, or the latest one if no path is given",
+    )
 
-# Calculate total training time
-training_time = time.time() - start_time
-log_data["training_info"]["total_time_seconds"] = training_time
-log_data["training_info"]["completed_at"] = datetime.now().strftime("%Y%m%d_%H%M%S")
-print(f"Total training time: {training_time:.2f} seconds")
-
-# Save the final log
-save_log()
-
-# Save the final model (last epoch)
-final_model_path = f"resnet50v100_final_epoch{num_epochs}_{timestamp}.pth"
-torch.save(resnet50.state_dict(), final_model_path)
-log_data["training_info"]["final_model_path"] = final_model_path
-print(f"Final model saved successfully to {final_model_path}!")
-
-# Print summary of best model vs. final model
-print(f"Best model: {best_model_path} with accuracy: {best_accuracy:.2f}%")
-print(f"Final model: {final_model_path} with accuracy: {final_accuracy:.2f}%")
-
-# Record both models in the log
-log_data["training_info"]["model_comparison"] = {
-    "best_model": {
-        "path": best_model_path,
-        "accuracy": best_accuracy,
-        "epoch": next(
-            e["epoch"] for e in log_data["epochs"] if e.get("is_best_model", False)
-        ),
-    },
-    "final_model": {
-        "path": final_model_path,
-        "accuracy": final_accuracy,
-        "epoch": num_epochs,
-    },
-}
-
-# Save the final log one more time with the model paths
-save_log()
+    args = parser.parse_args()
+    if args.tta == []:
+        args.tta = TTA_VIEWS
+    if args.clip_length and args.contamination_prob > 0:
+        parser.error("--contamination-prob only applies to single-frame training")
+    if args.clip_length and args.hard_examples:
+        parser.error("--hard-examples only applies to single-frame training")
+
+    launched = env_rank_and_world_size()
+    if args.threads_per_proc is None:
+        local_procs = args.nproc
+        if launched is not None:
+            local_procs = int(os.environ.get("LOCAL_WORLD_SIZE", launched[1]))
+        args.threads_per_proc = max(1, (os.cpu_count() or 1) // local_procs)
+
+    if launched is not None:
+        # Launched by torchrun (possibly across several nodes)
+        rank, world_size = launched
+        init_distributed(rank, world_size)
+        train(args, rank=rank, world_size=world_size)
+    elif args.nproc > 1:
+        # Spawn the processes on this box
+        mp.spawn(distributed_worker, args=(args,), nprocs=args.nproc, join=True)
+    else:
+        train(args)
+
+
+if __name__ == "__main__":
+    main()
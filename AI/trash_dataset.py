@@ -1,11 +1,36 @@
 import os
-from torch.utils.data import Dataset, DataLoader
+import torch
+from torch.utils.data import Dataset, DataLoader, Sampler
 from torchvision import transforms
 from PIL import Image
 
 
+def load_image(img_path):
+    """Load an image as RGB, flattening any transparency onto white."""
+    # Load image and convert palette images with transparency to RGBA
+    image = Image.open(img_path)
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+
+    # Convert any RGBA images to RGB (if you don't need transparency)
+    if image.mode == "RGBA":
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])  # Use alpha channel as mask
+        image = background
+    else:
+        image = image.convert("RGB")
+    return image
+
+
 class BinaryClassificationDataset(Dataset):
-    def __init__(self, root_dir, split="train", transform=None):
+    def __init__(
+        self,
+        root_dir,
+        split="train",
+        transform=None,
+        contamination=None,
+        contamination_prob=0.0,
+    ):
         """
         Binary classification dataset that expects a directory structure:
         root_dir/
@@ -32,10 +57,16 @@ class BinaryClassificationDataset(Dataset):
             root_dir (str): Root directory of the dataset
             split (str): 'train' or 'test'
             transform: Optional transform to be applied to the images
+            contamination: Optional synthetic.OverlayAtlas used to turn clean
+                samples into contaminated ones at load time
+            contamination_prob (float): Probability that a clean (class 0)
+                sample is contaminated and relabelled as class 1
         """
         self.root_dir = root_dir
         self.split = split
         self.transform = transform
+        self.contamination = contamination
+        self.contamination_prob = contamination_prob
         self.class_dirs = ["0", "1"]
 
         self.image_paths = []
@@ -61,26 +92,153 @@ class BinaryClassificationDataset(Dataset):
         img_path = self.image_paths[idx]
         label = self.labels[idx]
 
-        # Load image and convert palette images with transparency to RGBA
-        image = Image.open(img_path)
-        if image.mode == "P" and "transparency" in image.info:
-            image = image.convert("RGBA")
-
-        # Convert any RGBA images to RGB (if you don't need transparency)
-        if image.mode == "RGBA":
-            background = Image.new("RGB", image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[3])  # Use alpha channel as mask
-            image = background
-        else:
-            image = image.convert("RGB")
+        image = load_image(img_path)
 
         # Apply transforms if any
         if self.transform:
             image = self.transform(image)
 
+        # Synthetic contamination of clean samples
+        if (
+            self.contamination is not None
+            and label == 0
+            and torch.rand(1).item() < self.contamination_prob
+        ):
+            image = self.contamination.apply(image)
+            label = 1
+
         return image, label
 
 
+class ClipDataset(Dataset):
+    def __init__(self, root_dir, split="train", transform=None, clip_length=8):
+        """
+        Multi-frame dataset of drop events. Every clip is a directory of
+        frames (sorted by file name) inside a class directory:
+        root_dir/
+            train/
+                0/
+                    clip_a/
+                        frame_0001.jpg
+                        ...
+                1/
+                    ...
+            test/
+                ...
+
+        Each sample is a (clip_length, C, H, W) tensor. Training takes a
+        random window of the clip; other splits take the centre window.
+        Clips shorter than clip_length repeat their last frame. The same
+        random transform is applied to every frame of a clip.
+
+        Args:
+            root_dir (str): Root directory of the dataset
+            split (str): 'train' or 'test'
+            transform: Optional transform to be applied to every frame
+            clip_length (int): Number of frames per sample
+        """
+        self.root_dir = root_dir
+        self.split = split
+        self.transform = transform
+        self.clip_length = clip_length
+        self.class_dirs = ["0", "1"]
+
+        self.clips = []
+        self.labels = []
+
+        split_dir = os.path.join(root_dir, split)
+        for class_idx, class_name in enumerate(self.class_dirs):
+            class_dir = os.path.join(split_dir, class_name)
+            if not os.path.exists(class_dir):
+                continue
+
+            for clip_name in sorted(os.listdir(class_dir)):
+                clip_dir = os.path.join(class_dir, clip_name)
+                if not os.path.isdir(clip_dir):
+                    continue
+                frames = sorted(
+                    os.path.join(clip_dir, name)
+                    for name in os.listdir(clip_dir)
+                    if name.lower().endswith((".png", ".jpg", ".jpeg"))
+                )
+                if frames:
+                    self.clips.append(frames)
+                    self.labels.append(class_idx)
+
+    def __len__(self):
+        return len(self.clips)
+
+    def __getitem__(self, idx):
+        frames = self.clips[idx]
+        label = self.labels[idx]
+
+        # Pick the window of frames
+        if len(frames) > self.clip_length:
+            if self.split == "train":
+                start = torch.randint(len(frames) - self.clip_length + 1, (1,)).item()
+            else:
+                start = (len(frames) - self.clip_length) // 2
+            frames = frames[start : start + self.clip_length]
+        frames = frames + [frames[-1]] * (self.clip_length - len(frames))
+
+        # Replay the same RNG state for every frame so random augmentations
+        # are consistent across the clip
+        rng_state = torch.get_rng_state()
+        images = []
+        for frame_path in frames:
+            image = load_image(frame_path)
+            if self.transform:
+                torch.set_rng_state(rng_state)
+                image = self.transform(image)
+            images.append(image)
+
+        return torch.stack(images), label
+
+
+class ResumableRandomSampler(Sampler):
+    def __init__(self, data_source, seed=0, num_replicas=1, rank=0):
+        """
+        Shuffling sampler whose order is a pure function of (seed, epoch), so
+        an interrupted epoch can be replayed exactly and resumed part-way
+        through by skipping the samples that were already consumed.
+
+        For distributed training every rank builds the same permutation and
+        takes every `num_replicas`-th sample starting at `rank` (padding by
+        wrapping around so all ranks see the same number of samples), like
+        torch's DistributedSampler.
+
+        Args:
+            data_source: Dataset to sample from
+            seed (int): Base seed for the per-epoch permutation
+            num_replicas (int): Number of distributed processes
+            rank (int): Rank of this process
+        """
+        self.data_source = data_source
+        self.seed = seed
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.num_samples = -(-len(data_source) // num_replicas)  # ceil
+        self.epoch = 0
+        self.start_index = 0
+
+    def set_epoch(self, epoch, start_index=0):
+        """Select the epoch permutation and the number of samples to skip."""
+        self.epoch = epoch
+        self.start_index = start_index
+
+    def __iter__(self):
+        generator = torch.Generator()
+        generator.manual_seed(self.seed + self.epoch)
+        order = torch.randperm(len(self.data_source), generator=generator).tolist()
+        total_size = self.num_samples * self.num_replicas
+        order += order[: total_size - len(order)]
+        order = order[self.rank : total_size : self.num_replicas]
+        return iter(order[self.start_index :])
+
+    def __len__(self):
+        return self.num_samples - self.start_index
+
+
 # Example usage:
 if __name__ == "__main__":
     # Define transformations
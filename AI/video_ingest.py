@@ -0,0 +1,244 @@
+import argparse
+import heapq
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import imageio_ffmpeg
+import numpy as np
+from PIL import Image
+
+from perceptual_hash import dhash, from_hex, hamming, to_hex
+
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv")
+
+
+def iter_frames(path, every=1):
+    """
+    Stream decoded RGB frames from a clip through ffmpeg, one at a time.
+    Yields (frame_index, time_seconds, HxWx3 uint8 array).
+    """
+    reader = imageio_ffmpeg.read_frames(path, pix_fmt="rgb24")
+    try:
+        meta = next(reader)
+        width, height = meta["size"]
+        fps = meta.get("fps") or 30.0
+        for index, raw in enumerate(reader):
+            if index % every:
+                continue
+            frame = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 3)
+            yield index, index / fps, frame
+    finally:
+        reader.close()
+
+
+def analysis_gray(frame, width=160):
+    """Small float grayscale copy used for the motion and sharpness scores."""
+    image = Image.fromarray(frame).convert("L")
+    height = max(1, round(image.height * width / image.width))
+    return np.asarray(image.resize((width, height), Image.BILINEAR), dtype=np.float32)
+
+
+def sharpness(gray):
+    """Variance of the Laplacian: low for blurred frames."""
+    laplacian = (
+        gray[:-2, 1:-1]
+        + gray[2:, 1:-1]
+        + gray[1:-1, :-2]
+        + gray[1:-1, 2:]
+        - 4 * gray[1:-1, 1:-1]
+    )
+    return float(laplacian.var())
+
+
+def select_frames(
+    path, top_k=20, every=2, min_motion=2.0, min_sharpness=50.0, max_distance=6
+):
+    """
+    Pick the most informative frames of a clip in a single streaming pass.
+
+    A frame is a candidate when it moved enough relative to the previous
+    analysed frame (mean absolute difference, i.e. splash motion) and is
+    sharp enough. Only the best `top_k` candidates are kept, JPEG-encoded,
+    in a bounded heap, and candidates within `max_distance` bits (dHash) of
+    a kept frame only replace it if they score higher. Memory is therefore
+    bounded by top_k frames regardless of clip length.
+    """
+    heap = []  # (score, frame_index, record, jpeg_bytes)
+    previous = None
+    for index, seconds, frame in iter_frames(path, every):
+        gray = analysis_gray(frame)
+        motion = 0.0 if previous is None else float(np.abs(gray - previous).mean())
+        previous = gray
+        if motion < min_motion:
+            continue
+        sharp = sharpness(gray)
+        if sharp < min_sharpness:
+            continue
+
+        score = motion * np.log1p(sharp)
+        if len(heap) >= top_k and score <= heap[0][0]:
+            continue
+
+        frame_hash = dhash(frame)
+        duplicate = next(
+            (
+                i
+                for i, item in enumerate(heap)
+                if hamming(item[2]["phash"], frame_hash) <= max_distance
+            ),
+            None,
+        )
+        if duplicate is not None:
+            if heap[duplicate][0] >= score:
+                continue
+            heap.pop(duplicate)
+            heapq.heapify(heap)
+
+        buffer = io.BytesIO()
+        Image.fromarray(frame).save(buffer, format="JPEG", quality=92)
+        record = {
+            "frame": index,
+            "time": seconds,
+            "motion": motion,
+            "sharpness": sharp,
+            "phash": frame_hash,
+        }
+        item = (score, index, record, buffer.getvalue())
+        if len(heap) < top_k:
+            heapq.heappush(heap, item)
+        else:
+            heapq.heapreplace(heap, item)
+
+    return sorted(heap, key=lambda item: item[1])
+
+
+def ingest_clip(job):
+    """Worker: select the frames of one clip and write them as JPEGs."""
+    path, label, output_dir, options = job
+    stem = os.path.splitext(os.path.basename(path))[0]
+    os.makedirs(output_dir, exist_ok=True)
+
+    records = []
+    for score, index, record, jpeg in select_frames(path, **options):
+        image_path = os.path.join(output_dir, f"clip_{stem}_f{index:06d}.jpg")
+        with open(image_path, "wb") as f:
+            f.write(jpeg)
+        record.update({"path": image_path, "label": label, "source": path, "score": score})
+        records.append(record)
+    return path, records
+
+
+def read_manifest_hashes(manifest_path):
+    hashes = []
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            for line in f:
+                if line.strip():
+                    hashes.append(from_hex(json.loads(line)["phash"]))
+    return hashes
+
+
+def find_clips(input_path, label):
+    """
+    Return [(clip_path, label)]. A directory with 0/ and 1/ subdirectories
+    takes its labels from them; otherwise every clip gets `label`.
+    """
+    if os.path.isfile(input_path):
+        return [(input_path, label)]
+    clips = []
+    for class_name in ["0", "1"]:
+        class_dir = os.path.join(input_path, class_name)
+        if os.path.isdir(class_dir):
+            clips += [
+                (os.path.join(class_dir, name), int(class_name))
+                for name in sorted(os.listdir(class_dir))
+                if name.lower().endswith(VIDEO_EXTENSIONS)
+            ]
+    if not clips:
+        clips = [
+            (os.path.join(input_path, name), label)
+            for name in sorted(os.listdir(input_path))
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        ]
+    if any(l is None for _, l in clips):
+        raise ValueError("Clips without a 0/ or 1/ directory need --label")
+    return clips
+
+
+def ingest(
+    input_path, data_dir="./data", split="train", label=None, workers=None, **options
+):
+    """
+    Ingest clips into the dataset layout (<data_dir>/<split>/<label>/) in
+    parallel across clips, and append the accepted frames to
+    <data_dir>/manifest.jsonl. Frames that are near-duplicates of anything
+    already in the manifest are dropped.
+    """
+    clips = find_clips(input_path, label)
+    manifest_path = os.path.join(data_dir, "manifest.jsonl")
+    known_hashes = read_manifest_hashes(manifest_path)
+    max_distance = options.get("max_distance", 6)
+
+    jobs = [
+        (path, clip_label, os.path.join(data_dir, split, str(clip_label)), options)
+        for path, clip_label in clips
+    ]
+    accepted = 0
+    os.makedirs(data_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(
+        manifest_path, "a"
+    ) as manifest:
+        for path, records in pool.map(ingest_clip, jobs):
+            kept = 0
+            for record in records:
+                # Cross-clip / cross-run de-duplication
+                if any(hamming(record["phash"], h) <= max_distance for h in known_hashes):
+                    os.remove(record["path"])
+                    continue
+                known_hashes.append(record["phash"])
+                record["phash"] = to_hex(record["phash"])
+                record["split"] = split
+                manifest.write(json.dumps(record) + "\n")
+                kept += 1
+            manifest.flush()
+            accepted += kept
+            print(f"{path}: kept {kept} of {len(records)} selected frames")
+    return accepted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extract informative training frames from tilting-disk clips"
+    )
+    parser.add_argument(
+        "input", help="Clip file, or directory of clips (optionally in 0/ and 1/)"
+    )
+    parser.add_argument("--data-dir", default="./data", help="Dataset root directory")
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--label", type=int, choices=[0, 1], help="Label for unsorted clips")
+    parser.add_argument("--top-k", type=int, default=20, help="Frames kept per clip")
+    parser.add_argument("--every", type=int, default=2, help="Analyse every Nth frame")
+    parser.add_argument("--min-motion", type=float, default=2.0)
+    parser.add_argument("--min-sharpness", type=float, default=50.0)
+    parser.add_argument(
+        "--max-distance", type=int, default=6, help="dHash distance treated as duplicate"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Parallel clips")
+    args = parser.parse_args()
+
+    accepted = ingest(
+        args.input,
+        args.data_dir,
+        args.split,
+        args.label,
+        args.workers,
+        top_k=args.top_k,
+        every=args.every,
+        min_motion=args.min_motion,
+        min_sharpness=args.min_sharpness,
+        max_distance=args.max_distance,
+    )
+    print(f"Added {accepted} frames to {os.path.join(args.data_dir, 'manifest.jsonl')}")
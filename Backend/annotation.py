@@ -0,0 +1,119 @@
+import io
+import os
+import re
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+# Annotated result names carry their verdict, so the image can be rendered
+# on first request (even after a restart) from the saved upload alone
+ANNOTATED_NAME = re.compile(
+    r"result_(?P<id>[0-9a-f-]{36})_c(?P<label>[01])_p(?P<probability>[01]\.\d{4})\.jpg"
+)
+
+# (scale, cv2 flag) for decoding JPEGs at a reduced size (libjpeg DCT scaling)
+REDUCED_DECODES = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def annotated_name(request_id, prediction, probability):
+    return f"result_{request_id}_c{int(prediction)}_p{probability:.4f}.jpg"
+
+
+def source_name(request_id):
+    """The saved upload an annotated result is rendered from."""
+    return f"debug_original_{request_id}.jpg"
+
+
+class Annotator:
+    def __init__(self, root, max_side=640, quality=85):
+        """
+        Renders the verdict label onto a result image. The upload is decoded
+        by OpenCV straight into BGR, at a reduced scale when the frame is
+        much larger than max_side, so there is no PIL -> numpy -> BGR
+        conversion and no full-resolution copy. Frames still larger than
+        max_side are resized into a per-thread buffer that is reused while
+        the output shape stays the same.
+
+        Args:
+            root (str): Result image directory holding the uploads
+            max_side (int): Longest side of the annotated image
+            quality (int): JPEG quality of the annotated image
+        """
+        self.root = root
+        self.max_side = max_side
+        self.quality = quality
+        self.local = threading.local()
+
+    def _decode(self, content):
+        # The header gives the size without decoding any pixels
+        width, height = Image.open(io.BytesIO(content)).size
+        flag = cv2.IMREAD_COLOR
+        for scale, reduced_flag in REDUCED_DECODES:
+            if max(width, height) // scale >= self.max_side:
+                flag = reduced_flag
+                break
+        image = cv2.imdecode(np.frombuffer(content, np.uint8), flag)
+        if image is None:
+            raise ValueError("Could not decode image")
+
+        height, width = image.shape[:2]
+        if max(height, width) <= self.max_side:
+            return image
+        scale = self.max_side / max(height, width)
+        shape = (round(height * scale), round(width * scale), 3)
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None or buffer.shape != shape:
+            buffer = self.local.buffer = np.empty(shape, np.uint8)
+        cv2.resize(
+            image, (shape[1], shape[0]), dst=buffer, interpolation=cv2.INTER_AREA
+        )
+        return buffer
+
+    def render(self, content, prediction, probability):
+        """JPEG bytes (numpy buffer) of the annotated, downscaled upload."""
+        image = self._decode(content)
+        font_scale = max(image.shape[1] / 640, 0.4)
+        cv2.putText(
+            image,
+            f"Predicted: Class {int(prediction)} ({probability:.2f})",
+            (10, int(30 * font_scale)),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            font_scale,
+            (0, 255, 0),  # green in BGR
+            max(1, round(2 * font_scale)),
+        )
+        ok, encoded = cv2.imencode(
+            ".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        )
+        if not ok:
+            raise ValueError("Could not encode annotated image")
+        return encoded
+
+    def render_file(self, content, prediction, probability, path):
+        encoded = self.render(content, prediction, probability)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        encoded.tofile(temp_path)
+        os.replace(temp_path, path)
+        return path
+
+    def generate(self, name, path):
+        """
+        ResultStore hook: render a missing annotated result from its upload.
+        Returns False for names that are not annotated results.
+        """
+        match = ANNOTATED_NAME.fullmatch(name)
+        if match is None:
+            return False
+        with open(os.path.join(self.root, source_name(match["id"])), "rb") as f:
+            content = f.read()
+        self.render_file(
+            content, int(match["label"]), float(match["probability"]), path
+        )
+        return True
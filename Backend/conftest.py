@@ -0,0 +1,2 @@
+# load_test.py is a load-testing script, not a test module
+collect_ignore = ["load_test.py"]
@@ -0,0 +1,278 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+HOUR = 3600
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS events ("
+    "id INTEGER PRIMARY KEY, ts REAL NOT NULL, bin_id TEXT NOT NULL, "
+    "endpoint TEXT, model TEXT, model_version TEXT, probability REAL, "
+    "prediction INTEGER, latency_ms REAL, thumbnail TEXT)",
+    "CREATE INDEX IF NOT EXISTS events_ts ON events (ts)",
+    "CREATE INDEX IF NOT EXISTS events_bin_ts ON events (bin_id, ts)",
+    # Hourly per-bin counts maintained on flush, so long ranges never touch
+    # the raw events
+    "CREATE TABLE IF NOT EXISTS hourly ("
+    "hour INTEGER NOT NULL, bin_id TEXT NOT NULL, model TEXT NOT NULL, "
+    "events INTEGER NOT NULL, contaminated INTEGER NOT NULL, "
+    "probability_sum REAL NOT NULL, latency_ms_sum REAL NOT NULL, "
+    "PRIMARY KEY (hour, bin_id, model))",
+    "CREATE INDEX IF NOT EXISTS hourly_bin ON hourly (bin_id, hour)",
+)
+
+COLUMNS = (
+    "ts",
+    "bin_id",
+    "endpoint",
+    "model",
+    "model_version",
+    "probability",
+    "prediction",
+    "latency_ms",
+    "thumbnail",
+)
+
+# Column expression of each aggregate() grouping
+GROUP_COLUMNS = {"bin": "bin_id", "model": "COALESCE(model, '')", "all": "''"}
+
+
+class PredictionEventStore:
+    def __init__(self, db_path, flush_size=500, flush_interval=1.0, max_buffer=50000):
+        """
+        Append-only history of every verdict for auditing contamination
+        rates per bin. record() only appends to an in-memory buffer; a
+        background thread writes the buffer to SQLite in one transaction
+        every flush_interval seconds (or as soon as flush_size events are
+        waiting) and updates an hourly per-bin rollup in the same
+        transaction. If the disk falls behind, the oldest buffered events
+        beyond max_buffer are dropped and counted. A failed write is counted
+        and its events go back to the front of the buffer for the next flush.
+
+        Args:
+            db_path (str): SQLite file of the store
+            flush_size (int): Buffered events that trigger an early flush
+            flush_interval (float): Seconds between flushes
+            max_buffer (int): Buffered events kept while the disk is behind
+        """
+        self.db_path = db_path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last_error = None
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self.db.execute(statement)
+        self.db.commit()
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def record(
+        self,
+        bin_id,
+        probability,
+        prediction,
+        latency,
+        model=None,
+        model_version=None,
+        endpoint=None,
+        thumbnail=None,
+        timestamp=None,
+    ):
+        """Buffer one verdict; latency is in seconds."""
+        event = (
+            timestamp if timestamp is not None else time.time(),
+            str(bin_id),
+            endpoint,
+            model,
+            model_version,
+            float(probability),
+            int(prediction),
+            1000 * latency,
+            thumbnail,
+        )
+        with self.lock:
+            self.buffer.append(event)
+            self._trim()
+            if len(self.buffer) >= self.flush_size:
+                self.wakeup.set()
+
+    def _trim(self):
+        # Caller holds self.lock
+        overflow = len(self.buffer) - self.max_buffer
+        if overflow > 0:
+            del self.buffer[:overflow]
+            self.dropped += overflow
+
+    def _run(self):
+        while not self.closed:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            events, self.buffer = self.buffer, []
+        if not events:
+            return 0
+
+        rollup = {}
+        for event in events:
+            key = (int(event[0] // HOUR) * HOUR, event[1], event[3] or "")
+            row = rollup.setdefault(key, [0, 0, 0.0, 0.0])
+            row[0] += 1
+            row[1] += event[6]
+            row[2] += event[5]
+            row[3] += event[7]
+
+        try:
+            self._write(events, rollup)
+        except Exception as error:
+            # Keep the events (oldest first) and retry on the next flush
+            self.errors += 1
+            self.last_error = repr(error)
+            with self.lock:
+                self.buffer[:0] = events
+                self._trim()
+            return 0
+        self.written += len(events)
+        self.flushes += 1
+        return len(events)
+
+    def _write(self, events, rollup):
+        with self.db_lock:
+            with self.db:
+                self.db.executemany(
+                    "INSERT INTO events (%s) VALUES (%s)"
+                    % (", ".join(COLUMNS), ", ".join("?" * len(COLUMNS))),
+                    events,
+                )
+                self.db.executemany(
+                    "INSERT INTO hourly VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (hour, bin_id, model) DO UPDATE SET "
+                    "events = events + excluded.events, "
+                    "contaminated = contaminated + excluded.contaminated, "
+                    "probability_sum = probability_sum + excluded.probability_sum, "
+                    "latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum",
+                    [(*key, *row) for key, row in rollup.items()],
+                )
+
+    def events(self, start, end, bin_id=None, limit=100):
+        """Raw events in [start, end), newest first (uses the ts indexes)."""
+        query = "SELECT %s FROM events WHERE ts >= ? AND ts < ?" % ", ".join(COLUMNS)
+        params = [start, end]
+        if bin_id is not None:
+            query += " AND bin_id = ?"
+            params.append(bin_id)
+        query += " ORDER BY ts DESC LIMIT ?"
+        params.append(limit)
+        with self.db_lock:
+            rows = self.db.execute(query, params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def _sums(self, table, start, end, bin_id, group_by):
+        """Per-group (events, contaminated, probability sum, latency sum)."""
+        if table == "hourly":
+            time_column = "hour"
+            counts = (
+                "SUM(events), SUM(contaminated), SUM(probability_sum), "
+                "SUM(latency_ms_sum)"
+            )
+        else:
+            time_column = "ts"
+            counts = "COUNT(*), SUM(prediction), SUM(probability), SUM(latency_ms)"
+        group = GROUP_COLUMNS[group_by]
+        query = (
+            f"SELECT {group}, {counts} FROM {table} "
+            f"WHERE {time_column} >= ? AND {time_column} < ?"
+        )
+        params = [start, end]
+        if bin_id is not None:
+            query += " AND bin_id = ?"
+            params.append(bin_id)
+        query += f" GROUP BY {group}"
+        with self.db_lock:
+            return self.db.execute(query, params).fetchall()
+
+    def aggregate(self, start, end, bin_id=None, group_by="bin"):
+        """
+        Contamination rate, mean probability and mean latency in [start, end)
+        grouped by "bin", "model" or "all". Whole hours are read from the
+        hourly rollup; only the partial hours at either end of the range
+        touch raw events, through the ts index.
+        """
+        first_hour = -(-start // HOUR) * HOUR  # first hour boundary >= start
+        last_hour = end // HOUR * HOUR
+        if first_hour < last_hour:
+            parts = [
+                ("hourly", first_hour, last_hour),
+                ("events", start, first_hour),
+                ("events", last_hour, end),
+            ]
+        else:
+            parts = [("events", start, end)]
+
+        totals = {}
+        for table, part_start, part_end in parts:
+            if part_start >= part_end:
+                continue
+            for key, *sums in self._sums(table, part_start, part_end, bin_id, group_by):
+                row = totals.setdefault(key, [0, 0, 0.0, 0.0])
+                for i, value in enumerate(sums):
+                    row[i] += value or 0
+
+        groups = []
+        for key, (events, contaminated, probability_sum, latency_sum) in sorted(
+            totals.items(), key=lambda item: str(item[0])
+        ):
+            groups.append(
+                {
+                    group_by: key,
+                    "events": events,
+                    "contaminated": contaminated,
+                    "contamination_rate": contaminated / events if events else 0.0,
+                    "mean_probability": probability_sum / events if events else 0.0,
+                    "mean_latency_ms": latency_sum / events if events else 0.0,
+                }
+            )
+        return groups
+
+    def stats(self):
+        with self.lock:
+            buffered = len(self.buffer)
+        return {
+            "buffered": buffered,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+        self.thread.join()
+        self.flush()
+        with self.lock:
+            # Whatever a failed final flush left behind is lost
+            self.dropped += len(self.buffer)
+            self.buffer = []
+        with self.db_lock:
+            self.db.close()
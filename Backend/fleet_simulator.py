@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+import requests
+import websockets
+
+from load_test import find_images, percentile, start_server
+
+
+backend_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+class SimulatedBin:
+    def __init__(self, bin_id, fps):
+        self.bin_id = bin_id
+        self.fps = fps
+        self.sent = {}  # frameId -> send time
+        self.latencies = []
+        self.outcomes = {"ok": 0, "rate_limited": 0, "dropped": 0, "error": 0}
+
+    def summary(self, duration):
+        latencies = sorted(1000 * latency for latency in self.latencies)
+        answered = sum(self.outcomes.values())
+        return {
+            "bin_id": self.bin_id,
+            "fps": self.fps,
+            "sent": answered + len(self.sent),
+            "unanswered": len(self.sent),
+            **self.outcomes,
+            "throughput": self.outcomes["ok"] / duration,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+
+
+async def send_frames(ws, send_lock, sim_bin, frames, duration):
+    """Frames of one bin every 1/fps seconds, without waiting for replies."""
+    interval = 1.0 / sim_bin.fps
+    start = time.perf_counter()
+    next_at = start + random.random() * interval
+    frame_id = 0
+    while next_at - start < duration:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        payload = {
+            "binId": sim_bin.bin_id,
+            "frameId": frame_id,
+            "image": frames[frame_id % len(frames)],
+        }
+        sim_bin.sent[frame_id] = time.perf_counter()
+        async with send_lock:
+            await ws.send(json.dumps(payload))
+        frame_id += 1
+        next_at += interval
+
+
+async def read_replies(ws, bins_by_id):
+    async for raw in ws:
+        reply = json.loads(raw)
+        sim_bin = bins_by_id.get(reply.get("binId"))
+        if sim_bin is None:
+            continue
+        sent = sim_bin.sent.pop(reply.get("frameId"), None)
+        error = reply.get("error")
+        if error is None:
+            sim_bin.outcomes["ok"] += 1
+            if sent is not None:
+                sim_bin.latencies.append(time.perf_counter() - sent)
+        elif error in ("rate_limited", "dropped"):
+            sim_bin.outcomes[error] += 1
+        else:
+            sim_bin.outcomes["error"] += 1
+
+
+async def simulate_connection(url, conn_bins, frames, args):
+    """One gateway connection multiplexing the frames of `conn_bins`."""
+    async with websockets.connect(url, max_size=None) as ws:
+        send_lock = asyncio.Lock()
+        reader = asyncio.create_task(
+            read_replies(ws, {b.bin_id: b for b in conn_bins})
+        )
+        await asyncio.gather(
+            *(send_frames(ws, send_lock, b, frames, args.duration) for b in conn_bins)
+        )
+        # Let the last batches come back before closing
+        deadline = time.perf_counter() + args.drain
+        while any(b.sent for b in conn_bins) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        reader.cancel()
+
+
+def jain_index(values):
+    """Jain's fairness index: 1.0 when every value is equal, 1/n at worst."""
+    if not values or not any(values):
+        return None
+    return sum(values) ** 2 / (len(values) * sum(v * v for v in values))
+
+
+async def run(args, url, frames):
+    ws_url = url.replace("http", "ws", 1) + "/fleet"
+    bins = [
+        SimulatedBin(
+            f"bin-{i:04d}", args.noisy_fps if i < args.noisy_bins else args.fps
+        )
+        for i in range(args.bins)
+    ]
+    connections = [
+        bins[i : i + args.bins_per_connection]
+        for i in range(0, len(bins), args.bins_per_connection)
+    ]
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(simulate_connection(ws_url, c, frames, args) for c in connections),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+    failed = [o for o in outcomes if isinstance(o, Exception)]
+    if failed:
+        print(f"{len(failed)} of {len(connections)} connections failed: {failed[0]!r}")
+    return [b.summary(elapsed) for b in bins]
+
+
+def summarize(per_bin, noisy_bins):
+    quiet = per_bin[noisy_bins:]
+    noisy = per_bin[:noisy_bins]
+
+    def group(rows):
+        if not rows:
+            return None
+        p95 = sorted(r["p95_ms"] for r in rows if r["p95_ms"] is not None)
+        sent = sum(r["sent"] for r in rows)
+        return {
+            "bins": len(rows),
+            "sent": sent,
+            "ok": sum(r["ok"] for r in rows),
+            "ok_rate": sum(r["ok"] for r in rows) / sent if sent else 0.0,
+            "rate_limited": sum(r["rate_limited"] for r in rows),
+            "dropped": sum(r["dropped"] for r in rows),
+            "errors": sum(r["error"] for r in rows),
+            "unanswered": sum(r["unanswered"] for r in rows),
+            "throughput": sum(r["throughput"] for r in rows),
+            "median_p95_ms": percentile(p95, 50),
+            "worst_p95_ms": p95[-1] if p95 else None,
+        }
+
+    return {
+        "quiet": group(quiet),
+        "noisy": group(noisy),
+        # Share of each quiet bin's frames that got a prediction
+        "quiet_fairness": jain_index(
+            [r["ok"] / r["sent"] for r in quiet if r["sent"]]
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate a neighborhood of bins streaming to the /fleet gateway"
+    )
+    parser.add_argument(
+        "--url", help="Running backend (default: start a local uvicorn instance)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8766, help="Port of the local server"
+    )
+    parser.add_argument(
+        "--image-dir",
+        default=os.path.join(backend_dir, "..", "AI", "data", "test"),
+        help="Images to replay",
+    )
+    parser.add_argument("--max-images", type=int, default=50)
+    parser.add_argument("--bins", type=int, default=200, help="Simulated bins")
+    parser.add_argument(
+        "--bins-per-connection",
+        type=int,
+        default=1,
+        help="Bins multiplexed over each WebSocket connection",
+    )
+    parser.add_argument("--fps", type=float, default=1.0, help="Frames/s per bin")
+    parser.add_argument(
+        "--noisy-bins", type=int, default=1, help="Bins sending at --noisy-fps"
+    )
+    parser.add_argument("--noisy-fps", type=float, default=50.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument(
+        "--drain", type=float, default=10.0, help="Seconds to wait for late replies"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Results file (default ./loadtests/...)")
+    args = parser.parse_args()
+    if args.noisy_bins > args.bins:
+        parser.error("--noisy-bins cannot exceed --bins")
+
+    random.seed(args.seed)
+    images = find_images(args.image_dir, args.max_images)
+    if not images:
+        parser.error(f"No images found in {args.image_dir}")
+    frames = [base64.b64encode(data).decode("ascii") for _, data in images]
+
+    process = None
+    url = (args.url or "").rstrip("/")
+    if not url:
+        process, url = start_server(args.port)
+    try:
+        per_bin = asyncio.run(run(args, url, frames))
+        gateway = requests.get(url + "/fleet-stats", timeout=10).json()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    summary = summarize(per_bin, args.noisy_bins)
+    for name in ("quiet", "noisy"):
+        group = summary[name]
+        if group is None:
+            continue
+        print(
+            f"{name:>5} bins {group['bins']:4d}: {group['throughput']:7.2f} frames/s, "
+            f"ok {group['ok_rate']:.1%}, rate limited {group['rate_limited']}, "
+            f"dropped {group['dropped']}, median p95 "
+            f"{group['median_p95_ms'] or 0:.1f} ms, worst p95 "
+            f"{group['worst_p95_ms'] or 0:.1f} ms"
+        )
+    if summary["quiet_fairness"] is not None:
+        print(f"Fairness across quiet bins (Jain): {summary['quiet_fairness']:.3f}")
+    print(f"Mean batch size: {gateway.get('mean_batch_size', 0):.1f}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = args.output or os.path.join("loadtests", f"fleet_{timestamp}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "meta": {**vars(args), "timestamp": timestamp, "url": url},
+                "summary": summary,
+                "gateway": gateway,
+                "bins": per_bin,
+            },
+            f,
+            indent=4,
+        )
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
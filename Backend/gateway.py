@@ -0,0 +1,206 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RateLimited(Exception):
+    pass
+
+
+class FrameDropped(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        """Allows `rate` events per second on average, bursts of `burst`."""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def allow(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class _Frame:
+    __slots__ = ("bin_id", "payload", "future", "queued_at")
+
+    def __init__(self, bin_id, payload, future):
+        self.bin_id = bin_id
+        self.payload = payload
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+class FleetScheduler:
+    def __init__(
+        self,
+        infer_batch,
+        max_batch=16,
+        max_wait=0.01,
+        queue_per_bin=4,
+        rate=10.0,
+        burst=20,
+        workers=1,
+    ):
+        """
+        Shared, batched inference queue for many bins on one asyncio loop.
+
+        Every bin has a token bucket (rate limit) and a small queue of its
+        own; when the queue is full the oldest frame is dropped, since a
+        camera's latest frame matters most. Batches are filled round-robin,
+        one frame per bin per round, so a noisy bin only ever competes for
+        its fair share of a batch. infer_batch(payloads) runs in a thread
+        pool and returns one result per payload (or an Exception instance).
+
+        Args:
+            infer_batch: Blocking batch inference function
+            max_batch (int): Frames per inference batch
+            max_wait (float): Seconds to wait for a batch to fill
+            queue_per_bin (int): Frames queued per bin before dropping
+            rate (float): Frames per second allowed per bin
+            burst (int): Token bucket size per bin
+            workers (int): Batches in flight at once
+        """
+        self.infer_batch = infer_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue_per_bin = queue_per_bin
+        self.rate = rate
+        self.burst = burst
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.queues = {}  # bin_id -> deque of _Frame
+        self.buckets = {}  # bin_id -> TokenBucket
+        self.active = deque()  # bins with queued frames, in round-robin order
+        self.forgotten = set()  # disconnected bins whose frames are still queued
+        self.queued = 0
+        self.wakeup = asyncio.Event()
+        self.tasks = []
+        self.stats = {
+            "frames": 0,
+            "rate_limited": 0,
+            "dropped": 0,
+            "batches": 0,
+            "batched_frames": 0,
+        }
+
+    def start(self):
+        self.tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.executor.shutdown(wait=False)
+
+    def submit(self, bin_id, payload):
+        """
+        Queue a frame of a bin. Returns a future with its result; raises
+        RateLimited when the bin is over its rate. A future whose frame was
+        pushed out of a full bin queue fails with FrameDropped.
+        """
+        self.stats["frames"] += 1
+        self.forgotten.discard(bin_id)
+        bucket = self.buckets.get(bin_id)
+        if bucket is None:
+            bucket = self.buckets[bin_id] = TokenBucket(self.rate, self.burst)
+        if not bucket.allow():
+            self.stats["rate_limited"] += 1
+            raise RateLimited(bin_id)
+
+        queue = self.queues.get(bin_id)
+        if queue is None:
+            queue = self.queues[bin_id] = deque()
+        if not queue:
+            self.active.append(bin_id)
+        elif len(queue) >= self.queue_per_bin:
+            stale = queue.popleft()
+            self.queued -= 1
+            self.stats["dropped"] += 1
+            stale.future.set_exception(FrameDropped(bin_id))
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append(_Frame(bin_id, payload, future))
+        self.queued += 1
+        self.wakeup.set()
+        return future
+
+    def forget(self, bin_id):
+        """Release the state of a disconnected bin."""
+        if self.queues.get(bin_id):
+            # Frames still pending; released once they drain (_take_batch)
+            self.forgotten.add(bin_id)
+            return
+        self._release(bin_id)
+
+    def _release(self, bin_id):
+        self.forgotten.discard(bin_id)
+        self.queues.pop(bin_id, None)
+        self.buckets.pop(bin_id, None)
+
+    def _take_batch(self):
+        batch = []
+        while self.active and len(batch) < self.max_batch:
+            bin_id = self.active.popleft()
+            queue = self.queues[bin_id]
+            frame = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self.active.append(bin_id)
+            elif bin_id in self.forgotten:
+                self._release(bin_id)
+            # Skip frames whose connection went away while they were queued
+            if not frame.future.done():
+                batch.append(frame)
+        return batch
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.wakeup.wait()
+            if self.queued < self.max_batch:
+                # Give concurrent bins a moment to fill the batch
+                await asyncio.sleep(self.max_wait)
+            batch = self._take_batch()
+            if not self.queued:
+                self.wakeup.clear()
+            if not batch:
+                continue
+
+            self.stats["batches"] += 1
+            self.stats["batched_frames"] += len(batch)
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.infer_batch, [f.payload for f in batch]
+                )
+            except Exception as e:
+                results = [e] * len(batch)
+            for frame, result in zip(batch, results):
+                if frame.future.done():
+                    continue
+                if isinstance(result, Exception):
+                    frame.future.set_exception(result)
+                else:
+                    frame.future.set_result(result)
+
+    def summary(self):
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "bins": len(self.buckets),
+            "queued": self.queued,
+            "mean_batch_size": (
+                self.stats["batched_frames"] / batches if batches else 0.0
+            ),
+        }
@@ -0,0 +1,344 @@
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+import websockets
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+backend_dir = os.path.dirname(os.path.realpath(__file__))
+_local = threading.local()
+
+
+def find_images(image_dir, limit=None):
+    paths = glob.glob(os.path.join(image_dir, "**", "*"), recursive=True)
+    paths = sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+    images = []
+    for path in paths[:limit]:
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), f.read()))
+    return images
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def summarize(records, duration, **fields):
+    """Latency percentiles, error rate and throughput of a list of (latency, ok)."""
+    latencies = sorted(1000 * latency for latency, ok in records if ok)
+    errors = sum(1 for _, ok in records if not ok)
+    summary = dict(fields)
+    summary.update(
+        {
+            "requests": len(records),
+            "errors": errors,
+            "error_rate": errors / len(records) if records else 0.0,
+            "throughput": len(latencies) / duration,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": latencies[-1] if latencies else None,
+        }
+    )
+    return summary
+
+
+def start_server(port):
+    """Start the backend under uvicorn and wait until it answers."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        cwd=backend_dir,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            requests.get(url + "/", timeout=1)
+            return process, url
+        except requests.ConnectionError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Timed out waiting for uvicorn")
+
+
+def send_request(url, endpoint, files, scheduled, timeout):
+    """
+    POST one request from a worker thread. Latency is measured from the
+    scheduled arrival time, so queueing behind a saturated server counts
+    (no coordinated omission).
+    """
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    field = "file" if endpoint == "/predict" else "files"
+    try:
+        response = _local.session.post(
+            url + endpoint,
+            files=[(field, (name, content, "image/jpeg")) for name, content in files],
+            timeout=timeout,
+        )
+        ok = response.status_code == 200
+    except requests.RequestException:
+        ok = False
+    return time.perf_counter() - scheduled, ok
+
+
+async def http_step(url, endpoint, images, rate, duration, args, rng):
+    """Open-loop Poisson arrivals at `rate` requests/s for `duration` seconds."""
+    loop = asyncio.get_running_loop()
+    files_per_request = 1 if endpoint == "/predict" else args.batch_files
+    pending = []
+    with ThreadPoolExecutor(max_workers=args.max_inflight) as executor:
+        start = time.perf_counter()
+        scheduled = start
+        index = 0
+        while True:
+            scheduled += rng.expovariate(rate)
+            if scheduled - start >= duration:
+                break
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            files = [
+                images[(index + i) % len(images)] for i in range(files_per_request)
+            ]
+            index += files_per_request
+            pending.append(
+                loop.run_in_executor(
+                    executor,
+                    send_request,
+                    url,
+                    endpoint,
+                    files,
+                    scheduled,
+                    args.timeout,
+                )
+            )
+        records = await asyncio.gather(*pending)
+        elapsed = time.perf_counter() - start
+    return summarize(records, elapsed, endpoint=endpoint, offered_rate=rate)
+
+
+async def ws_stream(url, frames, stream, fps, duration, timeout, records, stats):
+    """
+    One camera-like stream: a frame every 1/fps seconds, waiting for each
+    reply. Frames that fall due while a reply is outstanding are dropped,
+    like a camera that only keeps the latest frame.
+    """
+    interval = 1.0 / fps
+    async with websockets.connect(url, max_size=None) as ws:
+        start = time.perf_counter()
+        next_at = start + random.random() * interval
+        index = stream
+        while next_at - start < duration:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            sent = time.perf_counter()
+            payload = {"image": frames[index % len(frames)], "binId": f"load-{stream}"}
+            index += 1
+            try:
+                await ws.send(json.dumps(payload))
+                reply = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+                ok = "error" not in reply
+                stats["cached"] += bool(reply.get("cached"))
+            except (asyncio.TimeoutError, websockets.ConnectionClosed):
+                records.append((time.perf_counter() - sent, False))
+                return
+            records.append((time.perf_counter() - sent, ok))
+
+            next_at += interval
+            now = time.perf_counter()
+            if now > next_at:
+                missed = int((now - next_at) / interval) + 1
+                stats["dropped"] += missed
+                next_at += missed * interval
+
+
+async def ws_step(url, frames, streams, args):
+    records = []
+    stats = {"dropped": 0, "cached": 0}
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            ws_stream(
+                url, frames, i, args.fps, args.duration, args.timeout, records, stats
+            )
+            for i in range(streams)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    summary = summarize(records, elapsed, endpoint="/ws", streams=streams, fps=args.fps)
+    summary["offered_rate"] = streams * args.fps
+    summary["dropped_frames"] = stats["dropped"]
+    summary["cached_replies"] = stats["cached"]
+    return summary
+
+
+def print_summary(summary):
+    load = (
+        f"{summary['streams']} streams"
+        if "streams" in summary
+        else f"{summary['offered_rate']:.1f} req/s"
+    )
+    p50, p99 = summary["p50_ms"], summary["p99_ms"]
+    print(
+        f"{summary['endpoint']:<15} {load:>13}: {summary['throughput']:7.2f}/s, "
+        f"p50 {p50 or 0:8.1f} ms, p99 {p99 or 0:8.1f} ms, "
+        f"errors {summary['error_rate']:.1%}"
+    )
+
+
+def plot_curves(results, output_path):
+    """Throughput and p95 latency against offered load, one line per endpoint."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, (ax_throughput, ax_latency) = plt.subplots(1, 2, figsize=(12, 5))
+    for endpoint in sorted({r["endpoint"] for r in results}):
+        rows = [r for r in results if r["endpoint"] == endpoint]
+        offered = [r["offered_rate"] for r in rows]
+        throughput = [r["throughput"] for r in rows]
+        p95 = [r["p95_ms"] or 0 for r in rows]
+        ax_throughput.plot(offered, throughput, "o-", label=endpoint)
+        ax_latency.plot(offered, p95, "o-", label=endpoint)
+    ax_throughput.set(xlabel="Offered load (/s)", ylabel="Throughput (/s)")
+    ax_latency.set(xlabel="Offered load (/s)", ylabel="p95 latency (ms)")
+    for ax in (ax_throughput, ax_latency):
+        ax.grid(True)
+        ax.legend()
+    plt.tight_layout()
+    plt.savefig(output_path)
+    plt.close(fig)
+
+
+async def run(args, url, images):
+    rng = random.Random(args.seed)
+    results = []
+    for endpoint in args.endpoints:
+        if endpoint == "/ws":
+            ws_url = url.replace("http", "ws", 1) + "/ws"
+            frames = [base64.b64encode(data).decode("ascii") for _, data in images]
+            for streams in args.streams:
+                results.append(await ws_step(ws_url, frames, streams, args))
+                print_summary(results[-1])
+        else:
+            for rate in args.rates:
+                summary = await http_step(
+                    url, endpoint, images, rate, args.duration, args, rng
+                )
+                results.append(summary)
+                print_summary(results[-1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test /predict, /batch-predict and /ws of the backend"
+    )
+    parser.add_argument(
+        "--url", help="Running backend (default: start a local uvicorn instance)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="Port of the local server"
+    )
+    parser.add_argument(
+        "--image-dir",
+        default=os.path.join(backend_dir, "..", "AI", "data", "test"),
+        help="Images to replay",
+    )
+    parser.add_argument("--max-images", type=int, default=200)
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        choices=["/predict", "/batch-predict", "/ws"],
+        default=["/predict", "/batch-predict", "/ws"],
+    )
+    parser.add_argument(
+        "--rates",
+        nargs="+",
+        type=float,
+        default=[1, 2, 5, 10],
+        help="Poisson arrival rates (requests/s) swept for the HTTP endpoints",
+    )
+    parser.add_argument(
+        "--batch-files", type=int, default=4, help="Files per batch request"
+    )
+    parser.add_argument(
+        "--streams",
+        nargs="+",
+        type=int,
+        default=[1, 2, 4, 8],
+        help="Concurrent WebSocket streams swept for /ws",
+    )
+    parser.add_argument("--fps", type=float, default=10.0, help="Frames/s per stream")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per step")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument(
+        "--max-inflight", type=int, default=256, help="Concurrent HTTP requests"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Results file (default ./loadtests/...)")
+    parser.add_argument("--plot", action="store_true", help="Save throughput curves")
+    args = parser.parse_args()
+
+    images = find_images(args.image_dir, args.max_images)
+    if not images:
+        parser.error(f"No images found in {args.image_dir}")
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server(args.port)
+    try:
+        results = asyncio.run(run(args, url.rstrip("/"), images))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = args.output or os.path.join("loadtests", f"loadtest_{timestamp}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "meta": {
+                    "timestamp": timestamp,
+                    "url": url,
+                    "images": len(images),
+                    "duration": args.duration,
+                    "fps": args.fps,
+                    "batch_files": args.batch_files,
+                },
+                "results": results,
+            },
+            f,
+            indent=4,
+        )
+    print(f"Results saved to {output}")
+    if args.plot:
+        plot_path = os.path.splitext(output)[0] + ".png"
+        plot_curves(results, plot_path)
+        print(f"Throughput curves saved to {plot_path}")
+
+
+if __name__ == "__main__":
+    main()
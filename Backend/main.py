@@ -1,20 +1,45 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, WebSocket
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, WebSocket
+from fastapi.responses import (
+    FileResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.middleware.cors import CORSMiddleware
 import torch
+import asyncio
+import hmac
 import os
+import time
 import uuid
 import base64
-import cv2
-import numpy as np
+import binascii
 from typing import List
 import io
+import mimetypes
 from PIL import Image
+import psutil
 import shutil
 
 # Import from inference module
-from AI.inference import load_model, preprocess_image, predict
+from AI.hard_examples import HardExampleCapture
+from AI.inference import load_cascade, preprocess_image, predict
+from AI.roi import RoiCropper
+from AI.temporal import StreamingTemporalPredictor, load_temporal_model
+from annotation import Annotator, annotated_name, source_name
 from inference import inference
+from prediction_cache import ContentPredictionCache, PerceptualPredictionCache
+from event_store import GROUP_COLUMNS, PredictionEventStore
+from gateway import FleetScheduler, FrameDropped, RateLimited
+from model_registry import ModelRegistry, ShadowRunner
+from profiling import ArtifactDirectory, SamplingProfiler, TorchProfileSession
+from results_store import (
+    ResultStore,
+    iter_file_range,
+    not_modified,
+    parse_range,
+)
+from telemetry import Registry, setup_logging
 
 app = FastAPI(title="Image Classification Service")
 
@@ -32,26 +57,373 @@ MODEL_PATH = "../AI/weights/resnet50v100_final_epoch100_20250302_022500.pth"  #
 OUTPUT_DIR = "results"
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+# Named models selected by the requests' modelType (see model_registry.py).
+# Without MODEL_REGISTRY every model type is served by MODEL_PATH.
+MODEL_REGISTRY = os.environ.get("MODEL_REGISTRY")
+models = None
+shadow = None
+
+# Optional multi-frame model for the /ws stream (trained with --clip-length)
+TEMPORAL_MODEL_PATH = os.environ.get("TEMPORAL_MODEL_PATH")
+TEMPORAL_BACKBONE = os.environ.get("TEMPORAL_BACKBONE", "resnet50")
+TEMPORAL_CLIP_LENGTH = int(os.environ.get("TEMPORAL_CLIP_LENGTH", "8"))
+temporal_model = None
+
+# Near-duplicate frame cache in front of the /ws predictions
+frame_cache = PerceptualPredictionCache(
+    max_entries=int(os.environ.get("FRAME_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.environ.get("FRAME_CACHE_TTL", "2.0")),
+    max_distance=int(os.environ.get("FRAME_CACHE_DISTANCE", "4")),
+)
+
+# Exact-upload cache for /predict and /batch-predict, keyed by content hash
+# and checkpoint hash. Set RESULT_CACHE_DB to keep results across restarts.
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_DB = os.environ.get("RESULT_CACHE_DB")
+result_cache = None
+
+# Region-of-interest cropping of /ws frames against a per-bin reference
+# frame of the empty bin. INPUT_SIZE can be lowered once the model sees
+# item crops instead of whole frames.
+ROI_ENABLED = os.environ.get("ROI_ENABLED", "0") == "1"
+INPUT_SIZE = int(os.environ.get("INPUT_SIZE", "224"))
+roi_cropper = RoiCropper() if ROI_ENABLED else None
+
+# Optional early-exit cascade calibrated with `inference.py --calibrate`
+CASCADE_CONFIG = os.environ.get("CASCADE_CONFIG")
+cascade = None
+
+# Fleet gateway (/fleet): frames of many bins share one batched inference
+# queue, with a per-bin frame rate limit and round-robin batch filling
+FLEET_MAX_BATCH = int(os.environ.get("FLEET_MAX_BATCH", "16"))
+FLEET_MAX_WAIT_MS = float(os.environ.get("FLEET_MAX_WAIT_MS", "10"))
+FLEET_BIN_FPS = float(os.environ.get("FLEET_BIN_FPS", "5"))
+FLEET_BIN_BURST = int(os.environ.get("FLEET_BIN_BURST", "10"))
+FLEET_QUEUE_PER_BIN = int(os.environ.get("FLEET_QUEUE_PER_BIN", "2"))
+fleet = None
+
+# History of every verdict for per-bin contamination audits, written in
+# batches by a background thread. EVENT_STORE_DB="" disables it.
+EVENT_STORE_DB = os.environ.get("EVENT_STORE_DB", "events/predictions.db")
+event_store = None
+
+# Hard-example mining: frames predicted inside the uncertainty band are
+# de-duplicated and queued for labeling under HARD_EXAMPLE_DIR (disabled if
+# unset); `train.py --hard-examples` fine-tunes on the labeled ones
+HARD_EXAMPLE_DIR = os.environ.get("HARD_EXAMPLE_DIR")
+hard_examples = None
+if HARD_EXAMPLE_DIR:
+    hard_examples = HardExampleCapture(
+        HARD_EXAMPLE_DIR,
+        low=float(os.environ.get("HARD_EXAMPLE_LOW", "0.3")),
+        high=float(os.environ.get("HARD_EXAMPLE_HIGH", "0.7")),
+        max_files=int(os.environ.get("HARD_EXAMPLE_MAX_FILES", "5000")),
+        max_bytes=int(os.environ.get("HARD_EXAMPLE_MAX_MB", "1024")) * 1024 * 1024,
+    )
+
+# Leveled, queue-backed logging: LOG_LEVEL=DEBUG for per-request detail,
+# LOG_LEVEL=OFF to silence it in production
+logger = setup_logging("backend", os.environ.get("LOG_LEVEL", "INFO"))
+
+# Prometheus metrics served on /metrics
+metrics = Registry()
+stage_seconds = metrics.histogram(
+    "backend_stage_seconds",
+    "Time spent per request stage (decode, preprocess, inference, encode)",
+    ["endpoint", "stage"],
+)
+requests_total = metrics.counter(
+    "backend_requests_total", "Requests (images or frames) handled", ["endpoint"]
+)
+errors_total = metrics.counter(
+    "backend_errors_total", "Requests that failed", ["endpoint"]
+)
+cache_lookups_total = metrics.counter(
+    "backend_cache_lookups_total", "Prediction cache lookups", ["cache", "result"]
+)
+inflight = metrics.gauge(
+    "backend_inflight_requests",
+    "Requests waiting for or running inference (queue depth)",
+    ["endpoint"],
+)
+websocket_connections = metrics.gauge(
+    "backend_websocket_connections", "Open /ws connections"
+)
+fleet_connections = metrics.gauge(
+    "backend_fleet_connections", "Open /fleet gateway connections"
+)
+fleet_frames_total = metrics.counter(
+    "backend_fleet_frames_total",
+    "Fleet gateway frames by outcome (ok, rate_limited, dropped, error)",
+    ["result"],
+)
+metrics.gauge(
+    "backend_fleet_queued_frames",
+    "Frames waiting in the fleet gateway's shared inference queue",
+    function=lambda: fleet.queued if fleet is not None else 0,
+)
+metrics.gauge(
+    "backend_fleet_bins",
+    "Bins with rate limiter state in the fleet gateway",
+    function=lambda: len(fleet.buckets) if fleet is not None else 0,
+)
+
+
+def model_memory_bytes():
+    """Parameter and buffer bytes of every loaded model."""
+    served_models = {"temporal": temporal_model}
+    if models is not None:
+        served_models.update({name: s.model for name, s in models.loaded.items()})
+    if cascade is not None and cascade.fast_model is not model:
+        served_models["cascade_fast"] = cascade.fast_model
+    return {
+        (name,): sum(
+            t.numel() * t.element_size()
+            for t in list(m.parameters()) + list(m.buffers())
+        )
+        for name, m in served_models.items()
+        if m is not None
+    }
+
+
+metrics.gauge(
+    "backend_model_memory_bytes",
+    "Memory held by model weights",
+    ["model"],
+    function=model_memory_bytes,
+)
+metrics.gauge(
+    "backend_process_resident_memory_bytes",
+    "Resident set size of the server process",
+    function=lambda: psutil.Process().memory_info().rss,
+)
+
+# On-demand profiling (admin endpoints). Artifacts live in a bounded
+# directory; without ADMIN_TOKEN the endpoints only accept local clients.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+profile_artifacts = ArtifactDirectory(
+    os.environ.get("PROFILE_DIR", "profiles"),
+    max_files=int(os.environ.get("PROFILE_MAX_FILES", "20")),
+    max_bytes=int(os.environ.get("PROFILE_MAX_MB", "200")) * 1024 * 1024,
+)
+torch_profile = TorchProfileSession(profile_artifacts)
+sampling_profile = SamplingProfiler(profile_artifacts)
+
 # Create output directory
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Annotated /predict result images: "lazy" renders on the first GET of
+# result_image, "eager" while answering, "off" leaves drawing the label to
+# the client (the response already carries the verdict)
+ANNOTATION_MODE = os.environ.get("ANNOTATION_MODE", "lazy")
+annotator = Annotator(
+    OUTPUT_DIR, max_side=int(os.environ.get("ANNOTATION_MAX_SIDE", "640"))
+)
+
+# Cached, conditional serving of /results with lazily generated thumbnails
+result_store = ResultStore(OUTPUT_DIR, generate=annotator.generate)
+
 backend_dir = os.path.dirname(os.path.realpath(__file__))
 
 
+model = None
+
+
 @app.on_event("startup")
 async def startup_event():
-    global model
+    global models, model, shadow
     try:
-        model = load_model(MODEL_PATH)
-        print(f"Model loaded successfully from {MODEL_PATH}")
+        if MODEL_REGISTRY:
+            models = ModelRegistry.from_file(MODEL_REGISTRY, DEVICE)
+        else:
+            models = ModelRegistry.single(MODEL_PATH, DEVICE)
+        default = models.get()
+        model = default.model
+        logger.info("Model %s loaded successfully from %s", default.name, default.path)
     except Exception as e:
-        print(f"Error loading model: {e}")
+        logger.error("Error loading model: %s", e)
         model = None
 
+    # Load the other models (shadow candidate included) now, so no request
+    # loads a checkpoint on the event loop
+    if models is not None:
+        for name, error in models.preload().items():
+            logger.error("Error loading model %s: %s", name, error)
+
+    if models is not None and "shadow" in models.config:
+        try:
+            shadow = ShadowRunner(models, **models.config["shadow"])
+            logger.info("Shadowing %s with %s", shadow.primary, shadow.candidate)
+        except Exception as e:
+            logger.error("Error starting shadow mode: %s", e)
+
+    global result_cache
+    try:
+        names = models.config["models"]
+        result_cache = ContentPredictionCache(
+            models.hash_of(None),
+            RESULT_CACHE_SIZE,
+            RESULT_CACHE_DB,
+            keep_hashes=[models.hash_of(name) for name in names],
+        )
+    except Exception as e:
+        logger.warning("Upload result cache disabled: %s", e)
+        result_cache = None
+
+    global cascade
+    if CASCADE_CONFIG and model is not None:
+        try:
+            cascade = load_cascade(CASCADE_CONFIG, model, DEVICE)
+            logger.info("Cascade enabled: band (%s, %s)", cascade.low, cascade.high)
+        except Exception as e:
+            logger.error("Error loading cascade configuration: %s", e)
+            cascade = None
+
+    global temporal_model
+    if TEMPORAL_MODEL_PATH:
+        try:
+            temporal_model = load_temporal_model(
+                TEMPORAL_MODEL_PATH, TEMPORAL_BACKBONE, DEVICE
+            )
+            logger.info(
+                "Temporal model loaded successfully from %s", TEMPORAL_MODEL_PATH
+            )
+        except Exception as e:
+            logger.error("Error loading temporal model: %s", e)
+            temporal_model = None
+
+    global event_store
+    if EVENT_STORE_DB:
+        try:
+            event_store = PredictionEventStore(EVENT_STORE_DB)
+        except Exception as e:
+            logger.error("Prediction event store disabled: %s", e)
+            event_store = None
+
+    global fleet
+    if model is not None:
+        fleet = FleetScheduler(
+            fleet_infer,
+            max_batch=FLEET_MAX_BATCH,
+            max_wait=FLEET_MAX_WAIT_MS / 1000,
+            queue_per_bin=FLEET_QUEUE_PER_BIN,
+            rate=FLEET_BIN_FPS,
+            burst=FLEET_BIN_BURST,
+        )
+        fleet.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if result_cache is not None:
+        result_cache.close()
+    if fleet is not None:
+        await fleet.stop()
+    if event_store is not None:
+        event_store.close()
+
+
+def route(model_type):
+    """Served model for a request's modelType; unknown types are a 400."""
+    if models is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    try:
+        return models.get(model_type)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+
+
+def classify(model, image_tensor):
+    """
+    Run the early-exit cascade when configured for this model, otherwise the
+    model itself. Returns (prediction, probability, stage).
+    """
+    with torch.profiler.record_function("classify"):
+        if cascade is not None and model is cascade.full_model:
+            result = cascade.predict(image_tensor)
+        else:
+            result = (*predict(model, image_tensor, DEVICE), "full")
+    torch_profile.step()
+    return result
+
+
+def serve(served, image_tensor):
+    """
+    classify() with the routed model, and hand a sample of the traffic to
+    the shadow candidate (never blocking on it).
+    """
+    start = time.perf_counter()
+    prediction, probability, stage = classify(served.model, image_tensor)
+    if shadow is not None:
+        shadow.maybe_submit(
+            served.name, image_tensor, probability, time.perf_counter() - start
+        )
+    return prediction, probability, stage
+
+
+def record_event(endpoint, bin_id, served, prediction, probability, start, **fields):
+    """Add a verdict to the event store; start is the request's perf_counter."""
+    if event_store is not None:
+        event_store.record(
+            bin_id,
+            probability,
+            prediction,
+            time.perf_counter() - start,
+            model=served.name,
+            model_version=served.model_hash[:12],
+            endpoint=endpoint,
+            **fields,
+        )
+
+
+def capture_hard_example(img_bytes, prediction, probability, bin_id):
+    """Queue an uncertain verdict's frame for labeling (never blocks)."""
+    if hard_examples is not None:
+        hard_examples.offer(img_bytes, probability, prediction, bin_id)
+
+
+def fleet_infer(frames):
+    """
+    Batched inference for the fleet gateway, run in the scheduler's thread:
+    one forward pass of the default model over (bin_id, image bytes) frames
+    of many bins. Returns (probability, roi_box) per frame, or the exception
+    of a frame that could not be decoded.
+    """
+    endpoint = "/fleet"
+    results = []
+    tensors = []
+    with stage_seconds.time(endpoint=endpoint, stage="preprocess"):
+        for bin_id, img_bytes in frames:
+            try:
+                roi_box = None
+                if roi_cropper is not None:
+                    frame = Image.open(io.BytesIO(img_bytes))
+                    frame.draft("L", (160, 120))
+                    frame.load()
+                    roi_box = roi_cropper.find_box(frame, bin_id)
+                image_tensor, _ = preprocess_image(
+                    io.BytesIO(img_bytes), roi_box, INPUT_SIZE
+                )
+                tensors.append(image_tensor)
+                results.append(roi_box)
+            except Exception as e:
+                results.append(e)
+    if not tensors:
+        return results
+
+    with stage_seconds.time(endpoint=endpoint, stage="inference"):
+        with torch.no_grad(), torch.profiler.record_function("fleet_batch"):
+            logits = model(torch.cat(tensors).to(DEVICE))
+            probabilities = iter(torch.sigmoid(logits).flatten().tolist())
+        torch_profile.step()
+    return [
+        r if isinstance(r, Exception) else (next(probabilities), r) for r in results
+    ]
+
 
 @app.get("/")
 async def root():
-    print("root page accessed")
+    logger.debug("root page accessed")
     return {
         "message": "Image Classification API is running",
         "model_loaded": model is not None,
@@ -62,16 +434,12 @@ async def root():
 # route for image prediction based on inferrence.py
 @app.post("/identify/")
 async def identify(file: UploadFile):
-    print("uploading file")
-    print(file.filename)
-    file_path = os.path.join(backend_dir, "Images", file.filename)
-    print(file_path)
+    logger.debug("uploading file %s", file.filename)
     try:
         file_path = os.path.join(backend_dir, "Images", file.filename)
-        print(file_path)
         with open(file_path, "wb") as f:
             f.write(file.file.read())
-        print({"message": "File saved successfully"})
+        logger.debug("File saved successfully to %s", file_path)
     except Exception as e:
         return {"message": e.args}
     return inference(file_path, "resnet50v100_final_epoch100_20250302_022500.pth")
@@ -97,120 +465,123 @@ async def save_upload_file(upload_file: UploadFile, destination: str):
 
 
 @app.post("/predict")
-async def predict_image(file: UploadFile = File(...)):
+async def predict_image(
+    file: UploadFile = File(...),
+    modelType: str = Form("default"),
+    binId: str = Form("upload"),
+):
     """
     Endpoint to predict a single uploaded image with debug visualization.
     """
     # if not model:
     #     raise HTTPException(status_code=500, detail="Model not loaded")
 
+    endpoint = "/predict"
+    start = time.perf_counter()
+    requests_total.inc(endpoint=endpoint)
+    served = route(modelType)
     try:
-        model = load_model(MODEL_PATH)
-        print(f"Model loaded successfully from {MODEL_PATH}")
-        # Generate unique filenames for debugging
-        debug_filename = f"debug_original_{uuid.uuid4()}.jpg"
-        debug_file_path = os.path.join(OUTPUT_DIR, debug_filename)
-
-        # Save uploaded file temporarily
-        temp_file_path = os.path.join(OUTPUT_DIR, f"temp_{uuid.uuid4()}.jpg")
-
-        # Read file content
-        await file.seek(0)
-        content = await file.read()
-
-        # Save the raw file for debugging
-        with open(debug_file_path, "wb") as f:
-            f.write(content)
-
-        print(f"Saved debug image before processing: {debug_file_path}")
-
-        # Save for preprocessing
-        with open(temp_file_path, "wb") as buffer:
-            buffer.write(content)
-
-        # Log file info
-        file_size = os.path.getsize(temp_file_path)
-        print(f"Processing file: {file.filename}, size: {file_size} bytes")
-
-        # Also save the image using PIL to verify it opens correctly
-        try:
-            pil_image = Image.open(io.BytesIO(content))
-            pil_debug_path = os.path.join(OUTPUT_DIR, f"pil_debug_{uuid.uuid4()}.jpg")
-            pil_image.save(pil_debug_path)
-            print(f"PIL can open the image. Saved to: {pil_debug_path}")
-            print(f"Image mode: {pil_image.mode}, size: {pil_image.size}")
-        except Exception as pil_error:
-            print(f"PIL couldn't open the image: {str(pil_error)}")
-
-        # Use the preprocess_image function from inference.py
-        try:
-            image_tensor, original_image = preprocess_image(temp_file_path)
-            print(f"Successfully preprocessed image: {temp_file_path}")
-
-            # Save the preprocessed image for debugging
-            preprocess_debug_path = os.path.join(
-                OUTPUT_DIR, f"preprocessed_{uuid.uuid4()}.jpg"
+        with inflight.track(endpoint=endpoint):
+            with stage_seconds.time(endpoint=endpoint, stage="decode"):
+                # Read file content
+                await file.seek(0)
+                content = await file.read()
+
+            # Identical uploads under the same checkpoint reuse the earlier result
+            cache_key = None
+            if result_cache:
+                cache_key = result_cache.key(content, served.model_hash)
+            if cache_key:
+                cached = result_cache.get(cache_key)
+                cache_lookups_total.inc(
+                    cache="result", result="miss" if cached is None else "hit"
+                )
+                if cached is not None:
+                    record_event(
+                        endpoint,
+                        binId,
+                        served,
+                        cached["classLabel"],
+                        cached["confidence"],
+                        start,
+                        thumbnail=cached.get("result_image"),
+                    )
+                    return dict(cached, filename=file.filename, cached=True)
+
+            # Generate unique filenames for debugging; the annotated result
+            # is rendered from the saved original
+            request_id = str(uuid.uuid4())
+            debug_filename = source_name(request_id)
+            debug_file_path = os.path.join(OUTPUT_DIR, debug_filename)
+            logger.debug(
+                "Processing file: %s, size: %d bytes", file.filename, len(content)
             )
-            original_image.save(preprocess_debug_path)
-            print(f"Saved preprocessed image to: {preprocess_debug_path}")
-        except Exception as preprocess_error:
-            print(f"Error in preprocessing: {str(preprocess_error)}")
-            raise preprocess_error
-
-        # Use the predict function from inference.py
-        prediction, probability = predict(model, image_tensor, DEVICE)
-
-        print(
-            f"Prediction result: class={int(prediction)}, confidence={float(probability)}"
-        )
 
-        # Save visualization with prediction
-        result_filename = f"result_{uuid.uuid4()}.jpg"
-        result_path = os.path.join(OUTPUT_DIR, result_filename)
-
-        # Convert PIL image to numpy for OpenCV
-        img_np = np.array(original_image)
-        img_np = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
-
-        # Add prediction text to image
-        class_name = "1" if prediction == 1 else "0"
-        cv2.putText(
-            img_np,
-            f"Predicted: Class {class_name} ({probability:.2f})",
-            (10, 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            1,
-            (0, 255, 0),
-            2,
-        )
-
-        # Save result image
-        cv2.imwrite(result_path, img_np)
+            # Use the preprocess_image function from inference.py
+            with stage_seconds.time(endpoint=endpoint, stage="preprocess"):
+                # Save the raw file for debugging; preprocessing reads it back
+                with open(debug_file_path, "wb") as f:
+                    f.write(content)
+                image_tensor, original_image = preprocess_image(debug_file_path)
+                logger.debug(
+                    "Image mode: %s, size: %s", original_image.mode, original_image.size
+                )
 
-        # # Clean up temp file
-        # if os.path.exists(temp_file_path):
-        #     os.remove(temp_file_path)
+            # Use the predict function from inference.py
+            with stage_seconds.time(endpoint=endpoint, stage="inference"):
+                prediction, probability, _ = serve(served, image_tensor)
+            logger.debug(
+                "Prediction result: class=%d, confidence=%f", prediction, probability
+            )
 
-        return {
-            "filename": file.filename,
-            "classLabel": int(prediction),
-            "confidence": float(probability),
-            "result_image": f"/results/{result_filename}",
-            "debug_original_image": f"/results/{os.path.basename(debug_file_path)}",
-            "debug_preprocessed_image": f"/results/{os.path.basename(preprocess_debug_path)}",
-        }
+            # Visualization with the prediction, downscaled (see annotation.py)
+            result_image = None
+            if ANNOTATION_MODE != "off":
+                result_filename = annotated_name(request_id, prediction, probability)
+                result_image = f"/results/{result_filename}"
+                if ANNOTATION_MODE == "eager":
+                    with stage_seconds.time(endpoint=endpoint, stage="encode"):
+                        annotator.render_file(
+                            content,
+                            prediction,
+                            probability,
+                            os.path.join(OUTPUT_DIR, result_filename),
+                        )
+
+            debug_image = f"/results/{debug_filename}"
+            result = {
+                "classLabel": int(prediction),
+                "confidence": float(probability),
+                "result_image": result_image,
+                "debug_original_image": debug_image,
+                # The model input is the decoded upload; no separate copy is kept
+                "debug_preprocessed_image": debug_image,
+            }
+            if cache_key:
+                result_cache.put(cache_key, result)
+            capture_hard_example(content, prediction, probability, binId)
+            record_event(
+                endpoint,
+                binId,
+                served,
+                prediction,
+                probability,
+                start,
+                thumbnail=result["result_image"],
+            )
+            return dict(result, filename=file.filename, cached=False)
 
     except Exception as e:
-        print(f"Error in predict_image: {str(e)}")
-        import traceback
-
-        traceback.print_exc()
+        errors_total.inc(endpoint=endpoint)
+        logger.exception("Error in predict_image: %s", e)
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 
 @app.post("/batch-predict")
 async def batch_predict(
-    files: List[UploadFile] = File(...), modelType: str = Form("default")
+    files: List[UploadFile] = File(...),
+    modelType: str = Form("default"),
+    binId: str = Form("upload"),
 ):
     """
     Endpoint to predict multiple uploaded images.
@@ -218,54 +589,91 @@ async def batch_predict(
     # if not model:
     #     raise HTTPException(status_code=500, detail="Model not loaded")
 
+    endpoint = "/batch-predict"
+    served = route(modelType)
     results = []
 
-    print(f"Received {len(files)} files for batch prediction, model type: {modelType}")
+    logger.debug(
+        "Received %d files for batch prediction, model type: %s", len(files), modelType
+    )
 
     for file in files:
+        start = time.perf_counter()
+        requests_total.inc(endpoint=endpoint)
         try:
-            model = load_model(MODEL_PATH)
-            print(f"Model loaded successfully from {MODEL_PATH}")
-            # Generate a unique filename with the original extension
-            original_extension = (
-                os.path.splitext(file.filename)[1] or ".jpg"
-            )  # Default to .jpg if no extension
-            temp_file_path = os.path.join(
-                OUTPUT_DIR, f"temp_{uuid.uuid4()}{original_extension}"
-            )
-
-            # Save uploaded file using our helper function
-            await save_upload_file(file, temp_file_path)
-
-            # Print file info for debugging
-            file_size = os.path.getsize(temp_file_path)
-            print(f"Saved file {temp_file_path} with size {file_size} bytes")
-
-            # Use the preprocess_image function directly from inference.py
-            image_tensor, _ = preprocess_image(temp_file_path)
+            with inflight.track(endpoint=endpoint):
+                # Identical uploads under the same checkpoint reuse the earlier result
+                cache_key = None
+                if result_cache:
+                    await file.seek(0)
+                    cache_key = result_cache.key(await file.read(), served.model_hash)
+                    cached = result_cache.get(cache_key)
+                    cache_lookups_total.inc(
+                        cache="result", result="miss" if cached is None else "hit"
+                    )
+                    if cached is not None:
+                        record_event(
+                            endpoint,
+                            binId,
+                            served,
+                            cached["classLabel"],
+                            cached["confidence"],
+                            start,
+                        )
+                        results.append(
+                            dict(cached, filename=file.filename, cached=True)
+                        )
+                        continue
+
+                with stage_seconds.time(endpoint=endpoint, stage="decode"):
+                    # Generate a unique filename with the original extension
+                    original_extension = (
+                        os.path.splitext(file.filename)[1] or ".jpg"
+                    )  # Default to .jpg if no extension
+                    temp_file_path = os.path.join(
+                        OUTPUT_DIR, f"temp_{uuid.uuid4()}{original_extension}"
+                    )
+
+                    # Save uploaded file using our helper function
+                    await save_upload_file(file, temp_file_path)
+
+                # Use the preprocess_image function directly from inference.py
+                with stage_seconds.time(endpoint=endpoint, stage="preprocess"):
+                    image_tensor, _ = preprocess_image(temp_file_path)
+
+                # Use the predict function directly from inference.py
+                with stage_seconds.time(endpoint=endpoint, stage="inference"):
+                    prediction, probability, _ = serve(served, image_tensor)
+
+                logger.debug(
+                    "Prediction for %s: class=%d, confidence=%f",
+                    file.filename,
+                    prediction,
+                    probability,
+                )
 
-            # Use the predict function directly from inference.py
-            prediction, probability = predict(model, image_tensor, DEVICE)
+                # Keep an uncertain upload before its temp file goes away
+                if hard_examples is not None and hard_examples.in_band(probability):
+                    with open(temp_file_path, "rb") as f:
+                        capture_hard_example(f.read(), prediction, probability, binId)
 
-            print(
-                f"Prediction for {file.filename}: class={int(prediction)}, confidence={float(probability)}"
-            )
-
-            # Clean up temp file
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+                # Clean up temp file
+                if os.path.exists(temp_file_path):
+                    os.remove(temp_file_path)
 
-            # Add to results
-            results.append(
-                {
-                    "filename": file.filename,
+                # Add to results
+                result = {
                     "classLabel": int(prediction),
                     "confidence": float(probability),
                 }
-            )
+                if cache_key:
+                    result_cache.put(cache_key, result)
+                record_event(endpoint, binId, served, prediction, probability, start)
+                results.append(dict(result, filename=file.filename, cached=False))
 
         except Exception as e:
-            print(f"Error processing {file.filename}: {str(e)}")
+            errors_total.inc(endpoint=endpoint)
+            logger.error("Error processing %s: %s", file.filename, e)
             results.append(
                 {
                     "filename": file.filename,
@@ -279,22 +687,303 @@ async def batch_predict(
     return {"results": results}
 
 
+@app.get("/models")
+async def list_models():
+    """
+    Model types that can be requested, the loaded models and shadow-mode
+    agreement and latency deltas.
+    """
+    if models is None:
+        return {"models": [], "shadow": None}
+    return {
+        "default": models.default,
+        "models": models.names(),
+        "loaded": sorted(models.loaded),
+        "shadow": shadow.summary() if shadow is not None else None,
+    }
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    Prometheus scrape endpoint: stage latency histograms, request, error and
+    cache counters, queue depth and memory gauges.
+    """
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """
+    Hit-rate metrics of the /ws near-duplicate frame cache and the
+    /predict and /batch-predict upload cache.
+    """
+    return {
+        "frame_cache": frame_cache.stats(),
+        "result_cache": result_cache.stats() if result_cache else None,
+    }
+
+
+@app.get("/fleet-stats")
+async def fleet_stats():
+    """
+    Frames, rate-limited and dropped frames, batch sizes and queue depth of
+    the fleet gateway.
+    """
+    if fleet is None:
+        return {"enabled": False}
+    return {"enabled": True, **fleet.summary()}
+
+
+@app.get("/events")
+async def list_events(
+    start: float = None, end: float = None, bin_id: str = None, limit: int = 100
+):
+    """
+    Recorded verdicts in [start, end) (Unix seconds, default: the last 24
+    hours), newest first, optionally of one bin.
+    """
+    if event_store is None:
+        raise HTTPException(status_code=404, detail="Event store disabled")
+    if not 1 <= limit <= 10000:
+        raise HTTPException(status_code=400, detail="limit must be in 1..10000")
+    end = end if end is not None else time.time()
+    start = start if start is not None else end - 24 * 3600
+    events = await asyncio.get_running_loop().run_in_executor(
+        None, event_store.events, start, end, bin_id, limit
+    )
+    return {"events": events}
+
+
+@app.get("/events/aggregate")
+async def aggregate_events(
+    start: float = None, end: float = None, bin_id: str = None, group_by: str = "bin"
+):
+    """
+    Contamination rate (share of class 1 verdicts), mean confidence and mean
+    latency per bin, per model or overall in [start, end) (Unix seconds,
+    default: the last 24 hours). Whole hours come from an hourly rollup.
+    """
+    if event_store is None:
+        raise HTTPException(status_code=404, detail="Event store disabled")
+    if group_by not in GROUP_COLUMNS:
+        raise HTTPException(
+            status_code=400, detail=f"group_by must be one of {sorted(GROUP_COLUMNS)}"
+        )
+    end = end if end is not None else time.time()
+    start = start if start is not None else end - 24 * 3600
+    groups = await asyncio.get_running_loop().run_in_executor(
+        None, event_store.aggregate, start, end, bin_id, group_by
+    )
+    return {
+        "start": start,
+        "end": end,
+        "groups": groups,
+        "store": event_store.stats(),
+    }
+
+
+@app.get("/hard-examples")
+async def hard_example_stats():
+    """
+    Captured, duplicate, dropped and evicted frames of hard-example mining
+    and the size of the labeling queue.
+    """
+    if hard_examples is None:
+        return {"enabled": False}
+    return {"enabled": True, "root_dir": HARD_EXAMPLE_DIR, **hard_examples.summary()}
+
+
+@app.get("/cascade-stats")
+async def cascade_stats():
+    """
+    Escalation rate and mean compute saved per request by the cascade.
+    """
+    if cascade is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "low": cascade.low,
+        "high": cascade.high,
+        "fast_size": cascade.fast_size,
+        **cascade.stats.summary(),
+    }
+
+
+def require_admin(request: Request):
+    if ADMIN_TOKEN:
+        token = request.headers.get("X-Admin-Token", "")
+        if not hmac.compare_digest(token, ADMIN_TOKEN):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+    elif request.client is None or request.client.host not in ("127.0.0.1", "::1"):
+        raise HTTPException(
+            status_code=403, detail="Set ADMIN_TOKEN to use admin endpoints remotely"
+        )
+
+
+@app.post("/admin/profile/torch")
+async def profile_torch(
+    request: Request, inferences: int = None, seconds: float = None
+):
+    """
+    Capture the next `inferences` inferences and/or a `seconds` time window
+    with torch.profiler and save a Chrome trace (chrome://tracing, Perfetto).
+    """
+    require_admin(request)
+    if inferences is None and seconds is None:
+        inferences = 10
+    if inferences is not None and not 1 <= inferences <= 1000:
+        raise HTTPException(status_code=400, detail="inferences must be in 1..1000")
+    if seconds is not None and not 0 < seconds <= 120:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 120]")
+    try:
+        torch_profile.start(inferences, seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if seconds is not None:
+        asyncio.get_running_loop().call_later(seconds, torch_profile.check_deadline)
+    logger.info("torch profiler armed: inferences=%s, seconds=%s", inferences, seconds)
+    return {"status": "started", "inferences": inferences, "seconds": seconds}
+
+
+@app.post("/admin/profile/sample")
+async def profile_sample(
+    request: Request, seconds: float = 30.0, interval_ms: float = 10.0
+):
+    """
+    Sample the stacks of every thread of the server process for `seconds`
+    and save them as collapsed stacks for a flamegraph.
+    """
+    require_admin(request)
+    if not 0 < seconds <= 600:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 600]")
+    if not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail="interval_ms must be in 1..1000")
+    try:
+        sampling_profile.start(seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info("Sampling profiler started for %ss", seconds)
+    return {"status": "started", "seconds": seconds, "interval_ms": interval_ms}
+
+
+@app.get("/admin/profile")
+async def profile_status(request: Request):
+    """
+    State of both profilers and the saved artifacts.
+    """
+    require_admin(request)
+    torch_profile.check_deadline()
+    return {
+        "torch": {
+            "active": torch_profile.active,
+            "remaining_inferences": torch_profile.remaining,
+            "last_trace": torch_profile.last_trace,
+        },
+        "sampling": {
+            "active": sampling_profile.active,
+            "last_output": sampling_profile.last_output,
+        },
+        "artifacts": [
+            {"name": name, "bytes": size, "modified": mtime}
+            for name, size, mtime in profile_artifacts.list()
+        ],
+    }
+
+
+@app.get("/admin/profile/artifacts/{name}")
+async def profile_artifact(request: Request, name: str):
+    """
+    Download a profiling artifact listed by /admin/profile.
+    """
+    require_admin(request)
+    path = profile_artifacts.resolve(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return FileResponse(path, filename=name)
+
+
 @app.get("/results/{filename}")
-async def get_result(filename: str):
+async def get_result(request: Request, filename: str, size: int = None):
     """
-    Endpoint to retrieve a result image.
+    Endpoint to retrieve a result image, or with ?size= one of its
+    thumbnails (generated on first request). Responses carry an ETag and a
+    long Cache-Control; If-None-Match / If-Modified-Since get a 304 and a
+    single byte Range a 206. Full files go through FileResponse, which uses
+    the server's zero-copy file sending (ASGI pathsend) where available.
     """
-    file_path = os.path.join(OUTPUT_DIR, filename)
-    if not os.path.exists(file_path):
+    file_path = result_store.resolve(filename)
+    if file_path is None:
         raise HTTPException(status_code=404, detail="Result image not found")
+    if size is not None and size not in result_store.sizes:
+        raise HTTPException(
+            status_code=400, detail=f"size must be one of {result_store.sizes}"
+        )
+
+    try:
+        stat = None
+        if size is None:
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                pass
+        if stat is None:
+            # Thumbnails and lazily annotated results are generated off the loop
+            file_path = await asyncio.get_running_loop().run_in_executor(
+                None, result_store.materialize, filename, size
+            )
+            stat = os.stat(file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Result image not found")
+
+    headers = result_store.headers(stat)
+    if not_modified(request.headers, headers, stat):
+        return Response(status_code=304, headers=headers)
+
+    # If-Range: only honour the range if the client's copy is still current
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range != headers["ETag"]:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, stat.st_size)
+    except ValueError as e:
+        return Response(status_code=416, headers={"Content-Range": str(e)})
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            iter_file_range(file_path, start, end),
+            status_code=206,
+            media_type=mimetypes.guess_type(file_path)[0],
+            headers=headers,
+        )
 
-    return FileResponse(file_path)
+    return FileResponse(file_path, headers=headers, stat_result=stat)
 
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for real-time camera stream processing.
+
+    When a temporal model is loaded, every frame is also fed to a
+    per-connection StreamingTemporalPredictor and the response carries the
+    multi-frame result once enough frames have arrived. Send
+    {"reset": true} between drop events to clear the frame buffer; a reset
+    without an image is acknowledged with {"reset": true}.
+
+    With ROI_ENABLED=1 frames are cropped to the item before resizing; send
+    "binId" with each frame when several bins share the server.
+
+    Frames within a few dHash bits of a frame recently predicted for the
+    same bin are answered from frame_cache without running the model
+    ("cached": true); they still feed the temporal buffer.
+
+    "modelType" selects a model from the registry (default model if absent).
     """
     await websocket.accept()
 
@@ -303,60 +992,238 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.close()
         return
 
+    temporal = None
+    if temporal_model is not None:
+        temporal = StreamingTemporalPredictor(
+            temporal_model, TEMPORAL_CLIP_LENGTH, device=DEVICE
+        )
+
+    endpoint = "/ws"
+    websocket_connections.inc()
     try:
         while True:
             # Receive base64 encoded image from client
             data = await websocket.receive_json()
 
+            if data.get("reset"):
+                if temporal is not None:
+                    temporal.reset()
+                if "image" not in data:
+                    await websocket.send_json({"reset": True})
+                    continue
+
             if "image" not in data:
                 await websocket.send_json({"error": "No image data received"})
                 continue
 
+            start = time.perf_counter()
+            requests_total.inc(endpoint=endpoint)
+            bin_id = str(data.get("binId", "default"))
             # Decode the base64 image
             try:
-                img_data = (
-                    data["image"].split(",")[1]
-                    if "," in data["image"]
-                    else data["image"]
-                )
-                img_bytes = base64.b64decode(img_data)
+                served = route(data.get("modelType"))
+                use_frame_cache = served.name == models.default
+                with stage_seconds.time(endpoint=endpoint, stage="decode"):
+                    img_data = (
+                        data["image"].split(",")[1]
+                        if "," in data["image"]
+                        else data["image"]
+                    )
+                    img_bytes = base64.b64decode(img_data)
+
+                    # Cheap downscaled decode (JPEG draft mode) for the ROI
+                    # stage and the frame hash
+                    frame = Image.open(io.BytesIO(img_bytes))
+                    frame.draft("L", (160, 120))
+                    frame.load()
+
+                with stage_seconds.time(endpoint=endpoint, stage="preprocess"):
+                    roi_box = None
+                    if roi_cropper is not None:
+                        # Runs on every frame so the reference keeps refreshing
+                        roi_box = roi_cropper.find_box(frame, bin_id)
+
+                    # Reuse the verdict of a recent near-identical frame (the
+                    # frame cache only holds default-model verdicts)
+                    frame_hash = frame_cache.frame_hash(frame)
+                    cached = None
+                    if use_frame_cache:
+                        cached = frame_cache.get(frame_hash, bin_id)
+                        cache_lookups_total.inc(
+                            cache="frame", result="miss" if cached is None else "hit"
+                        )
+                if cached is not None and temporal is None:
+                    record_event(
+                        endpoint,
+                        bin_id,
+                        served,
+                        cached["prediction"],
+                        cached["probability"],
+                        start,
+                    )
+                    with stage_seconds.time(endpoint=endpoint, stage="encode"):
+                        await websocket.send_json(dict(cached, cached=True))
+                    continue
+
+                with inflight.track(endpoint=endpoint):
+                    with stage_seconds.time(endpoint=endpoint, stage="preprocess"):
+                        image_tensor, _ = preprocess_image(
+                            io.BytesIO(img_bytes), roi_box, INPUT_SIZE
+                        )
+
+                    with stage_seconds.time(endpoint=endpoint, stage="inference"):
+                        if cached is None:
+                            prediction, probability, stage = serve(
+                                served, image_tensor
+                            )
+                        temporal_result = None
+                        if temporal is not None:
+                            # Cached frames are still part of the clip
+                            temporal_result = temporal.push(image_tensor)
+
+                if cached is not None:
+                    response = dict(cached)
+                    prediction = response["prediction"]
+                    probability = response["probability"]
+                else:
+                    logger.debug(
+                        "WebSocket prediction: class=%d, confidence=%f",
+                        prediction,
+                        probability,
+                    )
+                    response = {
+                        "prediction": int(prediction),
+                        "probability": float(probability),
+                        "class": "1" if prediction == 1 else "0",
+                        "stage": stage,
+                        "roi": roi_box,
+                        "model": served.name,
+                    }
+                    if use_frame_cache:
+                        frame_cache.put(frame_hash, dict(response), bin_id)
+                    capture_hard_example(img_bytes, prediction, probability, bin_id)
+                record_event(endpoint, bin_id, served, prediction, probability, start)
+                if temporal is not None:
+                    response["temporal_frames"] = len(temporal.buffer)
+                    if temporal_result is not None:
+                        response["temporal_prediction"] = int(temporal_result[0])
+                        response["temporal_probability"] = temporal_result[1]
 
-                # Save image temporarily with proper extension
-                temp_path = os.path.join(OUTPUT_DIR, f"stream_{uuid.uuid4()}.jpg")
-                with open(temp_path, "wb") as f:
-                    f.write(img_bytes)
+                # Send result back to client
+                with stage_seconds.time(endpoint=endpoint, stage="encode"):
+                    await websocket.send_json(
+                        dict(response, cached=cached is not None)
+                    )
 
-                # Print file info for debugging
-                file_size = os.path.getsize(temp_path)
-                print(f"Saved WebSocket image {temp_path} with size {file_size} bytes")
+            except Exception as e:
+                errors_total.inc(endpoint=endpoint)
+                logger.error("WebSocket processing error: %s", e)
+                await websocket.send_json({"error": f"Processing error: {str(e)}"})
 
-                # Use the preprocess_image and predict functions directly
-                image_tensor, _ = preprocess_image(temp_path)
-                prediction, probability = predict(model, image_tensor, DEVICE)
+    except Exception as e:
+        logger.debug("WebSocket closed: %s", e)
+    finally:
+        websocket_connections.dec()
 
-                print(
-                    f"WebSocket prediction: class={int(prediction)}, confidence={float(probability)}"
-                )
 
-                # Clean up temp file
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+@app.websocket("/fleet")
+async def fleet_endpoint(websocket: WebSocket):
+    """
+    Gateway for a neighborhood of bins. Every message is one frame tagged
+    with its bin, {"binId": ..., "image": base64, "frameId": optional}, and
+    a connection may carry a single bin or multiplex many. Frames go into
+    the shared FleetScheduler queue; replies come back tagged with binId and
+    frameId as soon as their batch finishes, so they can arrive out of
+    order. A bin over FLEET_BIN_FPS gets {"error": "rate_limited"}; a frame
+    replaced by a newer one of the same bin gets {"error": "dropped"}.
+    """
+    await websocket.accept()
 
-                # Send result back to client
-                await websocket.send_json(
-                    {
-                        "prediction": int(prediction),
-                        "probability": float(probability),
-                        "class": "1" if prediction == 1 else "0",
-                    }
+    if fleet is None:
+        await websocket.send_json({"error": "Model not loaded"})
+        await websocket.close()
+        return
+
+    endpoint = "/fleet"
+    send_lock = asyncio.Lock()
+    pending = set()
+    bins = set()
+
+    async def reply(message):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    async def answer(tag, future, start, img_bytes):
+        try:
+            probability, roi_box = await future
+            prediction = int(probability >= 0.5)
+            capture_hard_example(img_bytes, prediction, probability, str(tag["binId"]))
+            record_event(
+                endpoint, tag["binId"], models.get(), prediction, probability, start
+            )
+            message = {
+                **tag,
+                "prediction": prediction,
+                "probability": probability,
+                "class": "1" if prediction == 1 else "0",
+                "roi": roi_box,
+            }
+            fleet_frames_total.inc(result="ok")
+        except FrameDropped:
+            fleet_frames_total.inc(result="dropped")
+            message = dict(tag, error="dropped")
+        except Exception as e:
+            fleet_frames_total.inc(result="error")
+            errors_total.inc(endpoint=endpoint)
+            logger.error("Fleet processing error for bin %s: %s", tag["binId"], e)
+            message = dict(tag, error=f"Processing error: {str(e)}")
+        try:
+            await reply(message)
+        except Exception as e:
+            logger.debug("Fleet reply not delivered: %s", e)
+
+    fleet_connections.inc()
+    try:
+        while True:
+            data = await websocket.receive_json()
+            tag = {"binId": data.get("binId"), "frameId": data.get("frameId")}
+            if tag["binId"] is None or "image" not in data:
+                await reply(dict(tag, error="binId and image are required"))
+                continue
+
+            start = time.perf_counter()
+            requests_total.inc(endpoint=endpoint)
+            bin_id = str(tag["binId"])
+            try:
+                img_data = (
+                    data["image"].split(",")[1]
+                    if "," in data["image"]
+                    else data["image"]
                 )
+                img_bytes = base64.b64decode(img_data)
+                future = fleet.submit(bin_id, (bin_id, img_bytes))
+            except RateLimited:
+                fleet_frames_total.inc(result="rate_limited")
+                await reply(dict(tag, error="rate_limited"))
+                continue
+            except binascii.Error as e:
+                errors_total.inc(endpoint=endpoint)
+                await reply(dict(tag, error=f"Invalid image data: {str(e)}"))
+                continue
 
-            except Exception as e:
-                print(f"WebSocket processing error: {str(e)}")
-                await websocket.send_json({"error": f"Processing error: {str(e)}"})
+            bins.add(bin_id)
+            task = asyncio.create_task(answer(tag, future, start, img_bytes))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
 
     except Exception as e:
-        print(f"WebSocket error: {str(e)}")
+        logger.debug("Fleet connection closed: %s", e)
+    finally:
+        fleet_connections.dec()
+        for task in pending:
+            task.cancel()
+        for bin_id in bins:
+            fleet.forget(bin_id)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,198 @@
+import json
+import queue
+import random
+import threading
+import time
+
+import torch
+
+from AI.inference import load_backbone_model, load_model
+from prediction_cache import file_sha256
+
+
+class ServedModel:
+    def __init__(self, name, model, path, model_hash):
+        self.name = name
+        self.model = model
+        self.path = path
+        self.model_hash = model_hash
+
+
+class ModelRegistry:
+    def __init__(self, config, device="cpu"):
+        """
+        Named models that requests are routed to by their modelType. The
+        config maps names to checkpoints:
+
+            {
+                "default": "resnet50",
+                "models": {
+                    "resnet50": {"path": "...pth", "loader": "legacy"},
+                    "mobilenet": {"path": "...pth", "loader": "backbone",
+                                  "backbone": "mobilenet_v3_small"}
+                },
+                "aliases": {"general": "resnet50"},
+                "shadow": {"primary": "resnet50", "candidate": "mobilenet",
+                           "fraction": 0.1}
+            }
+
+        "legacy" checkpoints go through inference.load_model, "backbone"
+        ones through inference.load_backbone_model. Models are loaded by
+        preload() or on first use, and kept in memory.
+        """
+        self.config = config
+        self.device = device
+        self.default = config["default"]
+        self.aliases = config.get("aliases", {})
+        self.loaded = {}
+        self.hashes = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path, device="cpu"):
+        with open(path, "r") as f:
+            return cls(json.load(f), device)
+
+    @classmethod
+    def single(cls, model_path, device="cpu"):
+        """Registry serving one legacy checkpoint under every model type."""
+        config = {
+            "default": "default",
+            "models": {"default": {"path": model_path, "loader": "legacy"}},
+            "aliases": {"general": "default"},
+        }
+        return cls(config, device)
+
+    def names(self):
+        return sorted(self.config["models"]) + sorted(self.aliases)
+
+    def resolve(self, name):
+        """Canonical model name for a modelType ("default" and None included)."""
+        if name in (None, "", "default"):
+            name = self.default
+        name = self.aliases.get(name, name)
+        if name not in self.config["models"]:
+            raise KeyError(f"Unknown model type: {name}")
+        return name
+
+    def hash_of(self, name):
+        """SHA-256 of a model's checkpoint file (computed once)."""
+        name = self.resolve(name)
+        if name not in self.hashes:
+            self.hashes[name] = file_sha256(self.config["models"][name]["path"])
+        return self.hashes[name]
+
+    def get(self, name=None):
+        name = self.resolve(name)
+        served = self.loaded.get(name)
+        if served is not None:
+            return served
+        with self.lock:
+            if name not in self.loaded:
+                entry = self.config["models"][name]
+                if entry.get("loader", "legacy") == "legacy":
+                    model = load_model(entry["path"]).to(self.device)
+                else:
+                    model = load_backbone_model(
+                        entry["path"], entry.get("backbone", "resnet50"), self.device
+                    )
+                self.loaded[name] = ServedModel(
+                    name, model, entry["path"], self.hash_of(name)
+                )
+            return self.loaded[name]
+
+    def preload(self):
+        """Load every configured model; returns {name: exception} of failures."""
+        errors = {}
+        for name in self.config["models"]:
+            try:
+                self.get(name)
+            except Exception as e:
+                errors[name] = e
+        return errors
+
+
+class ShadowStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.comparisons = 0
+        self.agreements = 0
+        self.dropped = 0
+        self.errors = 0
+        self.latency_delta_sum = 0.0
+        self.probability_delta_sum = 0.0
+
+    def record(self, agree, latency_delta, probability_delta):
+        with self.lock:
+            self.comparisons += 1
+            self.agreements += int(agree)
+            self.latency_delta_sum += latency_delta
+            self.probability_delta_sum += abs(probability_delta)
+
+    def summary(self):
+        with self.lock:
+            n = self.comparisons
+            summary = {"comparisons": n, "dropped": self.dropped, "errors": self.errors}
+            if n:
+                summary.update(
+                    agreement_rate=self.agreements / n,
+                    mean_latency_delta_ms=1000 * self.latency_delta_sum / n,
+                    mean_abs_probability_delta=self.probability_delta_sum / n,
+                )
+            return summary
+
+
+class ShadowRunner:
+    def __init__(self, registry, primary, candidate, fraction=0.1, max_pending=32):
+        """
+        Runs a candidate model on a sampled fraction of the primary model's
+        live traffic in a background thread and records agreement and the
+        latency difference (candidate minus primary). Responses never wait
+        for the candidate: when the backlog exceeds max_pending, samples
+        are dropped instead.
+        """
+        self.registry = registry
+        self.primary = registry.resolve(primary)
+        self.candidate = registry.resolve(candidate)
+        self.fraction = fraction
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.stats = ShadowStats()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def maybe_submit(self, primary, image_tensor, probability, latency):
+        if primary != self.primary or random.random() >= self.fraction:
+            return
+        try:
+            self.jobs.put_nowait((image_tensor, probability, latency))
+        except queue.Full:
+            with self.stats.lock:
+                self.stats.dropped += 1
+
+    def _run(self):
+        while True:
+            image_tensor, probability, latency = self.jobs.get()
+            try:
+                served = self.registry.get(self.candidate)
+                start = time.perf_counter()
+                with torch.no_grad():
+                    logits = served.model(image_tensor.to(self.registry.device))
+                    candidate_probability = torch.sigmoid(logits).item()
+                candidate_latency = time.perf_counter() - start
+                self.stats.record(
+                    (candidate_probability >= 0.5) == (probability >= 0.5),
+                    candidate_latency - latency,
+                    candidate_probability - probability,
+                )
+            except Exception:
+                with self.stats.lock:
+                    self.stats.errors += 1
+
+    def summary(self):
+        return {
+            "primary": self.primary,
+            "candidate": self.candidate,
+            "fraction": self.fraction,
+            "pending": self.jobs.qsize(),
+            **self.stats.summary(),
+        }
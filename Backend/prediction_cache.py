@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from AI.perceptual_hash import dhash, hamming
+
+
+class PerceptualPredictionCache:
+    def __init__(self, max_entries=256, ttl_seconds=2.0, max_distance=4, hash_size=8):
+        """
+        LRU cache of predictions keyed by the perceptual (difference) hash of
+        a frame. A lookup hits when a cached frame is within `max_distance`
+        bits of the new one and younger than `ttl_seconds`, so an idle bin or
+        an item resting on the disk does not re-run the model on every frame.
+        Entries are scoped (e.g. per bin), and a frame only matches frames
+        cached under the same scope.
+
+        Args:
+            max_entries (int): Maximum number of cached frames
+            ttl_seconds (float): Lifetime of a cached verdict
+            max_distance (int): Hamming distance treated as the same frame
+            hash_size (int): dHash grid size (hash_size**2 bits)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self.entries = OrderedDict()  # (scope, hash) -> (stored_at, result)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def frame_hash(self, image):
+        """Hash of a PIL image or HxWx3 array."""
+        return dhash(image, self.hash_size)
+
+    def _expire(self, now):
+        # Hits refresh the LRU position but not the age, so scan everything
+        stale = [
+            key
+            for key, (stored_at, _) in self.entries.items()
+            if now - stored_at > self.ttl_seconds
+        ]
+        for key in stale:
+            del self.entries[key]
+        self.expirations += len(stale)
+
+    def get(self, frame_hash, scope=None):
+        """Return the cached result for a (near-)identical frame, or None."""
+        now = time.monotonic()
+        with self.lock:
+            self._expire(now)
+            match = None
+            if (scope, frame_hash) in self.entries:
+                match = (scope, frame_hash)
+            elif self.max_distance > 0:
+                # Most recent frames are the likeliest matches
+                for key in reversed(self.entries):
+                    if key[0] == scope and hamming(key[1], frame_hash) <= (
+                        self.max_distance
+                    ):
+                        match = key
+                        break
+
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if match[1] != frame_hash:
+                self.near_hits += 1
+            self.entries.move_to_end(match)
+            return self.entries[match][1]
+
+    def put(self, frame_hash, result, scope=None):
+        with self.lock:
+            key = (scope, frame_hash)
+            self.entries[key] = (time.monotonic(), result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "max_distance": self.max_distance,
+            "lookups": lookups,
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hex SHA-256 of a file, read in chunks (e.g. the served checkpoint)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentPredictionCache:
+    def __init__(self, model_hash, max_entries=1024, db_path=None, keep_hashes=()):
+        """
+        Exact-match result cache keyed by the SHA-256 of the uploaded bytes
+        and the hash of the served checkpoint, so re-submitted files skip
+        decoding and inference and a new model never sees stale results.
+
+        A bounded in-memory LRU sits in front of an optional SQLite table
+        that survives restarts. Rows written by other checkpoints are
+        dropped when the cache is opened.
+
+        Args:
+            model_hash (str): Hash of the default checkpoint (file_sha256)
+            max_entries (int): Size of the in-memory LRU tier
+            db_path (str): SQLite file for the disk tier (None disables it)
+            keep_hashes: Hashes of other served checkpoints to keep rows for
+        """
+        self.model_hash = model_hash
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> result
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, model_hash TEXT, result TEXT, created_at REAL)"
+            )
+            served = [model_hash, *keep_hashes]
+            self.db.execute(
+                "DELETE FROM predictions WHERE model_hash NOT IN (%s)"
+                % ",".join("?" * len(served)),
+                served,
+            )
+            self.db.commit()
+
+    def key(self, content, model_hash=None):
+        """Cache key of an upload's raw bytes under a model (default model)."""
+        model_hash = model_hash or self.model_hash
+        return hashlib.sha256(content).hexdigest() + ":" + model_hash
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return self.entries[key]
+
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT result FROM predictions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.disk_hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        with self.lock:
+            self._remember(key, result)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                    (key, key.split(":")[1], json.dumps(result), time.time()),
+                )
+                self.db.commit()
+
+    def _remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        stats = {
+            "model_hash": self.model_hash,
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "lookups": lookups,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+        if self.db is not None:
+            with self.lock:
+                stats["disk_size"] = self.db.execute(
+                    "SELECT COUNT(*) FROM predictions"
+                ).fetchone()[0]
+        return stats
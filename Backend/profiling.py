@@ -0,0 +1,191 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import torch
+
+
+class ArtifactDirectory:
+    def __init__(self, path, max_files=20, max_bytes=200 * 1024 * 1024):
+        """
+        Directory of profiling artifacts bounded in file count and total
+        size; the oldest artifacts are deleted first.
+        """
+        self.path = path
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    def new_path(self, prefix, extension):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return os.path.join(self.path, f"{prefix}_{timestamp}{extension}")
+
+    def list(self):
+        """[(name, size, mtime)], oldest first."""
+        entries = []
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((name, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def prune(self):
+        entries = self.list()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_files or total > self.max_bytes):
+            name, size, _ = entries.pop(0)
+            os.remove(os.path.join(self.path, name))
+            total -= size
+
+    def resolve(self, name):
+        """Path of an existing artifact, or None for any other name."""
+        if name in {entry[0] for entry in self.list()}:
+            return os.path.join(self.path, name)
+        return None
+
+
+class TorchProfileSession:
+    def __init__(self, artifacts):
+        """
+        On-demand torch.profiler capture of the next N inferences or of a
+        time window. The serving code calls step() after each inference;
+        while no capture is active this is a single attribute check. The
+        trace of a finished capture is exported on a background thread, so
+        the inference (or event loop) that ends it is not held up.
+        """
+        self.artifacts = artifacts
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.remaining = None
+        self.deadline = None
+        self.last_trace = None
+        self.exporter = None
+
+    @property
+    def active(self):
+        return self.profiler is not None
+
+    def start(self, inferences=None, seconds=None):
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        with self.lock:
+            if self.profiler is not None:
+                raise RuntimeError("A torch profiler capture is already running")
+            self.remaining = inferences
+            self.deadline = time.monotonic() + seconds if seconds else None
+            self.profiler = torch.profiler.profile(
+                activities=activities, record_shapes=True, with_stack=False
+            )
+            self.profiler.start()
+
+    def step(self):
+        if self.profiler is None:
+            return
+        with self.lock:
+            if self.profiler is None:
+                return
+            if self.remaining is not None:
+                self.remaining -= 1
+            expired = self.deadline is not None and time.monotonic() >= self.deadline
+            if expired or self.remaining == 0:
+                self._finish()
+
+    def check_deadline(self):
+        """Stop a time-window capture even if no inference arrives."""
+        with self.lock:
+            if (
+                self.profiler is not None
+                and self.deadline is not None
+                and time.monotonic() >= self.deadline
+            ):
+                self._finish()
+
+    def stop(self):
+        with self.lock:
+            if self.profiler is not None:
+                self._finish()
+            exporter = self.exporter
+        if exporter is not None:
+            exporter.join()
+        return self.last_trace
+
+    def _finish(self):
+        # Caller holds self.lock
+        profiler, self.profiler = self.profiler, None
+        profiler.stop()
+        self.exporter = threading.Thread(
+            target=self._export, args=(profiler,), daemon=True
+        )
+        self.exporter.start()
+
+    def _export(self, profiler):
+        path = self.artifacts.new_path("torch_trace", ".json")
+        profiler.export_chrome_trace(path)
+        self.last_trace = os.path.basename(path)
+        self.artifacts.prune()
+
+
+class SamplingProfiler:
+    def __init__(self, artifacts):
+        """
+        Low-overhead sampling profiler for the whole process: a daemon
+        thread snapshots every thread's Python stack (sys._current_frames)
+        at a fixed interval and writes the counts as collapsed stacks
+        ("thread;file:function:line;... count"), the input format of
+        flamegraph.pl and speedscope.
+        """
+        self.artifacts = artifacts
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.last_output = None
+
+    @property
+    def active(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds=30.0, interval=0.01):
+        if self.active:
+            raise RuntimeError("A sampling capture is already running")
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self._run, args=(seconds, interval), daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        return self.last_output
+
+    def _run(self, seconds, interval):
+        own_id = threading.get_ident()
+        names = {}
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline and not self.stop_event.wait(interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    filename = os.path.basename(code.co_filename)
+                    stack.append(f"{filename}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(stack))] += 1
+
+        path = self.artifacts.new_path("stacks", ".folded")
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self.last_output = os.path.basename(path)
+        self.artifacts.prune()
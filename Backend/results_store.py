@@ -0,0 +1,173 @@
+import os
+import re
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+
+from PIL import Image
+
+
+# Names the backend writes: "result_<uuid>.jpg", "debug_original_<uuid>.jpg",
+# ... Anything else (separators, "..", NUL, other extensions) never reaches
+# the filesystem.
+RESULT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,200}\.(?:jpg|jpeg|png)", re.A)
+THUMBNAIL_SIZES = (128, 256, 512)
+CHUNK_SIZE = 64 * 1024
+
+
+class ResultStore:
+    def __init__(self, root, sizes=THUMBNAIL_SIZES, max_age=86400, generate=None):
+        """
+        Read side of the result-image directory. Result files are written
+        once under unique names and never modified, so they are served with
+        a strong ETag (mtime and size) and a long immutable Cache-Control.
+        Thumbnails at a few fixed sizes are generated on first request into
+        root/thumbs/ and regenerated only if the source is newer.
+
+        Args:
+            root (str): Result image directory (OUTPUT_DIR)
+            sizes: Allowed thumbnail sizes (longest side, pixels)
+            max_age (int): Cache-Control max-age in seconds
+            generate: Optional generate(name, path) -> bool that creates a
+                missing result on first request (see annotation.Annotator)
+        """
+        self.root = root
+        self.sizes = tuple(sizes)
+        self.max_age = max_age
+        self.generate = generate
+        self.thumb_dir = os.path.join(root, "thumbs")
+        os.makedirs(self.thumb_dir, exist_ok=True)
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+    def resolve(self, name):
+        """Path of a result image, or None for a name that cannot be one."""
+        if not RESULT_NAME.fullmatch(name):
+            return None
+        return os.path.join(self.root, name)
+
+    def _lock(self, key):
+        with self.locks_lock:
+            return self.locks.setdefault(key, threading.Lock())
+
+    def ensure(self, name):
+        """
+        Path of a result image, generated first if it is missing and the
+        generate hook knows the name. Raises FileNotFoundError otherwise.
+        """
+        path = self.resolve(name)
+        if os.path.exists(path) or self.generate is None:
+            return path
+        with self._lock(path):
+            if not os.path.exists(path) and not self.generate(name, path):
+                raise FileNotFoundError(path)
+        with self.locks_lock:
+            self.locks.pop(path, None)
+        return path
+
+    def materialize(self, name, size=None):
+        """ensure() for the full image, thumbnail() for a size."""
+        if size is None:
+            return self.ensure(name)
+        return self.thumbnail(name, size)
+
+    def thumbnail(self, name, size):
+        """
+        Path of the `size` thumbnail of a result image, created if missing
+        or stale. Raises FileNotFoundError when the source does not exist.
+        """
+        source = self.ensure(name)
+        stem = os.path.splitext(name)[0]
+        path = os.path.join(self.thumb_dir, f"{stem}_{size}.jpg")
+        source_mtime = os.stat(source).st_mtime_ns
+        try:
+            if os.stat(path).st_mtime_ns >= source_mtime:
+                return path
+        except FileNotFoundError:
+            pass
+
+        # One generator per thumbnail; concurrent requests wait for it
+        with self._lock(path):
+            try:
+                if os.stat(path).st_mtime_ns >= source_mtime:
+                    return path
+            except FileNotFoundError:
+                pass
+            with Image.open(source) as image:
+                # JPEG draft mode decodes at a reduced scale directly
+                image.draft("RGB", (size, size))
+                image = image.convert("RGB")
+                image.thumbnail((size, size), Image.BILINEAR)
+                temp_path = f"{path}.{threading.get_ident()}.tmp"
+                image.save(temp_path, "JPEG", quality=85)
+            os.replace(temp_path, path)
+        with self.locks_lock:
+            self.locks.pop(path, None)
+        return path
+
+    def headers(self, stat):
+        """Validators and caching headers of a file."""
+        return {
+            "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+            "Cache-Control": f"public, max-age={self.max_age}, immutable",
+            "Accept-Ranges": "bytes",
+        }
+
+
+def not_modified(request_headers, headers, stat):
+    """Evaluate If-None-Match (preferred) or If-Modified-Since."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or headers["ETag"] in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(stat.st_mtime) <= since
+    return False
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive of a single "bytes=" range, or None to send the
+    whole file (absent, malformed or multi-range headers, or a last byte
+    before the first). Raises ValueError for an unsatisfiable range, i.e.
+    one starting past the end of the file.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes=") :].strip().partition("-")
+    try:
+        if start:
+            start = int(start)
+            if not end:
+                end = size - 1
+            elif int(end) < start:
+                return None  # invalid, so the header is ignored
+            else:
+                end = min(int(end), size - 1)
+        elif end:
+            start, end = max(size - int(end), 0), size - 1  # suffix range
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size:
+        raise ValueError(f"bytes */{size}")
+    return start, end
+
+
+def iter_file_range(path, start, end, chunk_size=CHUNK_SIZE):
+    """Bytes start..end (inclusive) of a file, in chunks."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
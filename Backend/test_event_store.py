@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from event_store import HOUR, PredictionEventStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    # Flushed by the tests only
+    store = PredictionEventStore(
+        str(tmp_path / "events.db"), flush_size=10**6, flush_interval=60
+    )
+    yield store
+    store.close()
+
+
+def raw_aggregate(store, start, end, bin_id=None):
+    """Reference per-bin sums straight from the raw events."""
+    query = (
+        "SELECT bin_id, COUNT(*), SUM(prediction), SUM(probability), "
+        "SUM(latency_ms) FROM events WHERE ts >= ? AND ts < ?"
+    )
+    params = [start, end]
+    if bin_id is not None:
+        query += " AND bin_id = ?"
+        params.append(bin_id)
+    rows = store.db.execute(query + " GROUP BY bin_id", params).fetchall()
+    return {row[0]: row[1:] for row in rows}
+
+
+def test_aggregate_matches_raw_scan(store):
+    rng = random.Random(0)
+    base = 1000 * HOUR
+    for _ in range(2000):
+        probability = rng.random()
+        store.record(
+            rng.choice(["bin-a", "bin-b", "bin-c"]),
+            probability,
+            probability >= 0.5,
+            rng.uniform(0.005, 0.05),
+            model=rng.choice(["resnet50", "mobilenet"]),
+            timestamp=base + rng.uniform(0, 6 * HOUR),
+        )
+    assert store.flush() == 2000
+
+    # Whole hours from the rollup plus partial hours at both ends
+    start, end = base + 0.4 * HOUR, base + 5.3 * HOUR
+    for bin_id in (None, "bin-b"):
+        expected = raw_aggregate(store, start, end, bin_id)
+        groups = store.aggregate(start, end, bin_id=bin_id)
+        assert {g["bin"] for g in groups} == set(expected)
+        for group in groups:
+            events, contaminated, probability_sum, latency_sum = expected[group["bin"]]
+            assert group["events"] == events
+            assert group["contaminated"] == contaminated
+            assert group["mean_probability"] == pytest.approx(probability_sum / events)
+            assert group["mean_latency_ms"] == pytest.approx(latency_sum / events)
+
+
+def test_aggregate_within_one_hour_reads_raw_events(store):
+    base = 1000 * HOUR
+    store.record("bin", 0.9, 1, 0.01, timestamp=base + 10)
+    store.record("bin", 0.1, 0, 0.03, timestamp=base + 20)
+    store.record("bin", 0.8, 1, 0.02, timestamp=base + 30)
+    store.flush()
+
+    (group,) = store.aggregate(base + 15, base + 35, group_by="all")
+    assert group["events"] == 2
+    assert group["contamination_rate"] == 0.5
+    assert group["mean_latency_ms"] == pytest.approx(25.0)
+
+
+def test_failed_flush_keeps_events(store, monkeypatch):
+    store.record("bin", 0.5, 1, 0.01)
+
+    def fail(events, rollup):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_write", fail)
+    assert store.flush() == 0
+    stats = store.stats()
+    assert stats["buffered"] == 1
+    assert stats["errors"] == 1
+
+    monkeypatch.undo()
+    assert store.flush() == 1
+    assert store.stats()["written"] == 1
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from gateway import FleetScheduler, FrameDropped, RateLimited, TokenBucket
+
+
+def test_token_bucket_allows_burst_then_refills():
+    bucket = TokenBucket(rate=1.0, burst=2)
+    assert bucket.allow()
+    assert bucket.allow()
+    assert not bucket.allow()
+
+    bucket.updated -= 1.0  # one second later
+    assert bucket.allow()
+    assert not bucket.allow()
+
+
+def test_batches_are_filled_round_robin():
+    async def scenario():
+        scheduler = FleetScheduler(lambda payloads: payloads, max_batch=4)
+        for i in range(3):
+            scheduler.submit("noisy", f"noisy-{i}")
+        scheduler.submit("quiet-a", "quiet-a-0")
+        scheduler.submit("quiet-b", "quiet-b-0")
+        first = [frame.payload for frame in scheduler._take_batch()]
+        second = [frame.payload for frame in scheduler._take_batch()]
+        return first, second, scheduler.queued
+
+    first, second, queued = asyncio.run(scenario())
+    assert first == ["noisy-0", "quiet-a-0", "quiet-b-0", "noisy-1"]
+    assert second == ["noisy-2"]
+    assert queued == 0
+
+
+def test_full_bin_queue_drops_oldest_frame():
+    async def scenario():
+        scheduler = FleetScheduler(lambda payloads: payloads, queue_per_bin=2)
+        futures = [scheduler.submit("bin", i) for i in range(3)]
+        batch = [frame.payload for frame in scheduler._take_batch()]
+        return futures, batch, scheduler.summary()
+
+    futures, batch, summary = asyncio.run(scenario())
+    with pytest.raises(FrameDropped):
+        futures[0].result()
+    assert batch == [1, 2]
+    assert summary["dropped"] == 1
+
+
+def test_rate_limited_bin_is_rejected():
+    async def scenario():
+        scheduler = FleetScheduler(lambda payloads: payloads, rate=0.0, burst=1)
+        scheduler.submit("bin", 0)
+        with pytest.raises(RateLimited):
+            scheduler.submit("bin", 1)
+        # Other bins have buckets of their own
+        scheduler.submit("other", 0)
+        return scheduler.summary()
+
+    summary = asyncio.run(scenario())
+    assert summary["rate_limited"] == 1
+    assert summary["bins"] == 2
+
+
+def test_worker_resolves_futures_with_batch_results():
+    async def scenario():
+        scheduler = FleetScheduler(
+            lambda payloads: [p * 10 for p in payloads], max_wait=0.001
+        )
+        scheduler.start()
+        try:
+            futures = [scheduler.submit(f"bin-{i}", i) for i in range(3)]
+            return await asyncio.wait_for(asyncio.gather(*futures), timeout=5)
+        finally:
+            await scheduler.stop()
+
+    assert asyncio.run(scenario()) == [0, 10, 20]
+
+
+def test_forgotten_bin_is_released_once_drained():
+    async def scenario():
+        scheduler = FleetScheduler(lambda payloads: payloads, max_batch=1)
+        scheduler.submit("gone", 0)
+        scheduler.submit("gone", 1)
+        scheduler.forget("gone")
+        states = [len(scheduler.queues)]
+        scheduler._take_batch()
+        states.append(len(scheduler.queues))
+        scheduler._take_batch()
+        states.append(len(scheduler.queues))
+        return states, scheduler.summary()["bins"]
+
+    states, bins = asyncio.run(scenario())
+    assert states == [1, 1, 0]
+    assert bins == 0
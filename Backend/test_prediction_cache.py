@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+from prediction_cache import ContentPredictionCache, PerceptualPredictionCache
+
+
+def test_key_depends_on_content_and_model():
+    cache = ContentPredictionCache("model-a")
+    key = cache.key(b"image bytes")
+    assert key == cache.key(b"image bytes", "model-a")
+    assert key != cache.key(b"other bytes")
+    assert key != cache.key(b"image bytes", "model-b")
+    assert key.endswith(":model-a")
+
+
+def test_memory_tier_is_lru(tmp_path):
+    cache = ContentPredictionCache("model-a", max_entries=2)
+    keys = [cache.key(bytes([i])) for i in range(3)]
+    cache.put(keys[0], {"classLabel": 0})
+    cache.put(keys[1], {"classLabel": 1})
+    assert cache.get(keys[0]) == {"classLabel": 0}
+    cache.put(keys[2], {"classLabel": 1})
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+
+
+def test_disk_tier_drops_rows_of_unserved_models(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    cache = ContentPredictionCache("model-a", db_path=db_path, keep_hashes=["model-b"])
+    key_a = cache.key(b"image", "model-a")
+    key_b = cache.key(b"image", "model-b")
+    cache.put(key_a, {"classLabel": 1})
+    cache.put(key_b, {"classLabel": 0})
+    cache.db.close()
+
+    # Restart with a new default checkpoint that still serves model-b
+    cache = ContentPredictionCache("model-c", db_path=db_path, keep_hashes=["model-b"])
+    assert cache.get(key_a) is None
+    assert cache.get(key_b) == {"classLabel": 0}
+
+
+def test_perceptual_cache_matches_near_frames_of_the_same_bin():
+    cache = PerceptualPredictionCache(max_distance=2)
+    cache.put(0b1011_0000, {"prediction": 1}, "bin-a")
+    assert cache.get(0b1011_0000, "bin-a") == {"prediction": 1}
+    assert cache.get(0b1011_0011, "bin-a") == {"prediction": 1}  # 2 bits off
+    assert cache.get(0b1011_0111, "bin-a") is None  # 3 bits off
+    assert cache.get(0b1011_0000, "bin-b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["near_hits"], stats["misses"]) == (2, 1, 2)
+
+
+def test_perceptual_cache_expires_entries():
+    cache = PerceptualPredictionCache(ttl_seconds=1.0)
+    cache.put(0b1, {"prediction": 0}, "bin")
+    assert cache.get(0b1, "bin") is not None
+    key = ("bin", 0b1)
+    stored_at, result = cache.entries[key]
+    cache.entries[key] = (stored_at - 2.0, result)
+    assert cache.get(0b1, "bin") is None
+    assert cache.stats()["expirations"] == 1
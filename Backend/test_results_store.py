@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("PIL")
+from results_store import RESULT_NAME, not_modified, parse_range
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "result_0b6f7c1e-2d4a-4c3b-9a8e-1f2e3d4c5b6a.jpg",
+        "debug_original_0b6f7c1e-2d4a-4c3b-9a8e-1f2e3d4c5b6a.jpg",
+        "result_0b6f7c1e-2d4a-4c3b-9a8e-1f2e3d4c5b6a_c1_p0.9731.jpg",
+        "frame.png",
+    ],
+)
+def test_result_name_accepts_backend_files(name):
+    assert RESULT_NAME.fullmatch(name)
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["../main.py", "..jpg", "thumbs/x.jpg", "a\\b.jpg", "x.txt", ".jpg", "x.jpg\0"],
+)
+def test_result_name_rejects_other_paths(name):
+    assert not RESULT_NAME.fullmatch(name)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("bytes=0-99", (0, 99)),
+        ("bytes=10-", (10, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+        ("bytes=990-5000", (990, 999)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+        ("bytes=a-b", None),
+        ("bytes=-", None),
+        ("bytes=5-2", None),
+        ("bytes=2000-1000", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-2000", "bytes=-5"])
+def test_parse_range_past_the_end_is_unsatisfiable(header):
+    size = 0 if header == "bytes=-5" else 1000
+    with pytest.raises(ValueError, match=rf"bytes \*/{size}"):
+        parse_range(header, size)
+
+
+def make_stat(mtime=1_700_000_000.0, size=1234):
+    return SimpleNamespace(st_mtime=mtime, st_mtime_ns=int(mtime * 1e9), st_size=size)
+
+
+def test_not_modified_by_etag():
+    stat = make_stat()
+    headers = {"ETag": '"abc-4d2"'}
+    assert not_modified({"if-none-match": '"abc-4d2"'}, headers, stat)
+    assert not_modified({"if-none-match": '"x", W/"abc-4d2"'}, headers, stat)
+    assert not_modified({"if-none-match": "*"}, headers, stat)
+    assert not not_modified({"if-none-match": '"other"'}, headers, stat)
+    # If-None-Match takes precedence over If-Modified-Since
+    assert not not_modified(
+        {
+            "if-none-match": '"other"',
+            "if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT",
+        },
+        headers,
+        stat,
+    )
+
+
+def test_not_modified_by_date():
+    stat = make_stat()
+    headers = {"ETag": '"abc"'}
+    assert not_modified(
+        {"if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT"}, headers, stat
+    )
+    assert not not_modified(
+        {"if-modified-since": "Thu, 01 Jan 2015 00:00:00 GMT"}, headers, stat
+    )
+    assert not not_modified({"if-modified-since": "yesterday"}, headers, stat)
+    assert not not_modified({}, headers, stat)
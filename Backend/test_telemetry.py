@@ -0,0 +1,37 @@
+from telemetry import Registry
+
+
+def test_counter_and_gauge_rendering():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ["endpoint"])
+    queued = registry.gauge("queued", "Queued frames", function=lambda: 3)
+    requests.inc(endpoint="/predict")
+    requests.inc(2, endpoint="/predict")
+    requests.inc(endpoint='/a"b')
+
+    text = registry.render()
+    assert text.endswith("\n")
+    assert "# HELP requests_total Requests\n# TYPE requests_total counter" in text
+    assert 'requests_total{endpoint="/predict"} 3.0' in text
+    assert 'requests_total{endpoint="/a\\"b"} 1.0' in text
+    assert "# TYPE queued gauge\nqueued 3.0" in text
+    assert queued.samples() == [("", "", 3)]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram(
+        "latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0)
+    )
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value, stage="forward")
+
+    lines = registry.render().splitlines()
+    assert lines[1] == "# TYPE latency_seconds histogram"
+    assert lines[2:] == [
+        'latency_seconds_bucket{stage="forward",le="0.1"} 1.0',
+        'latency_seconds_bucket{stage="forward",le="1.0"} 3.0',
+        'latency_seconds_bucket{stage="forward",le="+Inf"} 4.0',
+        'latency_seconds_sum{stage="forward"} 6.05',
+        'latency_seconds_count{stage="forward"} 4.0',
+    ]